@@ -0,0 +1,37 @@
+"""Opportunity skills
+
+Revision ID: 4d7a2c9e6b18
+Revises: 9b3e6f1c2a47
+Create Date: 2026-10-18 16:21:07.442913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4d7a2c9e6b18'
+down_revision: Union[str, Sequence[str], None] = '9b3e6f1c2a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('opportunity_skills',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('opportunity_id', sa.Integer(), nullable=False),
+    sa.Column('skill', sa.String(), nullable=False),
+    sa.Column('min_proficiency', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['opportunity_id'], ['opportunities.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_opportunity_skills_opportunity_id'), 'opportunity_skills', ['opportunity_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_opportunity_skills_opportunity_id'), table_name='opportunity_skills')
+    op.drop_table('opportunity_skills')
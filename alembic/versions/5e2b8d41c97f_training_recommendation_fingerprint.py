@@ -0,0 +1,32 @@
+"""Training recommendation fingerprint
+
+Revision ID: 5e2b8d41c97f
+Revises: a3f0c6d18e42
+Create Date: 2026-10-18 10:48:03.129554
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2b8d41c97f'
+down_revision: Union[str, Sequence[str], None] = 'a3f0c6d18e42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('training_recommendations', sa.Column('skills_fingerprint', sa.String(length=64), nullable=True))
+    op.add_column('training_recommendations', sa.Column('generated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True))
+    op.create_index(op.f('ix_training_recommendations_user_id'), 'training_recommendations', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_training_recommendations_user_id'), table_name='training_recommendations')
+    op.drop_column('training_recommendations', 'generated_at')
+    op.drop_column('training_recommendations', 'skills_fingerprint')
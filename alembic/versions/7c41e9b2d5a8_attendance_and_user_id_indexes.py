@@ -0,0 +1,47 @@
+"""Attendance and user_id indexes
+
+Revision ID: 7c41e9b2d5a8
+Revises: 36033a25ae49
+Create Date: 2026-10-18 09:12:40.318215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c41e9b2d5a8'
+down_revision: Union[str, Sequence[str], None] = '36033a25ae49'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep only the latest row per (user_id, date) so the unique index can be built
+    op.execute(
+        """
+        DELETE FROM attendance
+        WHERE id NOT IN (
+            SELECT MAX(id) FROM attendance GROUP BY user_id, date
+        )
+        """
+    )
+    op.create_index('ix_attendance_user_id_date', 'attendance', ['user_id', 'date'], unique=True)
+    op.create_index(op.f('ix_skills_user_id'), 'skills', ['user_id'], unique=False)
+    op.create_index(op.f('ix_assessments_user_id'), 'assessments', ['user_id'], unique=False)
+    op.create_index(op.f('ix_completed_trainings_consultant_id'), 'completed_trainings', ['consultant_id'], unique=False)
+    op.create_index(op.f('ix_trainings_user_id'), 'trainings', ['user_id'], unique=False)
+    op.create_index(op.f('ix_recommendations_user_id'), 'recommendations', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_recommendations_user_id'), table_name='recommendations')
+    op.drop_index(op.f('ix_trainings_user_id'), table_name='trainings')
+    op.drop_index(op.f('ix_completed_trainings_consultant_id'), table_name='completed_trainings')
+    op.drop_index(op.f('ix_assessments_user_id'), table_name='assessments')
+    op.drop_index(op.f('ix_skills_user_id'), table_name='skills')
+    op.drop_index('ix_attendance_user_id_date', table_name='attendance')
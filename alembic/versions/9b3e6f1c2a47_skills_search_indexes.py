@@ -0,0 +1,37 @@
+"""Skills search indexes
+
+Revision ID: 9b3e6f1c2a47
+Revises: e41a9c7b5d20
+Create Date: 2026-10-18 15:10:42.871205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b3e6f1c2a47'
+down_revision: Union[str, Sequence[str], None] = 'e41a9c7b5d20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        # text_pattern_ops lets LIKE 'term%' use the btree whatever the collation;
+        # the trigram GIN index serves LIKE '%term%'
+        op.execute("CREATE INDEX ix_skills_lower_skill ON skills (lower(skill) text_pattern_ops, proficiency)")
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute("CREATE INDEX ix_skills_lower_skill_trgm ON skills USING gin (lower(skill) gin_trgm_ops)")
+    else:
+        op.create_index('ix_skills_lower_skill', 'skills', [sa.text('lower(skill)'), 'proficiency'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_index('ix_skills_lower_skill_trgm', table_name='skills')
+    op.drop_index('ix_skills_lower_skill', table_name='skills')
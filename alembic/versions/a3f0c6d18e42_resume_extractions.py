@@ -0,0 +1,34 @@
+"""Resume extraction cache
+
+Revision ID: a3f0c6d18e42
+Revises: 7c41e9b2d5a8
+Create Date: 2026-10-18 10:05:12.774031
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f0c6d18e42'
+down_revision: Union[str, Sequence[str], None] = '7c41e9b2d5a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('resume_extractions',
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('text', sa.Text(), nullable=True),
+    sa.Column('skills_json', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('content_hash')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('resume_extractions')
@@ -0,0 +1,42 @@
+"""Resume blobs
+
+Revision ID: b5c19e7f3a60
+Revises: 4d7a2c9e6b18
+Create Date: 2026-10-18 17:03:51.208316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5c19e7f3a60'
+down_revision: Union[str, Sequence[str], None] = '4d7a2c9e6b18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('resume_blobs',
+    sa.Column('digest', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('content_type', sa.String(length=100), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('digest')
+    )
+    # Existing resumes/ files are moved in by: python -m app.utils.resume_storage --import-legacy
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.add_column(sa.Column('resume_digest', sa.String(length=64), nullable=True))
+        batch_op.create_foreign_key('fk_users_resume_digest_resume_blobs', 'resume_blobs', ['resume_digest'], ['digest'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_constraint('fk_users_resume_digest_resume_blobs', type_='foreignkey')
+        batch_op.drop_column('resume_digest')
+    op.drop_table('resume_blobs')
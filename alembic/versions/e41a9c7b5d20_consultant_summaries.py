@@ -0,0 +1,57 @@
+"""Consultant summaries
+
+Revision ID: e41a9c7b5d20
+Revises: c8d2f7a90b13
+Create Date: 2026-10-18 14:02:19.318604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41a9c7b5d20'
+down_revision: Union[str, Sequence[str], None] = 'c8d2f7a90b13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('consultant_summaries',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('present_days', sa.Integer(), nullable=False),
+    sa.Column('total_days', sa.Integer(), nullable=False),
+    sa.Column('completed_trainings', sa.Integer(), nullable=False),
+    sa.Column('skill_count', sa.Integer(), nullable=False),
+    sa.Column('latest_assessment_id', sa.Integer(), nullable=True),
+    sa.Column('latest_assessment_topic', sa.String(length=50), nullable=True),
+    sa.Column('latest_assessment_percentage', sa.Integer(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    # Backfill from the existing rows (same result as `python -m app.utils.consultant_summary --rebuild`)
+    op.execute("""
+        INSERT INTO consultant_summaries (
+            user_id, present_days, total_days, completed_trainings, skill_count,
+            latest_assessment_id, latest_assessment_topic, latest_assessment_percentage
+        )
+        SELECT
+            u.id,
+            (SELECT COUNT(*) FROM attendance a WHERE a.user_id = u.id AND a.status = 'present'),
+            (SELECT COUNT(*) FROM attendance a WHERE a.user_id = u.id),
+            (SELECT COUNT(*) FROM completed_trainings t WHERE t.consultant_id = u.id),
+            (SELECT COUNT(*) FROM skills s WHERE s.user_id = u.id),
+            la.id, la.topic, la.percentage
+        FROM users u
+        LEFT JOIN assessments la ON la.id = (SELECT MAX(x.id) FROM assessments x WHERE x.user_id = u.id)
+        WHERE u.role = 'consultant'
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('consultant_summaries')
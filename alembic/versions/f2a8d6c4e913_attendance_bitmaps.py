@@ -0,0 +1,60 @@
+"""Attendance bitmaps
+
+Revision ID: f2a8d6c4e913
+Revises: b5c19e7f3a60
+Create Date: 2026-10-18 17:48:36.915027
+
+"""
+from collections import defaultdict
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a8d6c4e913'
+down_revision: Union[str, Sequence[str], None] = 'b5c19e7f3a60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bitmaps = op.create_table('attendance_bitmaps',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('start_date', sa.Date(), nullable=True),
+    sa.Column('recorded', sa.LargeBinary(), nullable=False),
+    sa.Column('present', sa.LargeBinary(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    # Backfill from the existing rows (same layout as app/utils/attendance_bitmap.py,
+    # which also rebuilds them: python -m app.utils.attendance_bitmap --rebuild)
+    days = defaultdict(list)
+    for user_id, day, status in op.get_bind().execute(sa.text(
+        "SELECT user_id, date, status FROM attendance WHERE user_id IS NOT NULL AND date IS NOT NULL"
+    )):
+        if isinstance(day, str):  # SQLite returns raw text here
+            day = date.fromisoformat(day)
+        days[user_id].append((day, status))
+    rows = []
+    for user_id, entries in days.items():
+        start = min(day for day, _ in entries)
+        size = ((max(day for day, _ in entries) - start).days // 8) + 1
+        recorded, present = bytearray(size), bytearray(size)
+        for day, status in entries:
+            byte, bit = divmod((day - start).days, 8)
+            recorded[byte] |= 1 << bit
+            if status == "present":
+                present[byte] |= 1 << bit
+        rows.append({"user_id": user_id, "start_date": start, "recorded": bytes(recorded), "present": bytes(present)})
+    if rows:
+        op.bulk_insert(bitmaps, rows)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('attendance_bitmaps')
@@ -11,9 +11,66 @@ load_dotenv()
 # Replace with your actual PostgreSQL details
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# Pool tuning; size the pool against (uvicorn workers x threadpool size)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))  # seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))  # seconds; -1 disables
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 0))  # 0 disables
+
+from sqlalchemy.engine import make_url
+from app.utils.db_pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool
+
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """Pool and connection options for create_engine, from the DB_* settings"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}  # in-memory SQLite keeps SQLAlchemy's single-connection pool
+
+    options = {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        # Detects connections dropped by a failover before handing them out
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    if DB_STATEMENT_TIMEOUT_MS and parsed.get_backend_name() == "postgresql":
+        if is_async:  # asyncpg takes server settings instead of libpq options
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+
+def async_database_url(url: str) -> str:
+    """Same database through an asyncio driver: asyncpg for Postgres, aiosqlite for SQLite"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "postgresql":
+        return parsed.set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+    if backend == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    return url
+
+
 # Create the SQLAlchemy engine
 
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+
+# Async engine for `async def` handlers, so DB calls don't block the event loop
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+ASYNC_DATABASE_URL = async_database_url(DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL, is_async=True))
+
+# Per-request statement counts and DB time (Server-Timing, N+1 warnings)
+from app.utils.sql_instrumentation import instrument_engine
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
 # try:
 #     engine = create_engine(DATABASE_URL)
 #     # Test connection
@@ -26,6 +83,8 @@ engine = create_engine(DATABASE_URL)
 
 # Create a session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Objects stay usable after commit; async sessions can't lazy-load expired attributes
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 # Base class for models
 # Base = declarative_base()
@@ -44,3 +103,18 @@ def get_db():
     finally:
         db.close()
 
+
+async def get_async_db():
+    """AsyncSession dependency for `async def` routes"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+
+def dialect_insert(db, model):
+    """INSERT construct for the session's dialect, so callers can use ON CONFLICT."""
+    if db.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert(model)
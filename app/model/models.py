@@ -9,13 +9,13 @@ from app.database import Base
 from sqlalchemy import Column, Integer, String, Boolean, Date, ForeignKey
 from sqlalchemy.orm import relationship
 from app.database import Base
-from sqlalchemy import Time
+from sqlalchemy import Time, Index, Text, LargeBinary, func
 
 
 class Assessment(Base):
     __tablename__ = "assessments"
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     topic = Column(String(50))
     score = Column(Integer)
     percentage = Column(Integer)
@@ -32,6 +32,10 @@ class LearningProgress(Base):
 
 class Attendance(Base):
     __tablename__ = "attendance"
+    # One row per consultant per day; also serves every user_id/date lookup
+    __table_args__ = (
+        Index("ix_attendance_user_id_date", "user_id", "date", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -47,10 +51,15 @@ class Skill(Base):
     id = Column(Integer, primary_key=True, index=True)
     skill = Column(String, nullable=False)
     proficiency = Column(Integer, nullable=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
 
     user = relationship("User", back_populates="skills")
 
+
+# Case-insensitive skill search (app/utils/skill_search.py). On Postgres the
+# migration builds it with text_pattern_ops, plus a pg_trgm index for substrings.
+Index("ix_skills_lower_skill", func.lower(Skill.skill), Skill.proficiency)
+
 # Add to models.py
 
 # Add these imports at the top of your models.py
@@ -66,6 +75,20 @@ class Opportunity(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     user = relationship("User", back_populates="opportunities")
+    required_skills = relationship("OpportunitySkill", back_populates="opportunity",
+                                   cascade="all, delete-orphan")
+
+
+class OpportunitySkill(Base):
+    """A skill an opportunity requires (matched by app/utils/opportunity_matching.py)"""
+    __tablename__ = "opportunity_skills"
+
+    id = Column(Integer, primary_key=True)
+    opportunity_id = Column(Integer, ForeignKey("opportunities.id", ondelete="CASCADE"), nullable=False, index=True)
+    skill = Column(String, nullable=False)
+    min_proficiency = Column(Integer, nullable=True)  # 1-10, None = any level
+
+    opportunity = relationship("Opportunity", back_populates="required_skills")
 
 # in app/model/models.py
 
@@ -76,7 +99,7 @@ from app.database import Base
 class Training(Base):
     __tablename__ = 'trainings'
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     title = Column(String)
     provider = Column(String)
     completed_date = Column(Date)
@@ -86,7 +109,7 @@ class Training(Base):
 class Recommendation(Base):
     __tablename__ = 'recommendations'
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     title = Column(String)
     provider = Column(String)
     duration = Column(String)
@@ -98,21 +121,88 @@ class TrainingRecommendation(Base):
     __tablename__ = "training_recommendations"
 
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     skill = Column(String)
     course_title = Column(String)
     platform = Column(String)
     link = Column(String)
     reason = Column(String)
+    # sha256 of the consultant's sorted (skill, proficiency) set at generation time
+    skills_fingerprint = Column(String(64), nullable=True)
+    generated_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
 class CompletedTraining(Base):
     __tablename__ = "completed_trainings"
 
     id = Column(Integer, primary_key=True, index=True)
-    consultant_id = Column(Integer, ForeignKey("users.id"))
+    consultant_id = Column(Integer, ForeignKey("users.id"), index=True)
     title = Column(String)
     provider = Column(String)
     completed_date = Column(String)
     user = relationship("User", back_populates="completed_trainings")
 
+
+
+class ConsultantSummary(Base):
+    """Per-consultant counters kept in step with attendance/assessment/training/skill writes
+    (see app/utils/consultant_summary.py)"""
+    __tablename__ = "consultant_summaries"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    present_days = Column(Integer, nullable=False, default=0)
+    total_days = Column(Integer, nullable=False, default=0)
+    completed_trainings = Column(Integer, nullable=False, default=0)
+    skill_count = Column(Integer, nullable=False, default=0)
+    latest_assessment_id = Column(Integer, nullable=True)
+    latest_assessment_topic = Column(String(50), nullable=True)
+    latest_assessment_percentage = Column(Integer, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class AttendanceBitmap(Base):
+    """Per-consultant day bitmaps mirroring the attendance table
+    (see app/utils/attendance_bitmap.py)"""
+    __tablename__ = "attendance_bitmaps"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    start_date = Column(Date, nullable=True)  # day of bit 0
+    recorded = Column(LargeBinary, nullable=False, default=b"")  # bit set: attendance row exists
+    present = Column(LargeBinary, nullable=False, default=b"")  # bit set: status is present
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class ResumeExtraction(Base):
+    __tablename__ = "resume_extractions"
+
+    content_hash = Column(String(64), primary_key=True)  # sha256 of the uploaded file
+    text = Column(Text)
+    skills_json = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(String(32), primary_key=True)  # uuid4 hex
+    kind = Column(String(30), nullable=False)  # 'resume'|'certificate'
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    status = Column(String(20), default="queued", index=True)  # 'queued'|'running'|'succeeded'|'failed'
+    progress = Column(Integer, default=0)
+    filename = Column(String)
+    file_path = Column(String)
+    result_json = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class ResumeBlob(Base):
+    """A stored resume file, by content (see app/utils/resume_storage.py)"""
+    __tablename__ = "resume_blobs"
+
+    digest = Column(String(64), primary_key=True)  # sha256 of the file
+    size = Column(Integer, nullable=False)
+    content_type = Column(String(100), nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)  # users.resume_digest pointing here
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,12 +1,10 @@
 # app/models/user_model.py
 
-from sqlalchemy import Column, Integer, String, Boolean, ARRAY, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, ARRAY, DateTime, ForeignKey
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
-from passlib.context import CryptContext
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.utils.passwords import password_hasher
 
 class User(Base):
     __tablename__ = "users"
@@ -23,7 +21,8 @@ class User(Base):
     status = Column(String(20), default='bench')  # 'bench'|'assigned'|'training'
     resume_status = Column(String(20), default='pending')  # 'pending'|'updated'
     training_status = Column(String(20), nullable=True)
-    resume_file = Column(String, nullable=True)
+    resume_file = Column(String, nullable=True)  # original file name
+    resume_digest = Column(String(64), ForeignKey("resume_blobs.digest"), nullable=True)  # stored blob
     
     # Timestamps
     created_at = Column(DateTime, server_default=func.now())
@@ -42,8 +41,9 @@ class User(Base):
     opportunities = relationship("Opportunity", back_populates="user")
     skills = relationship("Skill", back_populates="user", cascade="all, delete-orphan")
 
+    # Blocking (bcrypt); from async code use password_hasher.hash / verify_and_update
     def set_password(self, password: str):
-        self.hashed_password = pwd_context.hash(password)
+        self.hashed_password = password_hasher.hash_sync(password)
         
     def verify_password(self, password: str) -> bool:
-        return pwd_context.verify(password, self.hashed_password)
\ No newline at end of file
+        return password_hasher.verify_sync(password, self.hashed_password)
\ No newline at end of file
@@ -12,7 +12,8 @@ app.add_middleware(
 # app/routers/user_router.py
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 from jose import jwt
 from pydantic import BaseModel
@@ -23,7 +24,7 @@ from app.model.models import Skill
 
 # Local imports
 from app.model.user_model import User
-from app.database import get_db
+from app.database import get_async_db
 from app.schemas.user_schema import UserCreate, UserResponse, Token
 
 router = APIRouter(tags=["Authentication"])
@@ -37,10 +38,18 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
-import bcrypt
 
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+# All hashing goes through the bounded hashing pool (see app/utils/passwords.py)
+from app.utils.passwords import password_hasher, PasswordHasherBusy
+from app.utils.principal_cache import Principal, principal_cache
+
+
+def hasher_busy():
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many login attempts in progress, please retry",
+        headers={"Retry-After": "1"},
+    )
 
 
 class LoginForm(BaseModel):
@@ -60,27 +69,29 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
 # Routes
 @router.post("/register", response_model=UserResponse)
-async def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register a new user"""
     print("📥 Received user registration data:", user.dict())
     # Check if email exists
-    hashed_password = hash_password(user.password)
-    db_user = db.query(User).filter(User.email == user.email).first()
+    db_user = (await db.execute(select(User).where(User.email == user.email))).scalars().first()
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
+    try:
+        hashed_password = await password_hasher.hash(user.password)
+    except PasswordHasherBusy:
+        raise hasher_busy()
+
     skill_objects = []
     for skill_name in user.skills or []:
-        skill = db.query(Skill).filter(Skill.skill == skill_name).first()
+        skill = (await db.execute(select(Skill).where(Skill.skill == skill_name))).scalars().first()
         if not skill:
             # Create if skill doesn't exist
             skill = Skill(skill=skill_name)
             db.add(skill)
-            db.commit()
-            db.refresh(skill)
         skill_objects.append(skill)
 
     new_user = User(
@@ -93,22 +104,34 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
     )
 
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    # Load created_at (server default) and skills now; AsyncSession can't lazy-load
+    await db.refresh(new_user, ["created_at", "skills"])
 
     return new_user
 
 @router.post("/login", response_model=Token)
-async def login(form_data: LoginForm, db: Session = Depends(get_db)):
+async def login(form_data: LoginForm, db: AsyncSession = Depends(get_async_db)):
     """Authenticate user and get JWT token"""
     # Verify user exists
-    user = db.query(User).filter(User.email == form_data.email).first()
-    if not user or not user.verify_password(form_data.password):
+    user = (await db.execute(select(User).where(User.email == form_data.email))).scalars().first()
+    matches, new_hash = False, None
+    if user:
+        try:
+            matches, new_hash = await password_hasher.verify_and_update(form_data.password, user.hashed_password)
+        except PasswordHasherBusy:
+            raise hasher_busy()
+    if not matches:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+    # Stored hash uses another cost (or scheme): upgrade it now that we know the password
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
     
     # Create token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -127,7 +150,7 @@ async def login(form_data: LoginForm, db: Session = Depends(get_db)):
 # Protection dependency
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -142,12 +165,21 @@ async def get_current_user(
     except jwt.JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.email == email).first()
+    # Resolved users are cached briefly; the session only connects on a miss
+    key = (payload.get("user_id"), email)
+    principal = principal_cache.get(key)
+    if principal is not None:
+        return principal
+
+    generation = principal_cache.generation()
+    user = (await db.execute(select(User).where(User.email == email))).scalars().first()
     if user is None:
         raise credentials_exception
-    return user
+    principal = Principal.from_user(user)
+    principal_cache.put(key, principal, generation)
+    return principal
 
-async def get_current_admin(current_user: User = Depends(get_current_user)):
+async def get_current_admin(current_user: Principal = Depends(get_current_user)):
     if current_user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, 
@@ -0,0 +1,231 @@
+# app/utils/analytics.py
+"""
+Pool-wide analytics for /admin/analytics.
+
+Each section is one aggregate statement: department attendance and status
+counts come from users joined to consultant_summaries (not the attendance
+table), skill frequencies use window totals over a GROUP BY of the
+case-insensitive skill name, and assessment percentiles use percentile_cont
+on Postgres (a row_number() nearest-rank fallback elsewhere, e.g. SQLite in
+local runs).
+
+The result is cached in-process. Any committed write that touches users,
+skills or assessments clears it. Attendance is written all day (marking,
+CSV ingest) and only moves the attendance rates, so it doesn't clear the
+cache: ANALYTICS_CACHE_TTL_SECONDS bounds staleness for it, and for writes
+made by other workers.
+"""
+
+import os
+import threading
+import time
+
+from sqlalchemy import Integer, case, cast, event, func, literal, select
+from sqlalchemy.orm import Session
+
+from app.model.models import Assessment, ConsultantSummary, Skill
+from app.model.user_model import User
+
+CACHE_TTL_SECONDS = float(os.getenv("ANALYTICS_CACHE_TTL_SECONDS", 300))
+TOP_SKILLS = int(os.getenv("ANALYTICS_TOP_SKILLS", 50))
+PERCENTILES = (0.25, 0.5, 0.75, 0.9)
+STATUSES = ("bench", "assigned", "training")
+
+
+def department_stats(db: Session) -> list:
+    department = func.coalesce(User.department, "Unassigned")
+    present = func.coalesce(func.sum(ConsultantSummary.present_days), 0)
+    total = func.coalesce(func.sum(ConsultantSummary.total_days), 0)
+    rows = db.execute(
+        select(
+            department.label("department"),
+            func.count(User.id),
+            present,
+            total,
+            *(func.count(case((User.status == s, 1))) for s in STATUSES),
+        )
+        .outerjoin(ConsultantSummary, ConsultantSummary.user_id == User.id)
+        .where(User.role == "consultant")
+        .group_by(department)
+        .order_by(department)
+    ).all()
+    return [{
+        "department": dept,
+        "consultants": consultants,
+        "present_days": present_days,
+        "total_days": total_days,
+        "attendance_rate": round(present_days / total_days * 100, 1) if total_days else 0.0,
+        "status_counts": dict(zip(STATUSES, counts)),
+    } for dept, consultants, present_days, total_days, *counts in rows]
+
+
+def skill_stats(db: Session, top: int = TOP_SKILLS) -> list:
+    """Most common skills (case-insensitive) with their proficiency distribution"""
+    key = func.lower(func.trim(Skill.skill))
+    per_level = (
+        select(
+            key.label("skill_key"),
+            # One spelling to show for the group
+            func.min(func.min(Skill.skill)).over(partition_by=key).label("skill"),
+            Skill.proficiency.label("proficiency"),
+            func.count().label("n"),
+            func.sum(func.count()).over(partition_by=key).label("skill_total"),
+            func.sum(Skill.proficiency * func.count()).over(partition_by=key).label("proficiency_sum"),
+            func.sum(case((Skill.proficiency.isnot(None), func.count()), else_=0))
+                .over(partition_by=key).label("rated"),
+        )
+        .group_by(key, Skill.proficiency)
+        .subquery()
+    )
+    ranked = select(
+        per_level,
+        func.dense_rank().over(order_by=(per_level.c.skill_total.desc(), per_level.c.skill_key)).label("rank"),
+    ).subquery()
+    rows = db.execute(
+        select(ranked).where(ranked.c.rank <= top).order_by(ranked.c.rank, ranked.c.proficiency)
+    ).all()
+
+    skills = {}
+    for row in rows:
+        entry = skills.get(row.skill_key)
+        if entry is None:
+            entry = skills[row.skill_key] = {
+                "skill": row.skill,
+                "count": int(row.skill_total),
+                "avg_proficiency": round(row.proficiency_sum / row.rated, 2) if row.rated else None,
+                "proficiency_distribution": {},
+            }
+        key = "unrated" if row.proficiency is None else str(row.proficiency)
+        entry["proficiency_distribution"][key] = row.n
+    return list(skills.values())
+
+
+def assessment_stats(db: Session) -> list:
+    """Score (percentage) percentiles by topic"""
+    summary = {
+        topic: {"topic": topic, "count": n, "avg": round(float(avg), 1), "min": lo, "max": hi}
+        for topic, n, avg, lo, hi in db.execute(
+            select(
+                Assessment.topic,
+                func.count(),
+                func.avg(Assessment.percentage),
+                func.min(Assessment.percentage),
+                func.max(Assessment.percentage),
+            )
+            .where(Assessment.percentage.isnot(None))
+            .group_by(Assessment.topic)
+        )
+    }
+
+    if db.get_bind().dialect.name == "postgresql":
+        rows = db.execute(
+            select(
+                Assessment.topic,
+                *(func.percentile_cont(q).within_group(Assessment.percentage) for q in PERCENTILES),
+            )
+            .where(Assessment.percentage.isnot(None))
+            .group_by(Assessment.topic)
+        ).all()
+        for topic, *values in rows:
+            summary[topic].update({_label(q): round(v, 1) for q, v in zip(PERCENTILES, values)})
+    else:
+        # Nearest rank: the ceil(q * n)-th smallest score of each topic
+        ordered = select(
+            Assessment.topic.label("topic"),
+            Assessment.percentage.label("percentage"),
+            func.row_number().over(partition_by=Assessment.topic, order_by=Assessment.percentage).label("rn"),
+            func.count().over(partition_by=Assessment.topic).label("n"),
+        ).where(Assessment.percentage.isnot(None)).subquery()
+        ranks = [cast((ordered.c.n * int(q * 100) + 99) / 100, Integer) for q in PERCENTILES]
+        rows = db.execute(
+            select(
+                ordered.c.topic,
+                *(func.max(case((ordered.c.rn == func.max(rank, literal(1)), ordered.c.percentage)))
+                  for rank in ranks),
+            ).group_by(ordered.c.topic)
+        ).all()
+        for topic, *values in rows:
+            summary[topic].update({_label(q): v for q, v in zip(PERCENTILES, values)})
+
+    return [summary[topic] for topic in sorted(summary, key=lambda t: (t is None, t))]
+
+
+def _label(q: float) -> str:
+    return f"p{int(q * 100)}"
+
+
+def compute(db: Session) -> dict:
+    departments = department_stats(db)
+    return {
+        "consultants": sum(d["consultants"] for d in departments),
+        "status_counts": {s: sum(d["status_counts"][s] for d in departments) for s in STATUSES},
+        "departments": departments,
+        "skills": skill_stats(db),
+        "assessments": assessment_stats(db),
+    }
+
+
+class AnalyticsCache:
+    def __init__(self, ttl: float = CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        self._value = None
+        self._expires_at = 0.0
+        self._generation = 0
+        self._lock = threading.Lock()  # one recompute at a time
+        self.counts = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, db: Session) -> dict:
+        if self._value is not None and time.monotonic() < self._expires_at:
+            self.counts["hits"] += 1
+            return self._value
+        with self._lock:
+            if self._value is not None and time.monotonic() < self._expires_at:
+                self.counts["hits"] += 1
+                return self._value
+            self.counts["misses"] += 1
+            generation = self._generation
+            value = {**compute(db), "generated_at": time.time()}
+            # Don't cache a result that a concurrent write already made stale
+            if generation == self._generation:
+                self._value, self._expires_at = value, time.monotonic() + self.ttl
+            return value
+
+    def invalidate(self):
+        self._generation += 1
+        self._value = None
+        self.counts["invalidations"] += 1
+
+
+analytics_cache = AnalyticsCache()
+
+
+# ---------- Invalidation ----------
+
+_TRACKED_MODELS = (User, Skill, Assessment)
+_TRACKED_TABLES = {model.__tablename__ for model in _TRACKED_MODELS}
+
+
+@event.listens_for(Session, "after_flush")
+def _note_orm_writes(session, flush_context):
+    if any(isinstance(obj, _TRACKED_MODELS) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info["analytics_stale"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _note_statement_writes(orm_execute_state):
+    # Core INSERT/UPDATE/DELETE run through the session (e.g. attendance upserts)
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if getattr(table, "name", None) in _TRACKED_TABLES:
+            orm_execute_state.session.info["analytics_stale"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    if session.info.pop("analytics_stale", False):
+        analytics_cache.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_writes(session):
+    session.info.pop("analytics_stale", None)
@@ -0,0 +1,315 @@
+# app/utils/attendance_bitmap.py
+"""
+Per-consultant attendance bitmaps (attendance_bitmaps table).
+
+Each consultant's history is two bitmaps with one bit per calendar day from
+start_date: "recorded" (an attendance row exists) and "present" (its status
+is present), i.e. a 2-bit code per day: none, absent (or any other status,
+including NULL), present. Three years fit in under 300 bytes per consultant, so range
+summaries, streaks and month heatmaps are popcounts and slices over one row
+instead of loading every attendance record.
+
+The bitmaps are kept in step inside the writing transaction, like
+consultant_summaries: ORM writes to Attendance are collected by mapper
+events and applied at the end of the flush, and Core upserts
+(mark-attendance, Teams CSV ingest) call record() with the days they wrote.
+Rows are read FOR UPDATE before they are changed, so concurrent writers for
+one consultant serialize instead of losing bits.
+
+Repair drift (e.g. rows changed with raw SQL):
+    python -m app.utils.attendance_bitmap --rebuild
+"""
+
+import sys
+from collections import defaultdict
+from datetime import date, timedelta
+
+import numpy as np
+from sqlalchemy import bindparam, event, func, select, update
+from sqlalchemy.orm import Session, attributes, object_session
+
+from app.database import dialect_insert
+from app.model.models import Attendance, AttendanceBitmap
+
+PRESENT = "present"
+# Heatmap day codes
+NONE, ABSENT, PRESENT_CODE = 0, 1, 2
+
+
+class AttendanceDays:
+    """One consultant's attendance as two bitmaps starting at `start` (bit i = start + i days)"""
+
+    def __init__(self, start: date = None, recorded: bytes = b"", present: bytes = b""):
+        self.start = start
+        self.recorded = bytearray(recorded)
+        self.present = bytearray(present)
+
+    @classmethod
+    def from_row(cls, row):
+        if row is None:
+            return cls()
+        return cls(row.start_date, row.recorded or b"", row.present or b"")
+
+    def as_values(self) -> dict:
+        return {"start_date": self.start, "recorded": bytes(self.recorded), "present": bytes(self.present)}
+
+    # ---------- Writes ----------
+
+    def _index(self, day: date) -> int:
+        if self.start is None:
+            self.start = day
+        if day < self.start:
+            # Grow backwards by whole bytes so the existing bits keep their alignment
+            extra = -(-(self.start - day).days // 8)
+            self.start -= timedelta(days=extra * 8)
+            self.recorded[:0] = bytes(extra)
+            self.present[:0] = bytes(extra)
+        i = (day - self.start).days
+        if i // 8 >= len(self.recorded):
+            grow = i // 8 + 1 - len(self.recorded)
+            self.recorded += bytes(grow)
+            self.present += bytes(grow)
+        return i
+
+    def set(self, day: date, status):
+        """Record the day's status (any status, NULL included, counts as a recorded day)"""
+        byte, bit = divmod(self._index(day), 8)
+        mask = 1 << bit
+        self.recorded[byte] |= mask
+        if status == PRESENT:
+            self.present[byte] |= mask
+        else:
+            self.present[byte] &= ~mask & 0xFF
+
+    def clear(self, day: date):
+        """Forget the day (its attendance row was deleted)"""
+        if self.start is None or not 0 <= (day - self.start).days < len(self.recorded) * 8:
+            return
+        byte, bit = divmod((day - self.start).days, 8)
+        self.recorded[byte] &= ~(1 << bit) & 0xFF
+        self.present[byte] &= ~(1 << bit) & 0xFF
+
+    # ---------- Reads ----------
+
+    def _bounds(self, start_date: date = None, end_date: date = None):
+        """Bit range [lo, hi) of the window, clipped to the bitmap; open ends stop at the first/last record"""
+        recorded = int.from_bytes(self.recorded, "little")
+        if not recorded:
+            return 0, 0
+        lo = (recorded & -recorded).bit_length() - 1 if start_date is None else max(0, (start_date - self.start).days)
+        hi = recorded.bit_length() if end_date is None else min(len(self.recorded) * 8, (end_date - self.start).days + 1)
+        return lo, max(lo, hi)
+
+    @staticmethod
+    def _count(data: bytearray, lo: int, hi: int) -> int:
+        if hi <= lo:
+            return 0
+        # Whole bytes of the window, then shift/mask off the bits outside it
+        window = int.from_bytes(data[lo // 8:(hi + 7) // 8], "little") >> (lo % 8)
+        return (window & ((1 << (hi - lo)) - 1)).bit_count()
+
+    def summary(self, start_date: date = None, end_date: date = None) -> dict:
+        lo, hi = self._bounds(start_date, end_date)
+        total = self._count(self.recorded, lo, hi)
+        present = self._count(self.present, lo, hi)
+        return {
+            "total_days": total,
+            "present_days": present,
+            "attendance_rate": f"{(present / total) * 100:.1f}%" if total else "0%",
+        }
+
+    def codes(self, lo: int, hi: int) -> np.ndarray:
+        """Day codes (NONE / ABSENT / PRESENT_CODE) for bits [lo, hi)"""
+        recorded = np.unpackbits(np.frombuffer(bytes(self.recorded), np.uint8), bitorder="little")[lo:hi]
+        present = np.unpackbits(np.frombuffer(bytes(self.present), np.uint8), bitorder="little")[lo:hi]
+        return recorded + present
+
+    def streaks(self, start_date: date = None, end_date: date = None) -> dict:
+        """
+        Runs of present days over recorded days (days without a record,
+        e.g. weekends, neither count nor break a streak)
+        """
+        lo, hi = self._bounds(start_date, end_date)
+        codes = self.codes(lo, hi)
+        days = codes[codes != NONE] == PRESENT_CODE
+        if not days.size:
+            return {"current": 0, "longest": 0}
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], days.view(np.int8), [0]))))
+        runs = edges[1::2] - edges[::2]
+        current = int(runs[-1]) if days[-1] else 0
+        return {"current": current, "longest": int(runs.max()) if runs.size else 0}
+
+    def months(self, start_date: date = None, end_date: date = None) -> list:
+        """Month-by-month counts plus one code per day, for heatmaps"""
+        lo, hi = self._bounds(start_date, end_date)
+        if hi <= lo:
+            return []
+        codes = self.codes(lo, hi)
+        first = self.start + timedelta(days=lo)
+        months = []
+        month = first.replace(day=1)
+        while True:
+            next_month = (month + timedelta(days=32)).replace(day=1)
+            a = max(lo, (month - self.start).days)
+            b = min(hi, (next_month - self.start).days)
+            if a >= hi:
+                break
+            days = codes[a - lo:b - lo]
+            total = int(np.count_nonzero(days))
+            present = int(np.count_nonzero(days == PRESENT_CODE))
+            months.append({
+                "month": month.strftime("%Y-%m"),
+                "first_day": (self.start + timedelta(days=a)).isoformat(),
+                "total_days": total,
+                "present_days": present,
+                "attendance_rate": round(present / total * 100, 1) if total else 0.0,
+                "days": days.tolist(),
+            })
+            month = next_month
+        return months
+
+
+def get_days(db: Session, user_id: int) -> AttendanceDays:
+    return AttendanceDays.from_row(db.get(AttendanceBitmap, user_id))
+
+
+async def get_days_async(db, user_id: int) -> AttendanceDays:
+    return AttendanceDays.from_row(await db.get(AttendanceBitmap, user_id))
+
+
+async def get_many_async(db, user_ids) -> dict:
+    rows = (await db.execute(
+        select(AttendanceBitmap).where(AttendanceBitmap.user_id.in_(user_ids))
+    )).scalars()
+    found = {row.user_id: AttendanceDays.from_row(row) for row in rows}
+    return {user_id: found.get(user_id) or AttendanceDays() for user_id in user_ids}
+
+
+# ---------- Writes ----------
+
+def record(db: Session, changes, deleted=()):
+    """
+    Apply [(user_id, date, status)] writes and [(user_id, date)] deletions to
+    the bitmaps, in the caller's transaction (also inside a flush). Deletions
+    go first, so a day deleted and written again in one flush stays recorded.
+    """
+    by_user = defaultdict(lambda: ([], []))
+    for user_id, day in deleted:
+        if user_id is not None and day is not None:
+            by_user[user_id][0].append(day)
+    for user_id, day, status in changes:
+        if user_id is not None and day is not None:
+            by_user[user_id][1].append((day, status))
+    if not by_user:
+        return
+
+    # Create and lock rows in id order, so two writers covering the same
+    # consultants take the locks in the same order and can't deadlock
+    user_ids = sorted(by_user)
+    connection = db.connection()
+    table = AttendanceBitmap.__table__
+    connection.execute(
+        dialect_insert(db, AttendanceBitmap).on_conflict_do_nothing(index_elements=[AttendanceBitmap.user_id]),
+        [{"user_id": user_id, **AttendanceDays().as_values()} for user_id in user_ids],
+    )
+    rows = connection.execute(
+        select(table).where(table.c.user_id.in_(user_ids)).order_by(table.c.user_id).with_for_update()
+    ).all()
+
+    params = []
+    for row in rows:
+        days = AttendanceDays.from_row(row)
+        removed, written = by_user[row.user_id]
+        for day in removed:
+            days.clear(day)
+        for day, status in written:
+            days.set(day, status)
+        params.append({"b_user_id": row.user_id, **{f"b_{k}": v for k, v in days.as_values().items()}})
+    connection.execute(
+        update(table)
+        .where(table.c.user_id == bindparam("b_user_id"))
+        .values(
+            start_date=bindparam("b_start_date"),
+            recorded=bindparam("b_recorded"),
+            present=bindparam("b_present"),
+            updated_at=func.now(),
+        ),
+        params,
+    )
+
+
+def rebuild(db: Session) -> int:
+    """Recompute every bitmap from the attendance table"""
+    bitmaps = defaultdict(AttendanceDays)
+    result = db.execute(
+        select(Attendance.user_id, Attendance.date, Attendance.status)
+        .order_by(Attendance.user_id, Attendance.date)
+        .execution_options(yield_per=10000)
+    )
+    for user_id, day, status in result:
+        if user_id is not None and day is not None:
+            bitmaps[user_id].set(day, status)
+
+    db.execute(AttendanceBitmap.__table__.delete())
+    if bitmaps:
+        db.execute(
+            AttendanceBitmap.__table__.insert(),
+            [{"user_id": user_id, **days.as_values()} for user_id, days in bitmaps.items()],
+        )
+    db.commit()
+    return len(bitmaps)
+
+
+# ---------- ORM write tracking ----------
+
+def _pending(target) -> dict:
+    return object_session(target).info.setdefault("bitmap_changes", {"written": [], "deleted": []})
+
+
+def _old(target, key):
+    history = attributes.get_history(target, key)
+    return history.deleted[0] if history.deleted else getattr(target, key)
+
+
+@event.listens_for(Attendance, "after_insert")
+def _attendance_inserted(mapper, connection, target):
+    _pending(target)["written"].append((target.user_id, target.date, target.status))
+
+
+@event.listens_for(Attendance, "after_update")
+def _attendance_updated(mapper, connection, target):
+    old_key = (_old(target, "user_id"), _old(target, "date"))
+    changes = _pending(target)
+    if old_key != (target.user_id, target.date):
+        changes["deleted"].append(old_key)
+    changes["written"].append((target.user_id, target.date, target.status))
+
+
+@event.listens_for(Attendance, "after_delete")
+def _attendance_deleted(mapper, connection, target):
+    _pending(target)["deleted"].append((_old(target, "user_id"), _old(target, "date")))
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_bitmap_changes(session, flush_context):
+    changes = session.info.pop("bitmap_changes", None)
+    if changes:
+        record(session, changes["written"], changes["deleted"])
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_bitmap_changes(session):
+    session.info.pop("bitmap_changes", None)
+
+
+if __name__ == "__main__":
+    if "--rebuild" not in sys.argv[1:]:
+        sys.exit("usage: python -m app.utils.attendance_bitmap --rebuild")
+
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        print(f"Rebuilt attendance bitmaps for {rebuild(db)} consultants")
+    finally:
+        db.close()
@@ -0,0 +1,142 @@
+# app/utils/attendance_ingest.py
+
+import csv
+from datetime import datetime
+
+from sqlalchemy import case
+from sqlalchemy.orm import Session
+
+from app.database import dialect_insert
+from app.model.models import Attendance
+from app.model.user_model import User
+from app.utils.attendance_bitmap import record as record_days
+from app.utils.consultant_summary import refresh_attendance
+
+TEAMS_TIME_FORMAT = "%m/%d/%Y, %I:%M:%S %p"  # e.g., "8/5/2025, 10:00:00 AM"
+CHUNK_SIZE = 5000
+MAX_REPORTED_ERRORS = 50
+
+
+def load_name_map(db: Session) -> dict:
+    """Map lower-cased consultant names to ids with a single query"""
+    rows = db.query(User.name, User.id).filter(User.role == "consultant").all()
+    return {name.strip().lower(): user_id for name, user_id in rows}
+
+
+def _flush(db: Session, pending: dict):
+    """Upsert one chunk of attendance rows (and the touched summaries) and commit it"""
+    if not pending:
+        return
+    stmt = dialect_insert(db, Attendance)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Attendance.user_id, Attendance.date],
+        set_={
+            "status": "present",
+            # keep the earliest join across chunks and uploads, not just within one chunk
+            "check_in_time": case(
+                (Attendance.check_in_time.is_(None), stmt.excluded.check_in_time),
+                (stmt.excluded.check_in_time < Attendance.check_in_time, stmt.excluded.check_in_time),
+                else_=Attendance.check_in_time,
+            ),
+        }
+    )
+    db.execute(stmt, list(pending.values()))
+    refresh_attendance(db, {row["user_id"] for row in pending.values()})
+    record_days(db, [(row["user_id"], row["date"], "present") for row in pending.values()])
+    db.commit()
+    pending.clear()
+
+
+def _decode_lines(raw_file, position: dict):
+    """
+    Decode the upload one line at a time. A line that is not valid UTF-8 is
+    noted in position["undecodable"] and replaced by a blank line (which csv
+    skips), so one bad byte doesn't abort an upload whose earlier chunks are
+    already committed. The header line still has to decode.
+    """
+    for line_no, raw in enumerate(raw_file, start=1):
+        position["line"] = line_no
+        try:
+            yield raw.decode("utf-8-sig" if line_no == 1 else "utf-8")
+        except UnicodeDecodeError:
+            if line_no == 1:
+                raise
+            position["undecodable"].append(line_no)
+            yield "\n"
+
+
+def ingest_teams_csv(db: Session, raw_file, chunk_size: int = CHUNK_SIZE) -> dict:
+    """
+    Stream a Teams attendance export into the attendance table.
+
+    The upload is decoded line by line, names are resolved against an
+    in-memory map, and rows are upserted in chunks so memory stays flat
+    no matter how large the export is. Lines that can't be decoded or
+    parsed are counted as rejected; a header that can't be read raises
+    ValueError before anything is written.
+    """
+    names = load_name_map(db)
+    position = {"line": 0, "undecodable": []}  # physical line last read, lines that didn't decode
+    reader = csv.DictReader(_decode_lines(raw_file, position))
+    try:
+        reader.fieldnames
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ValueError(f"Could not read the CSV header: {e}") from e
+
+    stats = {"processed": 0, "accepted": 0, "rejected": 0, "reasons": {}, "errors": []}
+    pending = {}  # (user_id, date) -> row, keeps the earliest join per day
+
+    def reject(line_no, reason):
+        stats["rejected"] += 1
+        stats["reasons"][reason] = stats["reasons"].get(reason, 0) + 1
+        if len(stats["errors"]) < MAX_REPORTED_ERRORS:
+            stats["errors"].append({"line": line_no, "reason": reason})
+
+    def reject_undecodable():
+        while position["undecodable"]:
+            stats["processed"] += 1
+            reject(position["undecodable"].pop(0), "invalid_encoding")
+
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            break
+        except csv.Error:
+            reject_undecodable()
+            stats["processed"] += 1
+            reject(position["line"], "malformed_row")
+            continue
+        reject_undecodable()
+        stats["processed"] += 1
+        line_no = reader.line_num
+
+        name = (row.get("Full Name") or "").strip()
+        user_id = names.get(name.lower())
+        if user_id is None:
+            reject(line_no, "unknown_attendee")
+            continue
+
+        try:
+            join_time = datetime.strptime((row.get("Join Time") or "").strip(), TEAMS_TIME_FORMAT)
+        except ValueError:
+            reject(line_no, "invalid_join_time")
+            continue
+
+        key = (user_id, join_time.date())
+        existing = pending.get(key)
+        if existing is None or join_time.time() < existing["check_in_time"]:
+            pending[key] = {
+                "user_id": user_id,
+                "date": join_time.date(),
+                "status": "present",
+                "check_in_time": join_time.time(),
+            }
+        stats["accepted"] += 1
+
+        if len(pending) >= chunk_size:
+            _flush(db, pending)
+
+    reject_undecodable()
+    _flush(db, pending)
+    return stats
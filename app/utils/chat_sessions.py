@@ -0,0 +1,141 @@
+# app/utils/chat_sessions.py
+"""
+Per-user chatbot sessions.
+
+Sessions are kept in an LRU store with a maximum size and an idle TTL, so
+memory per worker is bounded. Each session's history is trimmed to a token
+budget: when it grows past the budget, the oldest turns are folded into a
+running summary and only the most recent turns are resent to the model.
+A single message longer than half the budget is cut down to that size, so
+one pasted document can't blow the budget (or the summary prompt) on its own.
+Handlers run trim() after the response has been sent.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+
+MAX_SESSIONS = int(os.getenv("CHAT_MAX_SESSIONS", 1000))
+IDLE_TTL_SECONDS = float(os.getenv("CHAT_IDLE_TTL_SECONDS", 30 * 60))
+TOKEN_BUDGET = int(os.getenv("CHAT_TOKEN_BUDGET", 4000))
+KEEP_RECENT_MESSAGES = int(os.getenv("CHAT_KEEP_RECENT_MESSAGES", 6))
+
+logger = logging.getLogger("app.chat")
+
+
+def estimate_tokens(text: str) -> int:
+    # Rough rule of thumb for English text: ~4 characters per token
+    return len(text) // 4 + 1
+
+
+def clip(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    marker = " [... truncated]"
+    return text[:max(0, max_chars - len(marker))] + marker
+
+
+class ChatSession:
+    def __init__(self):
+        self.history = []  # [{"role": "user"|"model", "parts": [text]}]
+        self.summary = ""
+        self.last_used = time.monotonic()
+        self.lock = asyncio.Lock()  # one turn at a time per user
+
+    def context(self) -> list:
+        """History to send to the model: the running summary, then recent turns"""
+        if not self.summary:
+            return list(self.history)
+        return [
+            {"role": "user", "parts": [f"Summary of our earlier conversation: {self.summary}"]},
+            {"role": "model", "parts": ["Understood."]},
+        ] + self.history
+
+    def append(self, user_message: str, reply: str):
+        self.history.append({"role": "user", "parts": [user_message]})
+        self.history.append({"role": "model", "parts": [reply]})
+
+    def tokens(self) -> int:
+        return estimate_tokens(self.summary) + sum(
+            estimate_tokens(part) for turn in self.history for part in turn["parts"]
+        )
+
+
+class ChatSessionStore:
+    def __init__(
+        self,
+        max_sessions: int = MAX_SESSIONS,
+        idle_ttl: float = IDLE_TTL_SECONDS,
+        token_budget: int = TOKEN_BUDGET,
+        keep_recent: int = KEEP_RECENT_MESSAGES,
+    ):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.token_budget = token_budget
+        self.keep_recent = keep_recent
+        self._sessions = OrderedDict()
+        self.counts = {"created": 0, "lru_evictions": 0, "idle_evictions": 0, "summaries": 0}
+
+    def _evict_idle(self, now: float):
+        # Least recently used sessions are at the front
+        while self._sessions:
+            key, session = next(iter(self._sessions.items()))
+            if now - session.last_used <= self.idle_ttl:
+                break
+            del self._sessions[key]
+            self.counts["idle_evictions"] += 1
+
+    def get(self, key) -> ChatSession:
+        now = time.monotonic()
+        self._evict_idle(now)
+
+        session = self._sessions.get(key)
+        if session is None:
+            session = ChatSession()
+            self._sessions[key] = session
+            self.counts["created"] += 1
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.counts["lru_evictions"] += 1
+        else:
+            self._sessions.move_to_end(key)
+        session.last_used = now
+        return session
+
+    def reset(self, key):
+        self._sessions.pop(key, None)
+
+    async def trim(self, session: ChatSession, summarize):
+        """
+        Fold the oldest turns into the summary once the session is over budget.
+        `summarize(previous_summary, turns)` is awaited and returns the new summary;
+        if it fails the old turns are simply dropped.
+        """
+        max_chars = self.token_budget * 4
+        for turn in session.history:
+            turn["parts"] = [clip(part, max_chars // 2) for part in turn["parts"]]
+        if session.tokens() <= self.token_budget or len(session.history) <= self.keep_recent:
+            return
+
+        old, session.history = session.history[:-self.keep_recent], session.history[-self.keep_recent:]
+        try:
+            session.summary = await summarize(session.summary, old)
+            self.counts["summaries"] += 1
+        except Exception as e:
+            logger.warning("Chat summary failed, dropping %d messages: %s", len(old), e)
+
+        # Keep a runaway summary from taking more than half the budget
+        session.summary = session.summary[-max_chars // 2:]
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            **self.counts,
+            "evictions": self.counts["lru_evictions"] + self.counts["idle_evictions"],
+        }
+
+
+chat_sessions = ChatSessionStore()
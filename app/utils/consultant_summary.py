@@ -0,0 +1,281 @@
+# app/utils/consultant_summary.py
+"""
+Denormalized per-consultant summary (consultant_summaries table).
+
+Dashboards, reports and the admin list read attendance totals, the latest
+assessment, the completed-training count and the skill count from one row
+instead of loading every attendance record.
+
+The row is kept in step inside the writing transaction:
+  - ORM writes (Attendance, Assessment, CompletedTraining, Skill) are turned
+    into counter deltas by mapper events and applied at the end of the flush,
+    for sync and async sessions.
+  - Core upserts into attendance (mark-attendance, Teams CSV ingest) can't
+    tell an insert from an update, so they call refresh_attendance() for the
+    users they touched, which recounts just those users. The summary rows
+    are locked before the recount, so two transactions recounting one user
+    take turns and the second one sees the first one's rows.
+
+Repair drift (e.g. rows changed with raw SQL):
+    python -m app.utils.consultant_summary --rebuild
+"""
+
+import sys
+from collections import defaultdict
+
+from sqlalchemy import case, event, func, select
+from sqlalchemy.orm import Session, attributes, object_session
+
+from app.database import dialect_insert
+from app.model.models import Assessment, Attendance, CompletedTraining, ConsultantSummary, Skill
+
+COUNTERS = ("present_days", "total_days", "completed_trainings", "skill_count")
+LATEST_ASSESSMENT = ("latest_assessment_id", "latest_assessment_topic", "latest_assessment_percentage")
+
+
+def empty_summary(user_id: int) -> dict:
+    return {"user_id": user_id, **{c: 0 for c in COUNTERS}, **{c: None for c in LATEST_ASSESSMENT}}
+
+
+def as_dict(summary) -> dict:
+    """Summary row as a dict (None if the consultant has no row yet)"""
+    if summary is None:
+        return None
+    return {c: getattr(summary, c) for c in ("user_id",) + COUNTERS + LATEST_ASSESSMENT}
+
+
+def get_summary(db: Session, user_id: int) -> dict:
+    return as_dict(db.get(ConsultantSummary, user_id)) or empty_summary(user_id)
+
+
+async def get_summary_async(db, user_id: int) -> dict:
+    return as_dict(await db.get(ConsultantSummary, user_id)) or empty_summary(user_id)
+
+
+# ---------- Writes ----------
+
+def _upsert(db, rows: list, update_columns, increment: bool):
+    """Insert summary rows; on conflict add (increment) or overwrite the given columns"""
+    if not rows:
+        return
+    stmt = dialect_insert(db, ConsultantSummary)
+    table = ConsultantSummary.__table__
+    set_ = {
+        col: (table.c[col] + stmt.excluded[col]) if increment and col in COUNTERS else stmt.excluded[col]
+        for col in update_columns
+    }
+    set_["updated_at"] = func.now()
+    stmt = stmt.on_conflict_do_update(index_elements=[ConsultantSummary.user_id], set_=set_)
+    # The session's connection, so this joins the caller's transaction (also inside a flush)
+    db.connection().execute(stmt, rows)
+
+
+def _latest_assessments(db: Session, user_ids=None) -> dict:
+    """Newest assessment of each of `user_ids` (None: of every consultant)"""
+    from app.model.user_model import User
+
+    latest = select(Assessment.user_id, func.max(Assessment.id).label("id"))
+    if user_ids is None:
+        latest = latest.join(User, User.id == Assessment.user_id).where(User.role == "consultant")
+    else:
+        latest = latest.where(Assessment.user_id.in_(user_ids))
+    latest = latest.group_by(Assessment.user_id).subquery()
+    rows = db.connection().execute(
+        select(Assessment.user_id, Assessment.id, Assessment.topic, Assessment.percentage)
+        .join(latest, latest.c.id == Assessment.id)
+    )
+    return {user_id: (id_, topic, pct) for user_id, id_, topic, pct in rows}
+
+
+def refresh_attendance(db: Session, user_ids):
+    """Recount attendance for these users (after Core upserts into attendance)"""
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return
+    # Lock the summary rows (creating missing ones) before counting. Under READ
+    # COMMITTED a concurrent recount would otherwise miss our uncommitted rows
+    # while we miss its, and whichever commits last would store a short count.
+    table = ConsultantSummary.__table__
+    connection = db.connection()
+    connection.execute(
+        dialect_insert(db, ConsultantSummary).on_conflict_do_nothing(index_elements=[ConsultantSummary.user_id]),
+        [empty_summary(user_id) for user_id in user_ids],
+    )
+    connection.execute(
+        select(table.c.user_id).where(table.c.user_id.in_(user_ids)).order_by(table.c.user_id).with_for_update()
+    )
+    counts = db.execute(
+        select(
+            Attendance.user_id,
+            func.count(case((Attendance.status == "present", 1))),
+            func.count(Attendance.id),
+        )
+        .where(Attendance.user_id.in_(user_ids))
+        .group_by(Attendance.user_id)
+    ).all()
+    found = {user_id: (present, total) for user_id, present, total in counts}
+    rows = [
+        {**empty_summary(user_id), "present_days": found.get(user_id, (0, 0))[0],
+         "total_days": found.get(user_id, (0, 0))[1]}
+        for user_id in user_ids
+    ]
+    _upsert(db, rows, ("present_days", "total_days"), increment=False)
+
+
+def rebuild(db: Session) -> int:
+    """Recompute every consultant's summary from the source tables"""
+    from app.model.user_model import User
+
+    is_consultant = User.role == "consultant"
+
+    def grouped(column, *conditions):
+        query = (
+            select(column, func.count())
+            .join(User, User.id == column)
+            .where(is_consultant, *conditions)
+            .group_by(column)
+        )
+        return dict(db.execute(query).all())
+
+    ids = db.execute(select(User.id).where(is_consultant)).scalars().all()
+    present = grouped(Attendance.user_id, Attendance.status == "present")
+    total = grouped(Attendance.user_id)
+    trainings = grouped(CompletedTraining.consultant_id)
+    skills = grouped(Skill.user_id)
+    latest = _latest_assessments(db)
+
+    rows = []
+    for user_id in ids:
+        latest_id, topic, pct = latest.get(user_id, (None, None, None))
+        rows.append({
+            "user_id": user_id,
+            "present_days": present.get(user_id, 0),
+            "total_days": total.get(user_id, 0),
+            "completed_trainings": trainings.get(user_id, 0),
+            "skill_count": skills.get(user_id, 0),
+            "latest_assessment_id": latest_id,
+            "latest_assessment_topic": topic,
+            "latest_assessment_percentage": pct,
+        })
+    _upsert(db, rows, COUNTERS + LATEST_ASSESSMENT, increment=False)
+    db.commit()
+    return len(rows)
+
+
+# ---------- ORM write tracking ----------
+# Mapper events see exactly the rows a flush writes (including delete-orphan
+# cascades); they accumulate deltas on the session, applied once per flush.
+
+def _old_value(obj, key):
+    history = attributes.get_history(obj, key)
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(obj, key)
+
+
+def _pending(target) -> dict:
+    session = object_session(target)
+    return session.info.setdefault("summary_changes", {
+        "deltas": defaultdict(lambda: dict.fromkeys(COUNTERS, 0)),
+        "latest": {},  # user_id -> newest Assessment inserted in this flush
+        "recount_latest": set(),
+    })
+
+
+def _add(target, user_id, counter, n):
+    if user_id is not None and n:
+        _pending(target)["deltas"][user_id][counter] += n
+
+
+def _row_contribution(model, obj, old: bool):
+    """(user_id, {counter: n}) this row adds to a summary, before or after the change"""
+    value = (lambda key: _old_value(obj, key)) if old else (lambda key: getattr(obj, key))
+    if model is Attendance:
+        return value("user_id"), {"total_days": 1, "present_days": int(value("status") == "present")}
+    if model is CompletedTraining:
+        return value("consultant_id"), {"completed_trainings": 1}
+    return value("user_id"), {"skill_count": 1}  # Skill
+
+
+def _track_counts(model):
+    @event.listens_for(model, "after_insert")
+    def _inserted(mapper, connection, target):
+        user_id, counts = _row_contribution(model, target, old=False)
+        for counter, n in counts.items():
+            _add(target, user_id, counter, n)
+
+    @event.listens_for(model, "after_delete")
+    def _deleted(mapper, connection, target):
+        user_id, counts = _row_contribution(model, target, old=True)
+        for counter, n in counts.items():
+            _add(target, user_id, counter, -n)
+
+    @event.listens_for(model, "after_update")
+    def _updated(mapper, connection, target):
+        old_user, old_counts = _row_contribution(model, target, old=True)
+        new_user, new_counts = _row_contribution(model, target, old=False)
+        if (old_user, old_counts) != (new_user, new_counts):
+            for counter, n in old_counts.items():
+                _add(target, old_user, counter, -n)
+            for counter, n in new_counts.items():
+                _add(target, new_user, counter, n)
+
+
+for _model in (Attendance, CompletedTraining, Skill):
+    _track_counts(_model)
+
+
+@event.listens_for(Assessment, "after_insert")
+def _assessment_inserted(mapper, connection, target):
+    latest = _pending(target)["latest"]
+    if target.user_id is not None and (target.user_id not in latest or target.id > latest[target.user_id].id):
+        latest[target.user_id] = target
+
+
+@event.listens_for(Assessment, "after_update")
+@event.listens_for(Assessment, "after_delete")
+def _assessment_changed(mapper, connection, target):
+    _pending(target)["recount_latest"].update({_old_value(target, "user_id"), target.user_id})
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_summary_changes(session, flush_context):
+    changes = session.info.pop("summary_changes", None)
+    if not changes:
+        return
+
+    deltas = {user_id: d for user_id, d in changes["deltas"].items() if any(d.values())}
+    _upsert(session, [{**empty_summary(u), **d} for u, d in deltas.items()], COUNTERS, increment=True)
+
+    latest = changes["latest"]
+    recount = changes["recount_latest"] - set(latest) - {None}
+    found = _latest_assessments(session, list(recount)) if recount else {}
+    rows = [{
+        **empty_summary(user_id),
+        **dict(zip(LATEST_ASSESSMENT, found.get(user_id, (None, None, None)))),
+    } for user_id in recount]
+    rows += [{
+        **empty_summary(user_id),
+        "latest_assessment_id": a.id,
+        "latest_assessment_topic": a.topic,
+        "latest_assessment_percentage": a.percentage,
+    } for user_id, a in latest.items()]
+    _upsert(session, rows, LATEST_ASSESSMENT, increment=False)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_summary_changes(session):
+    session.info.pop("summary_changes", None)
+
+
+if __name__ == "__main__":
+    if "--rebuild" not in sys.argv[1:]:
+        sys.exit("usage: python -m app.utils.consultant_summary --rebuild")
+
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        print(f"Rebuilt {rebuild(db)} consultant summaries")
+    finally:
+        db.close()
@@ -0,0 +1,104 @@
+# app/utils/db_pool.py
+"""
+Connection pool with checkout telemetry.
+
+InstrumentedQueuePool is a QueuePool that also records how long callers
+wait for a connection and how often they time out, so the pool can be
+sized against the number of workers. InstrumentedAsyncQueuePool does the
+same for the async engine.
+
+Checkouts and timeouts are counted in the public Pool.connect(). SQLAlchemy
+has no public hook for the time spent blocked on the pool's queue, so the
+wait is measured by wrapping QueuePool's internal `_pool` queue. That ties
+this module to QueuePool internals: SQLAlchemy is pinned in
+requirements.txt (2.0.42), and tests/test_db_pool.py fails if an upgrade
+changes them.
+"""
+
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class _TimedQueue:
+    """The pool's queue, with the time callers spend blocked in get() reported to `record`"""
+
+    def __init__(self, queue, record):
+        self._queue = queue
+        self._record = record
+
+    def get(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._queue.get(*args, **kwargs)
+        finally:
+            self._record(time.perf_counter() - start)
+
+    def __getattr__(self, name):
+        return getattr(self._queue, name)
+
+
+class InstrumentedQueuePool(QueuePool):
+    def __init__(self, creator, pool_size: int = 5, max_overflow: int = 10, **kwargs):
+        super().__init__(creator, pool_size=pool_size, max_overflow=max_overflow, **kwargs)
+        self.max_overflow = max_overflow
+        self.wait_stats = {"checkouts": 0, "timeouts": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0}
+        self._stats_lock = threading.Lock()
+        # Wait time is measured on the queue itself (a QueuePool internal, see
+        # above), so opening a new (overflow) connection doesn't count as waiting
+        self._pool = _TimedQueue(self._pool, self._record_wait)
+
+    def recreate(self):
+        # Keep the counters when the pool is recreated (e.g. engine.dispose())
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        pool._stats_lock = self._stats_lock
+        return pool
+
+    def _record_wait(self, waited: float):
+        with self._stats_lock:
+            self.wait_stats["wait_seconds_total"] += waited
+            self.wait_stats["wait_seconds_max"] = max(self.wait_stats["wait_seconds_max"], waited)
+
+    def connect(self):
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.wait_stats["timeouts"] += 1
+            raise
+        finally:
+            with self._stats_lock:
+                self.wait_stats["checkouts"] += 1
+
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    """Same telemetry for the AsyncEngine (asyncio-aware queue)"""
+
+
+def pool_status(engine) -> dict:
+    """Checked-out / idle / overflow counts and checkout wait times"""
+    pool = engine.pool
+    status = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            # overflow() is negative while the pool has not filled up to `size` yet
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": getattr(pool, "max_overflow", None),
+            "timeout_seconds": pool.timeout(),
+        })
+    stats = getattr(pool, "wait_stats", None)
+    if stats is not None:
+        checkouts = stats["checkouts"]
+        status.update({
+            "checkouts": checkouts,
+            "checkout_timeouts": stats["timeouts"],
+            "avg_wait_ms": round(stats["wait_seconds_total"] / checkouts * 1000, 3) if checkouts else 0.0,
+            "max_wait_ms": round(stats["wait_seconds_max"] * 1000, 3),
+        })
+    return status
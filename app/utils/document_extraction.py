@@ -0,0 +1,149 @@
+# app/utils/document_extraction.py
+"""
+PDF / DOCX text extraction on a shared process pool.
+
+Parsing with PyMuPDF and python-docx is CPU bound, so it runs in worker
+processes instead of the request thread (or the event loop). Large PDFs are
+split into page ranges that are parsed in parallel, and text comes back as
+an ordered stream of page chunks. Workers are recycled after a fixed number
+of tasks to contain PyMuPDF memory growth.
+"""
+
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+MAX_BYTES = int(os.getenv("EXTRACT_MAX_BYTES", 20 * 1024 * 1024))
+MAX_PAGES = int(os.getenv("EXTRACT_MAX_PAGES", 200))
+PAGES_PER_TASK = int(os.getenv("EXTRACT_PAGES_PER_TASK", 8))
+TASKS_PER_WORKER = int(os.getenv("EXTRACT_TASKS_PER_WORKER", 50))
+WORKERS = int(os.getenv("EXTRACT_WORKERS", min(4, os.cpu_count() or 1)))
+
+
+class ExtractionError(ValueError):
+    """The document could not be parsed"""
+
+
+class DocumentTooLarge(ExtractionError):
+    """The document exceeds the configured byte or page limit"""
+
+
+# ---------- Worker functions (run in the pool) ----------
+
+def _pdf_page_count(data: bytes) -> int:
+    import fitz  # PyMuPDF
+
+    with fitz.open(stream=data, filetype="pdf") as pdf:
+        return pdf.page_count
+
+
+def _pdf_pages_text(data: bytes, start: int, stop: int) -> str:
+    import fitz  # PyMuPDF
+
+    with fitz.open(stream=data, filetype="pdf") as pdf:
+        return "\n".join(pdf[i].get_text() for i in range(start, stop))
+
+
+def _docx_text(data: bytes) -> str:
+    import docx
+
+    doc = docx.Document(io.BytesIO(data))
+    return "\n".join(para.text for para in doc.paragraphs)
+
+
+# ---------- Pool ----------
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                max_tasks_per_child=TASKS_PER_WORKER,
+            )
+        return _pool
+
+
+def shutdown():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _discard(pool: ProcessPoolExecutor):
+    """Drop a broken pool so the next call starts a fresh one (unless another thread already did)"""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _run(fn, *args):
+    pool = get_pool()
+    try:
+        return pool.submit(fn, *args).result()
+    except BrokenProcessPool as e:
+        _discard(pool)  # a worker died (e.g. OOM)
+        raise ExtractionError(str(e)) from e
+    except Exception as e:
+        raise ExtractionError(str(e)) from e
+
+
+# ---------- Public API ----------
+
+def document_kind(filename: str) -> str:
+    name = filename.lower()
+    if name.endswith(".pdf"):
+        return "pdf"
+    if name.endswith(".docx"):
+        return "docx"
+    raise ExtractionError("Unsupported file type")
+
+
+def iter_text_chunks(filename: str, data: bytes, max_pages: int = MAX_PAGES):
+    """
+    Yield the document text in order, one chunk per page range.
+    Raises DocumentTooLarge before any parsing if a limit is exceeded.
+    """
+    if len(data) > MAX_BYTES:
+        raise DocumentTooLarge(f"File exceeds {MAX_BYTES} bytes")
+
+    if document_kind(filename) == "docx":
+        yield _run(_docx_text, data)
+        return
+
+    pages = _run(_pdf_page_count, data)
+    if pages > max_pages:
+        raise DocumentTooLarge(f"PDF has {pages} pages, limit is {max_pages}")
+
+    # Submit every page range up front so they parse in parallel, then yield in order
+    pool = get_pool()
+    futures = []
+    try:
+        for start in range(0, pages, PAGES_PER_TASK):
+            futures.append(pool.submit(_pdf_pages_text, data, start, min(start + PAGES_PER_TASK, pages)))
+        for future in futures:
+            yield future.result()
+    except BrokenProcessPool as e:
+        _discard(pool)
+        raise ExtractionError(str(e)) from e
+    except Exception as e:
+        raise ExtractionError(str(e)) from e
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def extract_text(filename: str, data: bytes, max_pages: int = MAX_PAGES) -> str:
+    return "\n".join(iter_text_chunks(filename, data, max_pages))
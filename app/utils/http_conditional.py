@@ -0,0 +1,63 @@
+# app/utils/http_conditional.py
+"""
+Conditional file responses (RFC 9110): 304 Not Modified for If-None-Match /
+If-Modified-Since, on top of Starlette's FileResponse, which already
+serves Range / If-Range requests (206, multipart/byteranges, 416) and hands
+the file to the server via the ASGI pathsend extension when the server
+supports it (zero-copy there; chunked reads otherwise).
+"""
+
+import os
+from email.utils import parsedate_to_datetime
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+
+# Resumes are personal: browsers may keep them, shared caches may not,
+# and every reuse is revalidated (cheaply, thanks to the ETag)
+CACHE_CONTROL = "private, no-cache"
+
+_VALIDATORS = ("etag", "last-modified", "cache-control")
+
+
+def _opaque(tag: str) -> str:
+    # If-None-Match uses weak comparison: W/"x" matches "x"
+    return tag.strip().removeprefix("W/")
+
+
+def not_modified(request: Request, etag: str, last_modified: str = None) -> bool:
+    if request.method not in ("GET", "HEAD"):
+        return False
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:  # takes precedence over If-Modified-Since
+        if if_none_match.strip() == "*":
+            return True
+        return _opaque(etag) in {_opaque(tag) for tag in if_none_match.split(",")}
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False  # unparseable date: ignore the condition
+    return False
+
+
+def not_modified_response(headers) -> Response:
+    return Response(status_code=304, headers={k: headers[k] for k in _VALIDATORS if k in headers})
+
+
+def conditional_file_response(request: Request, path: str, media_type: str, filename: str,
+                              etag: str = None) -> Response:
+    """
+    FileResponse for `path`, or 304 if the client's copy is current. `etag`
+    (quoted) replaces Starlette's mtime/size-derived one, e.g. with a content hash.
+    """
+    headers = {"cache-control": CACHE_CONTROL}
+    if etag:
+        headers["etag"] = etag
+    response = FileResponse(
+        path, media_type=media_type, filename=filename, headers=headers, stat_result=os.stat(path),
+    )
+    if not_modified(request, response.headers["etag"], response.headers.get("last-modified")):
+        return not_modified_response(response.headers)
+    return response
@@ -0,0 +1,152 @@
+# app/utils/jobs.py
+"""
+Background job pipeline for slow upload processing (PDF parsing + Gemini).
+
+Upload endpoints store the file, insert a row in `jobs` and return 202 with
+the job id. A bounded thread pool runs the registered handler for the job's
+kind and records progress and the result on the row, so status survives
+restarts and any worker process can answer status requests. On startup,
+queued jobs and jobs stuck "running" past JOB_STALE_SECONDS are re-queued.
+"""
+
+import json
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException
+from sqlalchemy import update
+
+from app.database import SessionLocal, engine
+from app.model.models import Job
+from metrics import metrics
+
+JOB_UPLOAD_DIR = os.getenv("JOB_UPLOAD_DIR", "job_uploads")
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", 600))
+
+
+class JobRunner:
+    def __init__(self, max_workers: int = 4):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job-worker")
+        self._handlers = {}
+        self._lock = threading.Lock()
+        self._depth = 0  # queued + running in this process
+
+    def handler(self, kind: str):
+        """
+        Register `fn(db, job, file_bytes, set_progress) -> dict` for a job kind.
+        `set_progress(pct, partial=None)` may also publish a provisional result.
+        """
+        def decorator(fn):
+            self._handlers[kind] = fn
+            return fn
+        return decorator
+
+    def _set_depth(self, delta: int):
+        with self._lock:
+            self._depth += delta
+            metrics["queue_length"] = self._depth
+
+    def queue_depth(self) -> int:
+        return self._depth
+
+    def submit(self, db, kind: str, user_id: int, filename: str, file_bytes: bytes) -> Job:
+        """Persist the upload and the job row, then queue it"""
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind '{kind}'")
+
+        os.makedirs(JOB_UPLOAD_DIR, exist_ok=True)
+        job_id = uuid.uuid4().hex
+        file_path = os.path.join(JOB_UPLOAD_DIR, f"{job_id}_{os.path.basename(filename)}")
+        with open(file_path, "wb") as f:
+            f.write(file_bytes)
+
+        job = Job(id=job_id, kind=kind, user_id=user_id, status="queued", progress=0,
+                  filename=filename, file_path=file_path)
+        db.add(job)
+        db.commit()
+        self._enqueue(job_id)
+        return job
+
+    def _enqueue(self, job_id: str):
+        self._set_depth(1)
+        self._executor.submit(self._run, job_id)
+
+    def _run(self, job_id: str):
+        db = SessionLocal()
+        try:
+            # Claim the job atomically so two processes never run it twice
+            claimed = db.query(Job).filter(Job.id == job_id, Job.status == "queued").update(
+                {"status": "running", "progress": 10}, synchronize_session=False
+            )
+            db.commit()
+            if not claimed:
+                return
+            job = db.get(Job, job_id)
+
+            def set_progress(pct: int, partial: dict = None):
+                # Own short transaction: committing the handler's session here
+                # would also commit whatever the handler has written so far
+                values = {"progress": pct}
+                if partial is not None:
+                    values["result_json"] = json.dumps({**partial, "partial": True}, default=str)
+                with engine.begin() as connection:
+                    connection.execute(update(Job).where(Job.id == job_id).values(**values))
+
+            try:
+                with open(job.file_path, "rb") as f:
+                    file_bytes = f.read()
+                result = self._handlers[job.kind](db, job, file_bytes, set_progress)
+                job.status = "succeeded"
+                job.progress = 100
+                job.result_json = json.dumps(result, default=str)
+            except HTTPException as e:
+                db.rollback()
+                job.status = "failed"
+                job.error = str(e.detail)
+            except Exception as e:
+                db.rollback()
+                job.status = "failed"
+                job.error = str(e)
+            db.commit()
+
+            if os.path.exists(job.file_path):
+                os.remove(job.file_path)
+        finally:
+            db.close()
+            self._set_depth(-1)
+
+    def recover(self):
+        """Re-queue queued jobs, and running jobs whose worker stopped updating them"""
+        stale_before = datetime.now(timezone.utc) - timedelta(seconds=JOB_STALE_SECONDS)
+        db = SessionLocal()
+        try:
+            db.query(Job).filter(Job.status == "running", Job.updated_at < stale_before).update(
+                {"status": "queued"}, synchronize_session=False
+            )
+            db.commit()
+            pending = db.query(Job.id).filter(Job.status == "queued").all()
+        finally:
+            db.close()
+        for (job_id,) in pending:
+            self._enqueue(job_id)
+        return len(pending)
+
+
+def serialize_job(job: Job) -> dict:
+    return {
+        "job_id": job.id,
+        "kind": job.kind,
+        "user_id": job.user_id,
+        "status": job.status,
+        "progress": job.progress,
+        "result": json.loads(job.result_json) if job.result_json else None,
+        "error": job.error,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at
+    }
+
+
+job_runner = JobRunner(max_workers=int(os.getenv("JOB_WORKERS", 4)))
@@ -0,0 +1,319 @@
+# app/utils/llm_client.py
+"""
+Shared client for every LLM call in the app.
+
+All calls run on one dedicated event loop thread, so the Gemini channel is
+created once and reused, and a single semaphore bounds how many requests
+are in flight across both sync (threadpool) and async handlers. Each
+attempt has a timeout and transient failures are retried with jittered
+exponential backoff.
+
+Set LLM_BACKEND=fake to use a local fake model (no network, no API key),
+e.g. for load testing:  LLM_BACKEND=fake python -m app.utils.llm_client
+"""
+
+import asyncio
+import json
+import os
+import random
+import re
+import threading
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEFAULT_MODEL = "gemini-2.0-flash"
+
+
+class LLMError(Exception):
+    """Raised when the model call fails after all retries"""
+
+
+class LLMTimeoutError(LLMError):
+    """Raised when the model does not answer within the per-call timeout"""
+
+
+def _env_int(name, default):
+    return int(os.getenv(name, default))
+
+
+def _env_float(name, default):
+    return float(os.getenv(name, default))
+
+
+def strip_code_fences(text: str) -> str:
+    """Remove Markdown-style triple backticks (e.g., ```json ... ```)"""
+    return re.sub(r"^```(?:json)?\s*|\s*```$", "", text.strip(), flags=re.IGNORECASE)
+
+
+# ---------- Backends ----------
+
+class GeminiBackend:
+    """Google Gemini via the async google-generativeai API"""
+
+    def __init__(self, model_name: str = DEFAULT_MODEL):
+        import google.generativeai as genai
+
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            # It's crucial to handle this error at startup
+            raise ValueError("GEMINI_API_KEY environment variable is not set. Please set it to your API key.")
+        genai.configure(api_key=api_key)
+        self._genai = genai
+        self._model_name = model_name
+        self._models = {}
+
+    def _model(self, system_instruction=None):
+        # One model object per system instruction; they share the client channel
+        if system_instruction not in self._models:
+            self._models[system_instruction] = self._genai.GenerativeModel(
+                self._model_name, system_instruction=system_instruction
+            )
+        return self._models[system_instruction]
+
+    async def generate(self, prompt: str) -> str:
+        response = await self._model().generate_content_async(prompt)
+        return response.text
+
+    async def chat(self, history: list, message: str) -> str:
+        session = self._model().start_chat(history=history)
+        response = await session.send_message_async(message)
+        return response.text
+
+    async def chat_stream(self, history: list, message: str):
+        session = self._model().start_chat(history=history)
+        response = await session.send_message_async(message, stream=True)
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+    def is_retryable(self, exc: Exception) -> bool:
+        from google.api_core import exceptions as gexc
+        return isinstance(exc, (
+            gexc.ResourceExhausted,
+            gexc.ServiceUnavailable,
+            gexc.DeadlineExceeded,
+            gexc.InternalServerError,
+        ))
+
+
+class FakeBackend:
+    """
+    Local stand-in for Gemini. Sleeps for `latency` seconds, optionally fails a
+    fraction of calls, and records peak concurrency.
+    """
+
+    def __init__(self, latency: float = 0.05, fail_rate: float = 0.0, reply: str = "[]"):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.reply = reply
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.calls = 0
+
+    async def _respond(self, text: str) -> str:
+        self.calls += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            if self.fail_rate and random.random() < self.fail_rate:
+                raise ConnectionError("fake backend failure")
+            return text
+        finally:
+            self.in_flight -= 1
+
+    async def generate(self, prompt: str) -> str:
+        return await self._respond(self.reply)
+
+    async def chat(self, history: list, message: str) -> str:
+        return await self._respond(f"echo: {message}")
+
+    async def chat_stream(self, history: list, message: str):
+        """Yield the echo reply word by word, spreading `latency` across the words"""
+        words = f"echo: {message}".split(" ")
+        self.calls += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            for i, word in enumerate(words):
+                await asyncio.sleep(self.latency / len(words))
+                yield word if i == 0 else " " + word
+        finally:
+            self.in_flight -= 1
+
+    def is_retryable(self, exc: Exception) -> bool:
+        return isinstance(exc, ConnectionError)
+
+
+# ---------- Client ----------
+
+class LLMClient:
+    def __init__(
+        self,
+        backend,
+        max_concurrency: int = 8,
+        timeout: float = 30.0,
+        max_retries: int = 2,
+        backoff_base: float = 0.5,
+    ):
+        self.backend = backend
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._loop = None
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "retries": 0, "timeouts": 0, "failures": 0, "in_flight": 0}
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="llm-client", daemon=True).start()
+        return self._loop
+
+    async def _call(self, fn, *args) -> str:
+        """Run one backend call on the client loop with timeout and retries"""
+        self.stats["calls"] += 1
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    self.stats["in_flight"] += 1
+                    try:
+                        return await asyncio.wait_for(fn(*args), self.timeout)
+                    finally:
+                        self.stats["in_flight"] -= 1
+            except asyncio.TimeoutError:
+                self.stats["timeouts"] += 1
+                error = LLMTimeoutError(f"LLM call timed out after {self.timeout}s")
+            except Exception as e:
+                if not self.backend.is_retryable(e):
+                    self.stats["failures"] += 1
+                    raise
+                error = LLMError(str(e))
+
+            if attempt >= self.max_retries:
+                self.stats["failures"] += 1
+                raise error
+            attempt += 1
+            self.stats["retries"] += 1
+            # Full jitter: sleep a random amount up to the exponential cap
+            await asyncio.sleep(random.uniform(0, self.backoff_base * 2 ** attempt))
+
+    def _submit(self, fn, *args):
+        return asyncio.run_coroutine_threadsafe(self._call(fn, *args), self._ensure_loop())
+
+    # Async handlers: await without blocking the caller's event loop
+    async def generate(self, prompt: str) -> str:
+        return await asyncio.wrap_future(self._submit(self.backend.generate, prompt))
+
+    async def chat(self, history: list, message: str) -> str:
+        return await asyncio.wrap_future(self._submit(self.backend.chat, history, message))
+
+    async def chat_stream(self, history: list, message: str):
+        """
+        Relay reply chunks from the client loop as they arrive. Each chunk must
+        arrive within the timeout; closing this generator (e.g. the HTTP client
+        disconnected) cancels the upstream call and frees its semaphore slot.
+        """
+        caller_loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        done = object()
+
+        async def produce():
+            try:
+                async with self._semaphore:
+                    self.stats["calls"] += 1
+                    self.stats["in_flight"] += 1
+                    stream = self.backend.chat_stream(history, message)
+                    try:
+                        while True:
+                            try:
+                                chunk = await asyncio.wait_for(stream.__anext__(), self.timeout)
+                            except StopAsyncIteration:
+                                break
+                            caller_loop.call_soon_threadsafe(queue.put_nowait, chunk)
+                    finally:
+                        self.stats["in_flight"] -= 1
+                        await stream.aclose()
+            except asyncio.TimeoutError:
+                self.stats["timeouts"] += 1
+                caller_loop.call_soon_threadsafe(
+                    queue.put_nowait, LLMTimeoutError(f"LLM stream stalled for {self.timeout}s")
+                )
+            except Exception as e:
+                self.stats["failures"] += 1
+                caller_loop.call_soon_threadsafe(queue.put_nowait, e)
+            caller_loop.call_soon_threadsafe(queue.put_nowait, done)
+
+        future = asyncio.run_coroutine_threadsafe(produce(), self._ensure_loop())
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            future.cancel()
+
+    async def generate_json(self, prompt: str):
+        return json.loads(strip_code_fences(await self.generate(prompt)))
+
+    # Sync handlers (already on the threadpool): block only the worker thread
+    def generate_sync(self, prompt: str) -> str:
+        return self._submit(self.backend.generate, prompt).result()
+
+    def generate_json_sync(self, prompt: str):
+        return json.loads(strip_code_fences(self.generate_sync(prompt)))
+
+
+def build_backend():
+    if os.getenv("LLM_BACKEND", "gemini") == "fake":
+        return FakeBackend(
+            latency=_env_float("LLM_FAKE_LATENCY", 0.05),
+            fail_rate=_env_float("LLM_FAKE_FAIL_RATE", 0.0),
+        )
+    return GeminiBackend(os.getenv("LLM_MODEL", DEFAULT_MODEL))
+
+
+_client = None
+
+
+def get_llm_client() -> LLMClient:
+    global _client
+    if _client is None:
+        _client = LLMClient(
+            build_backend(),
+            max_concurrency=_env_int("LLM_MAX_CONCURRENCY", 8),
+            timeout=_env_float("LLM_TIMEOUT_SECONDS", 30),
+            max_retries=_env_int("LLM_MAX_RETRIES", 2),
+            backoff_base=_env_float("LLM_BACKOFF_BASE", 0.5),
+        )
+    return _client
+
+
+if __name__ == "__main__":
+    # Load test against the fake backend: N concurrent callers, bounded in flight
+    requests = _env_int("LLM_LOADTEST_REQUESTS", 200)
+    client = LLMClient(
+        FakeBackend(latency=_env_float("LLM_FAKE_LATENCY", 0.05), fail_rate=_env_float("LLM_FAKE_FAIL_RATE", 0.05)),
+        max_concurrency=_env_int("LLM_MAX_CONCURRENCY", 8),
+        timeout=_env_float("LLM_TIMEOUT_SECONDS", 1),
+        backoff_base=0.01,
+    )
+
+    async def main():
+        results = await asyncio.gather(*(client.generate("ping") for _ in range(requests)), return_exceptions=True)
+        return sum(1 for r in results if isinstance(r, Exception))
+
+    start = time.perf_counter()
+    failed = asyncio.run(main())
+    elapsed = time.perf_counter() - start
+    print(f"{requests} calls in {elapsed:.2f}s ({requests / elapsed:.0f}/s), failed={failed}")
+    print(f"peak in flight={client.backend.peak_in_flight}, stats={client.stats}")
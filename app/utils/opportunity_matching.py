@@ -0,0 +1,501 @@
+# app/utils/opportunity_matching.py
+"""
+Consultant <-> opportunity matching.
+
+Every consultant's skills are held in memory as a sparse consultant x skill
+proficiency matrix, stored by column: for each skill, NumPy arrays of the
+consultants (rows) that have it and their proficiency. Skill names are
+folded to their vocabulary name first, so "k8s" meets a "Kubernetes"
+requirement.
+
+Each requirement of an opportunity counts 1 when the consultant has the
+skill at or above its minimum proficiency, proficiency / minimum when they
+have it below, 0 without it; the score is the mean over the requirements
+(1.0 = fully qualified), ties broken by proficiency above the minimums.
+Ranking the pool for an opportunity touches only the columns of its
+required skills, one vectorized step per requirement. Ranking every active
+opportunity for one consultant gathers the consultant's proficiencies at
+all requirements at once and sums them per opportunity with bincount.
+
+The matrix is loaded once and then patched: committed Skill writes mark
+their consultants, whose rows are reloaded (one query) before the next
+match, and opportunity writes reload the requirement arrays.
+MATCHING_RELOAD_SECONDS forces a full reload, bounding staleness from
+writes made by other workers.
+
+Benchmark:  python -m app.utils.opportunity_matching [consultants]
+"""
+
+import os
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, attributes, object_session
+
+from app.database import SessionLocal
+from app.model.models import Opportunity, OpportunitySkill, Skill
+from app.model.user_model import User
+from app.utils.skill_vocabulary import canonical_skill
+
+RELOAD_SECONDS = float(os.getenv("MATCHING_RELOAD_SECONDS", 900))
+OPEN_STATUS = "active"
+# Surplus proficiency only orders equal scores: distinct scores differ by far more than this
+_TIEBREAK = 1e-6
+
+
+def skill_key(name: str) -> str:
+    return canonical_skill(name).lower()
+
+
+def _top(key: np.ndarray, ids: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest positive keys, best first (ties by ascending id)"""
+    candidates = np.flatnonzero(key > 0)
+    if candidates.size > k:
+        candidates = candidates[np.argpartition(-key[candidates], k - 1)[:k]]
+    return candidates[np.lexsort((ids[candidates], -key[candidates]))]
+
+
+class OpportunityMatcher:
+    def __init__(self, reload_seconds: float = RELOAD_SECONDS, session_factory=SessionLocal):
+        self.reload_seconds = reload_seconds
+        self._session_factory = session_factory
+        self._lock = threading.RLock()          # matrix reads and writes
+        self._marks_lock = threading.Lock()     # pending marks, taken from commit hooks
+        self._dirty_users = set()
+        self._opportunities_stale = False  # the first (full) load reads them anyway
+        self._loaded_at = None
+        self.counts = {"full_loads": 0, "user_reloads": 0, "opportunity_loads": 0, "matches": 0}
+        self._reset()
+
+    def _reset(self):
+        self._skill_cols = {}   # skill key -> column
+        self._name_cols = {}    # skill as stored -> column (skips re-normalizing on loads)
+        self._skill_names = []  # column -> display name
+        self._columns = []      # column -> {row: proficiency}
+        self._arrays = []       # column -> (rows, proficiencies), None once the column changed
+        self._rows = {}         # user_id -> row
+        self._user_ids = []     # row -> user_id
+        self._row_skills = []   # row -> {column: proficiency}
+        self._user_id_array = np.zeros(0, np.int64)
+        self._opportunities = {}  # opportunity_id -> (title, [(column, min_proficiency)])
+        self._opp_ids = np.zeros(0, np.int64)
+        self._req_opp = np.zeros(0, np.intp)   # per requirement: opportunity index
+        self._req_col = np.zeros(0, np.intp)   # per requirement: skill column
+        self._req_min = np.zeros(0, np.float32)
+        self._opp_nreq = np.zeros(0, np.float32)
+
+    # ---------- Invalidation ----------
+
+    def mark_users(self, user_ids):
+        with self._marks_lock:
+            self._dirty_users.update(u for u in user_ids if u is not None)
+
+    def mark_opportunities(self):
+        with self._marks_lock:
+            self._opportunities_stale = True
+
+    def invalidate(self):
+        """Full reload before the next match"""
+        with self._marks_lock:
+            self._loaded_at = None
+
+    # ---------- Loading ----------
+
+    def _column(self, name: str) -> int:
+        col = self._name_cols.get(name)
+        if col is not None:
+            return col
+        key = skill_key(name)
+        col = self._skill_cols.get(key)
+        if col is None:
+            col = self._skill_cols[key] = len(self._columns)
+            self._skill_names.append(canonical_skill(name))
+            self._columns.append({})
+            self._arrays.append(None)
+        self._name_cols[name] = col
+        return col
+
+    def _existing_column(self, name: str):
+        """Column of a skill already in the matrix, None for a skill nobody has or requires"""
+        col = self._name_cols.get(name)
+        return col if col is not None else self._skill_cols.get(skill_key(name))
+
+    def _group(self, rows) -> dict:
+        """(user_id, skill, proficiency) rows -> {user_id: {column: best proficiency}}"""
+        grouped = defaultdict(dict)
+        for user_id, skill, proficiency in rows:
+            col = self._column(skill)
+            skills = grouped[user_id]
+            skills[col] = max(skills.get(col, 0), proficiency or 0)
+        return grouped
+
+    def _set_user(self, user_id: int, skills: dict):
+        row = self._rows.get(user_id)
+        if row is None:
+            if not skills:
+                return
+            row = self._rows[user_id] = len(self._user_ids)
+            self._user_ids.append(user_id)
+            self._row_skills.append({})
+            self._user_id_array = np.append(self._user_id_array, user_id)
+        old = self._row_skills[row]
+        for col in old.keys() - skills.keys():
+            del self._columns[col][row]
+            self._arrays[col] = None
+        for col, proficiency in skills.items():
+            if old.get(col) != proficiency:
+                self._columns[col][row] = proficiency
+                self._arrays[col] = None
+        self._row_skills[row] = skills
+
+    def _skill_rows(self, db: Session, user_ids=None):
+        query = (
+            select(Skill.user_id, Skill.skill, Skill.proficiency)
+            .join(User, User.id == Skill.user_id)
+            .where(User.role == "consultant")
+        )
+        if user_ids is not None:
+            query = query.where(Skill.user_id.in_(user_ids))
+        return db.execute(query)
+
+    def load(self, rows):
+        """Replace the matrix with (user_id, skill, proficiency) rows"""
+        with self._lock:
+            self._reset()
+            grouped = self._group(rows)
+            # Rows in one go: np.append per new consultant is for incremental updates only
+            self._user_ids = list(grouped)
+            self._rows = {user_id: row for row, user_id in enumerate(self._user_ids)}
+            self._row_skills = [grouped[user_id] for user_id in self._user_ids]
+            self._user_id_array = np.array(self._user_ids, np.int64)
+            for row, skills in enumerate(self._row_skills):
+                for col, proficiency in skills.items():
+                    self._columns[col][row] = proficiency
+            self._loaded_at = time.monotonic()
+            self.counts["full_loads"] += 1
+
+    def _reload_users(self, db: Session, user_ids: set):
+        grouped = self._group(self._skill_rows(db, list(user_ids)))
+        for user_id in user_ids:
+            self._set_user(user_id, grouped.get(user_id, {}))
+        self.counts["user_reloads"] += 1
+
+    def load_opportunities(self, rows):
+        """Replace the requirements with (opportunity_id, title, skill, min_proficiency) rows"""
+        with self._lock:
+            opportunities = {}
+            for opportunity_id, title, skill, min_proficiency in rows:
+                opportunities.setdefault(opportunity_id, (title, []))[1].append(
+                    (self._column(skill), min_proficiency or 0))
+            self._opportunities = opportunities
+            self._opp_ids = np.array(list(opportunities), np.int64)
+            requirements = [reqs for _, reqs in opportunities.values()]
+            self._req_opp = np.repeat(np.arange(len(requirements)), [len(r) for r in requirements])
+            self._req_col = np.array([col for reqs in requirements for col, _ in reqs], np.intp)
+            self._req_min = np.array([m for reqs in requirements for _, m in reqs], np.float32)
+            self._opp_nreq = np.array([len(r) for r in requirements], np.float32)
+            self.counts["opportunity_loads"] += 1
+
+    def _opportunity_rows(self, db: Session):
+        return db.execute(
+            select(Opportunity.id, Opportunity.title, OpportunitySkill.skill, OpportunitySkill.min_proficiency)
+            .join(OpportunitySkill, OpportunitySkill.opportunity_id == Opportunity.id)
+            .where(Opportunity.status == OPEN_STATUS)
+            .order_by(Opportunity.id, OpportunitySkill.id)
+        )
+
+    def _sync(self):
+        """Bring the matrix up to date with committed writes (caller holds the lock)"""
+        with self._marks_lock:
+            full = self._loaded_at is None or time.monotonic() - self._loaded_at > self.reload_seconds
+            dirty, self._dirty_users = self._dirty_users, set()
+            reload_opportunities, self._opportunities_stale = self._opportunities_stale, False
+        if not (full or dirty or reload_opportunities):
+            return
+        db = self._session_factory()
+        try:
+            if full:
+                self.load(self._skill_rows(db))  # columns renumbered: requirements follow
+            elif dirty:
+                self._reload_users(db, dirty)
+            if full or reload_opportunities:
+                self.load_opportunities(self._opportunity_rows(db))
+        except Exception:
+            # Retry on the next call
+            self.mark_users(dirty)
+            self.mark_opportunities()
+            if full:
+                self.invalidate()
+            raise
+        finally:
+            db.close()
+
+    def _array(self, col: int):
+        arrays = self._arrays[col]
+        if arrays is None:
+            column = self._columns[col]
+            arrays = self._arrays[col] = (
+                np.fromiter(column.keys(), np.intp, len(column)),
+                np.fromiter(column.values(), np.float32, len(column)),
+            )
+        return arrays
+
+    # ---------- Matching ----------
+
+    def rank_consultants(self, requirements: list, k: int = 10) -> list:
+        """
+        Best k consultants for [(skill, min_proficiency or None)]:
+        [{"user_id", "score", "qualified", "matched"}], best first.
+        """
+        with self._lock:
+            self._sync()
+            self.counts["matches"] += 1
+            # Ad-hoc requirements only look columns up: a skill that isn't in the
+            # matrix matches nobody and must not add a column per request
+            reqs = [(self._existing_column(skill), minimum or 0) for skill, minimum in requirements]
+            n = len(self._user_ids)
+            if not reqs or not n:
+                return []
+            score = np.zeros(n, np.float32)
+            surplus = np.zeros(n, np.float32)
+            for col, minimum in reqs:
+                if col is None:
+                    continue
+                rows, proficiency = self._array(col)
+                if minimum:
+                    score[rows] += np.minimum(proficiency / minimum, 1)
+                    surplus[rows] += np.maximum(proficiency - minimum, 0)
+                else:
+                    score[rows] += 1
+                    surplus[rows] += proficiency
+            score /= len(reqs)
+            key = score + surplus.astype(np.float64) / len(reqs) * _TIEBREAK
+
+            results = []
+            for row in _top(key, self._user_id_array, k):
+                skills = self._row_skills[row]
+                results.append({
+                    "user_id": self._user_ids[row],
+                    "score": round(float(score[row]), 3),
+                    "qualified": bool(score[row] >= 1 - _TIEBREAK),
+                    "matched": [self._skill_names[col] for col, minimum in reqs
+                                if col in skills and skills[col] >= minimum],
+                })
+            return results
+
+    def consultants_for(self, opportunity_id: int, k: int = 10):
+        """Best k consultants for a stored opportunity (None if it has no requirements)"""
+        with self._lock:
+            self._sync()
+            stored = self._opportunities.get(opportunity_id)
+            if stored is not None:
+                requirements = [(self._skill_names[col], minimum) for col, minimum in stored[1]]
+            else:  # not open: read its requirements directly
+                db = self._session_factory()
+                try:
+                    requirements = db.execute(
+                        select(OpportunitySkill.skill, OpportunitySkill.min_proficiency)
+                        .where(OpportunitySkill.opportunity_id == opportunity_id)
+                    ).all()
+                finally:
+                    db.close()
+            if not requirements:
+                return None
+            return self.rank_consultants(requirements, k)
+
+    def _opportunity_scores(self, user_id: int):
+        """(score, surplus) of every open opportunity for this consultant, or None"""
+        row = self._rows.get(user_id)
+        if row is None or not len(self._opp_ids):
+            return None
+        skills = self._row_skills[row]
+        proficiency = np.zeros(len(self._columns), np.float32)
+        has = np.zeros(len(self._columns), bool)
+        cols = np.fromiter(skills.keys(), np.intp, len(skills))
+        proficiency[cols] = np.fromiter(skills.values(), np.float32, len(skills))
+        has[cols] = True
+
+        p, h, m = proficiency[self._req_col], has[self._req_col], self._req_min
+        credit = np.where(m > 0, np.minimum(p / np.maximum(m, 1), 1), 1) * h
+        surplus = np.maximum(p - m, 0) * h
+        n = len(self._opp_ids)
+        score = np.bincount(self._req_opp, weights=credit, minlength=n) / self._opp_nreq
+        surplus = np.bincount(self._req_opp, weights=surplus, minlength=n) / self._opp_nreq
+        return score, surplus
+
+    def opportunities_for(self, user_id: int, k: int = 10) -> list:
+        """
+        Best k open opportunities for a consultant:
+        [{"opportunity_id", "title", "score", "qualified", "missing"}], best first.
+        """
+        with self._lock:
+            self._sync()
+            self.counts["matches"] += 1
+            scores = self._opportunity_scores(user_id)
+            if scores is None:
+                return []
+            score, surplus = scores
+            skills = self._row_skills[self._rows[user_id]]
+            results = []
+            for i in _top(score + surplus * _TIEBREAK, self._opp_ids, k):
+                opportunity_id = int(self._opp_ids[i])
+                title, reqs = self._opportunities[opportunity_id]
+                results.append({
+                    "opportunity_id": opportunity_id,
+                    "title": title,
+                    "score": round(float(score[i]), 3),
+                    "qualified": bool(score[i] >= 1 - _TIEBREAK),
+                    "missing": [self._skill_names[col] for col, minimum in reqs
+                                if col not in skills or skills[col] < minimum],
+                })
+            return results
+
+    def count_qualified(self, user_id: int) -> int:
+        """Open opportunities whose every requirement this consultant meets"""
+        with self._lock:
+            self._sync()
+            scores = self._opportunity_scores(user_id)
+            return 0 if scores is None else int(np.count_nonzero(scores[0] >= 1 - _TIEBREAK))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "consultants": len(self._user_ids),
+                "skills": len(self._columns),
+                "entries": sum(len(c) for c in self._columns),
+                "open_opportunities": len(self._opp_ids),
+                "pending_users": len(self._dirty_users),
+                "loaded_seconds_ago": None if self._loaded_at is None
+                else round(time.monotonic() - self._loaded_at, 1),
+                **self.counts,
+            }
+
+
+opportunity_matcher = OpportunityMatcher()
+
+
+# ---------- Write tracking ----------
+# Mapper events catch every Skill row a flush writes (including orphans removed
+# from user.skills and rows moved between users); marks apply on commit.
+
+def _note_users(session, *user_ids):
+    session.info.setdefault("matching_users", set()).update(user_ids)
+
+
+@event.listens_for(Skill, "after_insert")
+@event.listens_for(Skill, "after_update")
+@event.listens_for(Skill, "after_delete")
+def _skill_written(mapper, connection, target):
+    previous = attributes.get_history(target, "user_id").deleted
+    _note_users(object_session(target), target.user_id, *previous)
+
+
+@event.listens_for(Session, "after_flush")
+def _note_writes(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, User) and obj not in session.new:
+            _note_users(session, obj.id)  # role change or delete
+        elif isinstance(obj, (Opportunity, OpportunitySkill)):
+            session.info["matching_opportunities"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_marks(session):
+    users = session.info.pop("matching_users", None)
+    if users:
+        opportunity_matcher.mark_users(users)
+    if session.info.pop("matching_opportunities", False):
+        opportunity_matcher.mark_opportunities()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_marks(session):
+    session.info.pop("matching_users", None)
+    session.info.pop("matching_opportunities", None)
+
+
+if __name__ == "__main__":
+    import sys
+
+    from app.utils.skill_vocabulary import VOCABULARY
+
+    n_consultants = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    n_opportunities = int(os.getenv("MATCHING_BENCH_OPPORTUNITIES", 1000))
+    rounds = int(os.getenv("MATCHING_BENCH_ROUNDS", 200))
+    rng = np.random.default_rng(7)
+    vocabulary = list(VOCABULARY)
+    # Skewed popularity, like a real pool (a few skills are everywhere)
+    popularity = 1 / np.arange(1, len(vocabulary) + 1)
+    popularity /= popularity.sum()
+
+    def sample_skills(n):
+        return rng.choice(len(vocabulary), size=n, replace=False, p=popularity)
+
+    rows = [
+        (user_id, vocabulary[s], int(rng.integers(1, 11)))
+        for user_id in range(1, n_consultants + 1)
+        for s in sample_skills(int(rng.integers(3, 13)))
+    ]
+    opportunities = [
+        [(vocabulary[s], int(rng.integers(3, 9))) for s in sample_skills(int(rng.integers(2, 7)))]
+        for _ in range(n_opportunities)
+    ]
+
+    matcher = OpportunityMatcher(reload_seconds=float("inf"), session_factory=None)
+
+    def build():
+        matcher.load(rows)
+        matcher.load_opportunities(
+            (i, f"Opportunity {i}", skill, minimum)
+            for i, reqs in enumerate(opportunities, 1) for skill, minimum in reqs
+        )
+
+    start = time.perf_counter()
+    build()
+    load_ms = (time.perf_counter() - start) * 1000
+
+    def timed(fn, args):
+        start = time.perf_counter()
+        for a in args:
+            fn(*a)
+        return (time.perf_counter() - start) / len(args) * 1000
+
+    # First call builds the column arrays it touches
+    cold = timed(matcher.rank_consultants, [(opportunities[0], 10)])
+    per_opportunity = timed(matcher.rank_consultants, [(opportunities[i % n_opportunities], 10) for i in range(rounds)])
+    per_consultant = timed(matcher.opportunities_for, [(1 + i % n_consultants, 10) for i in range(rounds)])
+
+    # Incremental update: one consultant's skills change
+    user_skills = defaultdict(list)
+    for user_id, skill, proficiency in rows:
+        user_skills[user_id].append((skill, proficiency))
+    start = time.perf_counter()
+    for user_id in range(1, rounds + 1):
+        matcher._set_user(user_id, matcher._group((user_id, s, p) for s, p in user_skills[user_id][:-1])[user_id])
+    update_ms = (time.perf_counter() - start) / rounds * 1000
+    after_update = timed(matcher.rank_consultants, [(opportunities[i % n_opportunities], 10) for i in range(rounds)])
+
+    # Baseline: the same scoring as a Python loop over every consultant
+    by_user = {u: {skill_key(s): p for s, p in skills} for u, skills in user_skills.items()}
+
+    def python_rank(reqs, k):
+        reqs = [(skill_key(s), m) for s, m in reqs]
+        scored = []
+        for user_id, skills in by_user.items():
+            score = sum(min(skills[s] / m, 1) if s in skills else 0 for s, m in reqs) / len(reqs)
+            if score:
+                scored.append((-score, user_id))
+        return sorted(scored)[:k]
+
+    baseline = timed(python_rank, [(opportunities[i % n_opportunities], 10) for i in range(20)])
+
+    stats = matcher.stats()
+    print(f"{n_consultants} consultants, {stats['entries']} skill entries over {stats['skills']} skills, "
+          f"{n_opportunities} open opportunities; loaded in {load_ms:.0f}ms")
+    print(f"opportunity -> top 10 consultants: {per_opportunity:.2f}ms (first call after load {cold:.2f}ms)")
+    print(f"consultant -> top 10 of {n_opportunities} opportunities: {per_consultant:.2f}ms")
+    print(f"incremental consultant update: {update_ms:.3f}ms; ranking after {rounds} updates: {after_update:.2f}ms")
+    print(f"python loop baseline: {baseline:.2f}ms per opportunity")
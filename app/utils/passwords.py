@@ -0,0 +1,142 @@
+# app/utils/passwords.py
+"""
+Password hashing service.
+
+The single place passwords are hashed and verified. bcrypt is deliberately
+slow (~250 ms at cost 12) and releases the GIL, so async handlers run it on
+a small dedicated thread pool instead of the event loop. Admission control
+caps how many hash/verify calls may be queued; past that, callers get
+PasswordHasherBusy (HTTP 503) instead of a login storm starving every other
+endpoint.
+
+The bcrypt cost is PASSWORD_BCRYPT_ROUNDS. Hashes made with a different
+cost are re-hashed transparently on the next successful login.
+
+Benchmark (logins/sec and event loop lag):  python -m app.utils.passwords
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+ROUNDS = int(os.getenv("PASSWORD_BCRYPT_ROUNDS", 12))
+WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 64))
+
+
+class PasswordHasherBusy(Exception):
+    """Too many hash/verify calls are already queued"""
+
+
+class PasswordHasher:
+    def __init__(self, rounds: int = ROUNDS, workers: int = WORKERS, max_pending: int = MAX_PENDING):
+        # min == max == default: any other cost is reported by needs_update
+        self.context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__default_rounds=rounds,
+            bcrypt__min_rounds=rounds,
+            bcrypt__max_rounds=rounds,
+        )
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._pending = 0
+        self._lock = threading.Lock()
+        self.counts = {"hashes": 0, "verifications": 0, "rehashes": 0, "rejected": 0, "seconds": 0.0}
+
+    # Sync API, for code already running on a worker thread
+    def hash_sync(self, password: str) -> str:
+        start = time.perf_counter()
+        hashed = self.context.hash(password)
+        self._record("hashes", start)
+        return hashed
+
+    def verify_and_update_sync(self, password: str, hashed: str):
+        """(matches, new_hash); new_hash is set when the stored hash should be replaced"""
+        start = time.perf_counter()
+        try:
+            matches, new_hash = self.context.verify_and_update(password, hashed)
+        except ValueError:  # not a hash this context recognizes
+            matches, new_hash = False, None
+        self._record("verifications", start)
+        if new_hash:
+            with self._lock:
+                self.counts["rehashes"] += 1
+        return matches, new_hash
+
+    def verify_sync(self, password: str, hashed: str) -> bool:
+        return self.verify_and_update_sync(password, hashed)[0]
+
+    # Async API: runs on the hashing pool, never on the event loop
+    async def hash(self, password: str) -> str:
+        return await self._submit(self.hash_sync, password)
+
+    async def verify_and_update(self, password: str, hashed: str):
+        return await self._submit(self.verify_and_update_sync, password, hashed)
+
+    async def _submit(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.counts["rejected"] += 1
+                raise PasswordHasherBusy(f"{self._pending} password operations already pending")
+            self._pending += 1
+        try:
+            return await asyncio.wrap_future(self._executor.submit(fn, *args))
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _record(self, key: str, start: float):
+        with self._lock:
+            self.counts[key] += 1
+            self.counts["seconds"] += time.perf_counter() - start
+
+    def stats(self) -> dict:
+        done = self.counts["hashes"] + self.counts["verifications"]
+        return {
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+            **{k: v for k, v in self.counts.items() if k != "seconds"},
+            "avg_ms": round(self.counts["seconds"] / done * 1000, 1) if done else 0.0,
+        }
+
+
+password_hasher = PasswordHasher()
+
+
+if __name__ == "__main__":
+    # N concurrent logins against one stored hash, while a ticker measures event loop lag
+    logins = int(os.getenv("PASSWORD_BENCH_LOGINS", 40))
+    hasher = PasswordHasher(max_pending=logins)
+    stored = hasher.hash_sync("correct horse battery staple")
+
+    async def main():
+        lag = 0.0
+        stop = asyncio.Event()
+
+        async def ticker():
+            nonlocal lag
+            while not stop.is_set():
+                before = time.perf_counter()
+                await asyncio.sleep(0.01)
+                lag = max(lag, time.perf_counter() - before - 0.01)
+
+        tick = asyncio.create_task(ticker())
+        start = time.perf_counter()
+        results = await asyncio.gather(*(
+            hasher.verify_and_update("correct horse battery staple", stored) for _ in range(logins)
+        ))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await tick
+        return results, elapsed, lag
+
+    results, elapsed, lag = asyncio.run(main())
+    ok = sum(1 for matches, _ in results if matches)
+    print(f"{logins} logins in {elapsed:.2f}s ({logins / elapsed:.1f}/s) at cost {ROUNDS}, "
+          f"{WORKERS} workers, ok={ok}")
+    print(f"max event loop lag={lag * 1000:.1f}ms, stats={hasher.stats()}")
@@ -0,0 +1,151 @@
+# app/utils/principal_cache.py
+"""
+Short-lived cache of authenticated users for get_current_user.
+
+Keyed by the token's (user_id, sub) claims, so a valid token resolves its
+user without a database round trip. Entries expire after a short TTL and
+the store is an LRU with a maximum size. Any committed change to a User row
+made through the ORM (profile update, role change, password rehash,
+delete) evicts that user's entries in this worker; the TTL bounds
+staleness for changes made elsewhere (other workers, raw SQL).
+
+Entries are immutable Principal values (id, email, role), not ORM objects,
+so they are safe to share between threads and requests. A lookup that
+misses takes generation() before reading the row and passes it to put();
+the entry is refused if an invalidation happened in between, so a row read
+before a concurrent commit can't be cached after that commit's eviction.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+MAX_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", 10000))
+TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", 60))
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user, as far as authorization needs it"""
+    id: int
+    email: str
+    role: str
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(user.id, user.email, user.role)
+
+
+class PrincipalCache:
+    def __init__(self, max_size: int = MAX_SIZE, ttl: float = TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # (user_id, sub) -> (expires_at, principal)
+        self._keys_by_user = {}  # user id -> set of keys, for invalidation
+        self._generation = 0  # bumped by every invalidation
+        self._lock = threading.Lock()
+        self.counts = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0, "stale_puts": 0}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.counts["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.counts["hits"] += 1
+            return entry[1]
+
+    def generation(self) -> int:
+        """Take before reading the user from the database; pass to put()"""
+        with self._lock:
+            return self._generation
+
+    def put(self, key, principal: Principal, generation: int):
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            if generation != self._generation:
+                # Something was invalidated since the read; it may have been this user
+                self.counts["stale_puts"] += 1
+                return
+            self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, principal)
+            self._keys_by_user.setdefault(principal.id, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self.counts["evictions"] += 1
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._generation += 1
+            keys = self._keys_by_user.pop(user_id, ())
+            for key in keys:
+                self._entries.pop(key, None)
+            if keys:
+                self.counts["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            keys = self._keys_by_user.get(entry[1].id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_user[entry[1].id]
+
+    def stats(self) -> dict:
+        lookups = self.counts["hits"] + self.counts["misses"]
+        return {
+            "entries": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            **self.counts,
+            "hit_rate": round(self.counts["hits"] / lookups, 3) if lookups else 0.0,
+        }
+
+
+principal_cache = PrincipalCache()
+
+
+# ---------- Invalidation on User writes ----------
+# Ids are collected at flush and evicted after commit, once the new row is
+# visible to other requests. A request that read the old row before that
+# fails put()'s generation check. Registered on the Session class, which
+# covers both SessionLocal and AsyncSession (its sync_session).
+
+def _user_ids(session, instances):
+    from app.model.user_model import User
+
+    return {obj.id for obj in instances if isinstance(obj, User) and obj.id is not None}
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session, flush_context):
+    changed = _user_ids(session, session.dirty) | _user_ids(session, session.deleted)
+    if changed:
+        session.info.setdefault("changed_user_ids", set()).update(changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session):
+    for user_id in session.info.pop("changed_user_ids", ()):
+        principal_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session):
+    session.info.pop("changed_user_ids", None)
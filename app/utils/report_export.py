@@ -0,0 +1,122 @@
+# app/utils/report_export.py
+"""
+Streaming CSV export of the consultant pool (/admin/report).
+
+Rows come from one query (users + consultant_summaries + skills aggregated
+per user) read through a server-side cursor in batches of
+REPORT_BATCH_SIZE, and are encoded batch by batch, optionally gzip
+compressed, so memory stays flat however many consultants there are. The
+header row is sent before the query runs, so the client starts receiving
+bytes immediately.
+"""
+
+import csv
+import io
+import os
+import zlib
+
+from sqlalchemy import func, select
+
+from app.database import SessionLocal
+from app.model.models import ConsultantSummary, Skill
+from app.model.user_model import User
+from app.utils.skill_search import term_condition
+
+BATCH_SIZE = int(os.getenv("REPORT_BATCH_SIZE", 1000))
+
+HEADER = [
+    "ID", "Name", "Email", "Department", "Status",
+    "Resume Status", "Training Status",
+    "Present Days", "Total Days", "Attendance Rate", "Skills",
+]
+
+
+def _skills_aggregate(dialect_name: str):
+    if dialect_name == "postgresql":
+        return func.string_agg(Skill.skill, ", ")
+    return func.group_concat(Skill.skill, ", ")
+
+
+def report_query(dialect_name: str, department: str = None, skill: str = None, status: str = None):
+    skills = (
+        select(Skill.user_id.label("user_id"), _skills_aggregate(dialect_name).label("skills"))
+        .group_by(Skill.user_id)
+        .subquery()
+    )
+    query = (
+        select(
+            User.id, User.name, User.email, User.department, User.status,
+            User.resume_status, User.training_status,
+            func.coalesce(ConsultantSummary.present_days, 0),
+            func.coalesce(ConsultantSummary.total_days, 0),
+            skills.c.skills,
+        )
+        .outerjoin(ConsultantSummary, ConsultantSummary.user_id == User.id)
+        .outerjoin(skills, skills.c.user_id == User.id)
+        .where(User.role == "consultant")
+        .order_by(User.id)
+    )
+    if department:
+        query = query.where(User.department.ilike(f"%{department}%"))
+    if skill:
+        query = query.where(User.skills.any(term_condition(skill)))
+    if status:
+        query = query.where(User.status == status)
+    return query
+
+
+def _format(row) -> list:
+    user_id, name, email, department, status, resume_status, training_status, present, total, skills = row
+    return [
+        user_id,
+        name,
+        email or "N/A",
+        department or "Unassigned",
+        status,
+        resume_status or "pending",
+        training_status or "not_started",
+        present,
+        total,
+        f"{(present / (total or 1)) * 100:.1f}%",
+        skills or "None",
+    ]
+
+
+def iter_report_csv(department: str = None, skill: str = None, status: str = None,
+                    compress: bool = False, batch_size: int = BATCH_SIZE):
+    """
+    Yield the CSV as bytes chunks. Opens its own session: the response
+    streams after the request's dependencies have been closed.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # wbits=31: gzip container, so the output is a valid .csv.gz file
+    gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    def drain() -> bytes:
+        data = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        return gzip.compress(data) if gzip else data
+
+    writer.writerow(HEADER)
+    first = drain()
+    if gzip:
+        first += gzip.flush(zlib.Z_SYNC_FLUSH)  # push the header out now instead of buffering it
+    yield first
+
+    db = SessionLocal()
+    try:
+        query = report_query(db.get_bind().dialect.name, department, skill, status)
+        # yield_per streams from a server-side cursor (psycopg2 named cursor) in batches
+        result = db.execute(query.execution_options(yield_per=batch_size))
+        for batch in result.partitions():
+            writer.writerows(_format(row) for row in batch)
+            chunk = drain()
+            if chunk:
+                yield chunk
+    finally:
+        db.close()
+
+    if gzip:
+        yield gzip.flush()
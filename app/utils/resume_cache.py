@@ -0,0 +1,82 @@
+# app/utils/resume_cache.py
+"""
+Content-hash cache for AI resume skill extraction.
+
+Keyed by the SHA-256 of the uploaded file bytes: an in-process LRU sits in
+front of the resume_extractions table, so an identical upload skips both
+PDF parsing and the Gemini call.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from sqlalchemy.orm import Session
+
+from app.database import dialect_insert
+from app.model.models import ResumeExtraction
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class ResumeCache:
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.counts = {"memory_hits": 0, "db_hits": 0, "misses": 0}
+
+    def _remember(self, content_hash: str, entry: dict):
+        with self._lock:
+            self._entries[content_hash] = entry
+            self._entries.move_to_end(content_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, db: Session, content_hash: str):
+        """Return {"text", "skills"} for a known file, or None"""
+        with self._lock:
+            entry = self._entries.get(content_hash)
+            if entry is not None:
+                self._entries.move_to_end(content_hash)
+                self.counts["memory_hits"] += 1
+                return entry
+
+        row = db.get(ResumeExtraction, content_hash)
+        if row is None:
+            with self._lock:
+                self.counts["misses"] += 1
+            return None
+
+        entry = {"text": row.text, "skills": json.loads(row.skills_json)}
+        self._remember(content_hash, entry)
+        with self._lock:
+            self.counts["db_hits"] += 1
+        return entry
+
+    def put(self, db: Session, content_hash: str, text: str, skills):
+        """Store an extraction; a concurrent insert of the same file is ignored"""
+        stmt = dialect_insert(db, ResumeExtraction).values(
+            content_hash=content_hash,
+            text=text,
+            skills_json=json.dumps(skills)
+        ).on_conflict_do_nothing(index_elements=[ResumeExtraction.content_hash])
+        db.execute(stmt)
+        self._remember(content_hash, {"text": text, "skills": skills})
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.counts["memory_hits"] + self.counts["db_hits"]
+            lookups = hits + self.counts["misses"]
+            return {
+                **self.counts,
+                "entries": len(self._entries),
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+resume_cache = ResumeCache(int(os.getenv("RESUME_CACHE_SIZE", 256)))
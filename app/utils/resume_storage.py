@@ -0,0 +1,303 @@
+# app/utils/resume_storage.py
+"""
+Content-addressed resume file storage.
+
+Uploads are streamed to a staging file in RESUME_STORAGE_CHUNK_BYTES chunks
+(disk writes off the event loop), SHA-256 hashed while they are written and
+cut off at RESUME_MAX_BYTES. The blob is then stored under its digest in
+sharded directories (ab/cd/abcd...), so identical files are kept once
+however many consultants upload them.
+
+Each blob has a resume_blobs row with a reference count (users.resume_digest
+points at it). Attaching a resume takes the row lock with the increment
+before the blob is put in place, and releasing one deletes the row only at
+zero references before unlinking the file, so a concurrent upload of the
+same content can't lose its file.
+
+Backends implement StorageBackend; RESUME_STORAGE_BACKEND picks one from
+BACKENDS ("local": files under RESUME_STORAGE_DIR).
+
+Move files uploaded before this store (resumes/{user_id}_{name}):
+    python -m app.utils.resume_storage --import-legacy
+"""
+
+import abc
+import asyncio
+import hashlib
+import mimetypes
+import os
+import sys
+import uuid
+from dataclasses import dataclass
+
+from sqlalchemy import delete, select, update
+from starlette.concurrency import run_in_threadpool
+
+from app.database import dialect_insert
+from app.model.models import ResumeBlob
+from app.model.user_model import User
+
+STORAGE_BACKEND = os.getenv("RESUME_STORAGE_BACKEND", "local")
+STORAGE_DIR = os.getenv("RESUME_STORAGE_DIR", "resume_store")
+MAX_BYTES = int(os.getenv("RESUME_MAX_BYTES", 10 * 1024 * 1024))
+CHUNK_BYTES = int(os.getenv("RESUME_STORAGE_CHUNK_BYTES", 1024 * 1024))
+LEGACY_DIR = "resumes"
+
+DOCX_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+class BlobTooLarge(Exception):
+    pass
+
+
+@dataclass
+class StagedBlob:
+    """An upload written and hashed, not yet stored under its digest"""
+    digest: str
+    size: int
+    head: bytes     # first bytes, for content-type sniffing
+    location: str   # backend-specific staging handle
+
+
+class StorageBackend(abc.ABC):
+    """Where blob bytes live; reference counting is done in the database"""
+
+    @abc.abstractmethod
+    async def stage(self, chunks, max_bytes: int) -> StagedBlob:
+        """Consume an async iterator of bytes, hashing as it writes; BlobTooLarge past max_bytes"""
+
+    @abc.abstractmethod
+    def promote(self, staged: StagedBlob):
+        """Store the staged bytes under their digest (a no-op if the blob already exists)"""
+
+    @abc.abstractmethod
+    def discard(self, staged: StagedBlob):
+        """Drop a staged upload that won't be stored"""
+
+    @abc.abstractmethod
+    def exists(self, digest: str) -> bool: ...
+
+    @abc.abstractmethod
+    def open(self, digest: str):
+        """Binary file object positioned at the start of the blob"""
+
+    @abc.abstractmethod
+    def delete(self, digest: str): ...
+
+    def local_path(self, digest: str):
+        """Filesystem path of the blob, when the backend has one (lets responses use sendfile)"""
+        return None
+
+
+class LocalStorage(StorageBackend):
+    def __init__(self, root: str = STORAGE_DIR):
+        self.root = root
+        self.staging = os.path.join(root, "staging")
+        os.makedirs(self.staging, exist_ok=True)
+
+    def local_path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    async def stage(self, chunks, max_bytes: int) -> StagedBlob:
+        location = os.path.join(self.staging, uuid.uuid4().hex)
+        sha256 = hashlib.sha256()
+        size = 0
+        head = b""
+        f = await run_in_threadpool(open, location, "wb")
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise BlobTooLarge(f"File exceeds the {max_bytes} byte limit")
+                if len(head) < 16:
+                    head = (head + chunk)[:16]
+                sha256.update(chunk)
+                await run_in_threadpool(f.write, chunk)
+        except BaseException:
+            await run_in_threadpool(f.close)
+            await run_in_threadpool(_unlink, location)
+            raise
+        await run_in_threadpool(f.close)
+        return StagedBlob(sha256.hexdigest(), size, head, location)
+
+    def promote(self, staged: StagedBlob):
+        path = self.local_path(staged.digest)
+        if os.path.exists(path):
+            _unlink(staged.location)
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            os.replace(staged.location, path)  # atomic: readers never see a partial blob
+        except FileNotFoundError:
+            # delete() of another blob in this shard pruned the directory in between
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(staged.location, path)
+
+    def discard(self, staged: StagedBlob):
+        _unlink(staged.location)
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self.local_path(digest))
+
+    def open(self, digest: str):
+        return open(self.local_path(digest), "rb")
+
+    def delete(self, digest: str):
+        path = self.local_path(digest)
+        _unlink(path)
+        # Prune the shard directories once empty; stops at the first non-empty
+        # one, at the latest at the root, which always holds staging/
+        try:
+            os.removedirs(os.path.dirname(path))
+        except OSError:
+            pass
+
+
+def _unlink(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+BACKENDS = {"local": LocalStorage}
+
+_storage = None
+
+
+def get_storage() -> StorageBackend:
+    global _storage
+    if _storage is None:
+        _storage = BACKENDS[STORAGE_BACKEND]()
+    return _storage
+
+
+def content_type(filename: str, head: bytes) -> str:
+    """Content type from the file's first bytes, then its extension"""
+    if head.startswith(b"%PDF-"):
+        return "application/pdf"
+    if head.startswith(b"PK\x03\x04") and (filename or "").lower().endswith(".docx"):
+        return DOCX_TYPE
+    return mimetypes.guess_type(filename or "")[0] or "application/octet-stream"
+
+
+async def upload_chunks(upload, chunk_size: int = CHUNK_BYTES):
+    """Chunks of a Starlette UploadFile (its spooled file is read off the event loop)"""
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_blob(digest: str, chunk_size: int = CHUNK_BYTES):
+    """Blob contents in chunks, for streaming from backends without local files"""
+    with get_storage().open(digest) as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+# ---------- Reference counting ----------
+
+def _incref_statement(db, staged: StagedBlob, media_type: str):
+    stmt = dialect_insert(db, ResumeBlob).values(
+        digest=staged.digest, size=staged.size, content_type=media_type, ref_count=1,
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[ResumeBlob.digest],
+        set_={"ref_count": ResumeBlob.__table__.c.ref_count + 1},
+    )
+
+
+def _decref_statement(digest: str):
+    return update(ResumeBlob).where(ResumeBlob.digest == digest).values(ref_count=ResumeBlob.ref_count - 1)
+
+
+def _collect_statement(digest: str):
+    return delete(ResumeBlob).where(ResumeBlob.digest == digest, ResumeBlob.ref_count <= 0)
+
+
+async def attach_resume(db, user: User, filename: str, chunks, max_bytes: int = MAX_BYTES) -> ResumeBlob:
+    """
+    Store an upload as the user's resume (AsyncSession; commits). The
+    previous blob is released, and deleted once nothing references it.
+    """
+    storage = get_storage()
+    staged = await storage.stage(chunks, max_bytes)
+    previous = user.resume_digest
+    try:
+        if staged.digest != previous:
+            # The upsert holds the blob's row lock until commit, so a concurrent
+            # release can't delete the file between promote() and our commit
+            await db.execute(_incref_statement(db, staged, content_type(filename, staged.head)))
+            await run_in_threadpool(storage.promote, staged)
+            if previous:
+                await db.execute(_decref_statement(previous))
+            user.resume_digest = staged.digest
+        else:
+            await run_in_threadpool(storage.discard, staged)
+        user.resume_file = os.path.basename(filename or staged.digest)
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        await run_in_threadpool(storage.discard, staged)
+        raise
+    if previous and previous != staged.digest:
+        await collect(db, previous)
+    return await db.get(ResumeBlob, staged.digest)
+
+
+async def collect(db, digest: str) -> bool:
+    """Delete a blob nobody references any more; True if it was removed"""
+    result = await db.execute(_collect_statement(digest))
+    if result.rowcount:
+        # Unlink while the row delete is uncommitted: an upload of the same
+        # content waits on the row lock and then puts the file back
+        await run_in_threadpool(get_storage().delete, digest)
+    await db.commit()
+    return bool(result.rowcount)
+
+
+def import_legacy(db) -> int:
+    """Move users' resumes/{user_id}_{name} files into the store (sync Session)"""
+    storage = get_storage()
+    users = db.execute(
+        select(User).where(User.resume_file.isnot(None), User.resume_digest.is_(None))
+    ).scalars().all()
+    imported = 0
+    for user in users:
+        path = os.path.join(LEGACY_DIR, user.resume_file)
+        if not os.path.exists(path):
+            print(f"Skipping user {user.id}: {path} not found")
+            continue
+
+        async def chunks():
+            with open(path, "rb") as f:
+                while chunk := f.read(CHUNK_BYTES):
+                    yield chunk
+
+        staged = asyncio.run(storage.stage(chunks(), sys.maxsize))
+        db.execute(_incref_statement(db, staged, content_type(user.resume_file, staged.head)))
+        storage.promote(staged)
+        user.resume_digest = staged.digest
+        user.resume_file = user.resume_file.removeprefix(f"{user.id}_")
+        db.commit()
+        os.remove(path)
+        imported += 1
+    return imported
+
+
+if __name__ == "__main__":
+    if "--import-legacy" not in sys.argv[1:]:
+        sys.exit("usage: python -m app.utils.resume_storage --import-legacy")
+
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        count = import_legacy(db)
+        blobs = db.execute(select(ResumeBlob)).scalars().all()
+        print(f"Imported {count} resumes into {len(blobs)} blobs "
+              f"({sum(b.size for b in blobs)} bytes) under {STORAGE_DIR}")
+    finally:
+        db.close()
@@ -0,0 +1,98 @@
+# app/utils/skill_search.py
+"""
+Multi-skill consultant search over the skills table.
+
+Every criterion (skill term + optional minimum proficiency) is matched
+case-insensitively against lower(skill), as an exact value, a prefix or a
+substring. One grouped statement scores each consultant by how many
+criteria they meet (coverage), keeps those meeting all (mode "all") or any
+(mode "any") of them, ranks by coverage then matched proficiency, and
+returns one page plus the total count.
+
+Indexes (see the skills search migration): lower(skill) btree for exact
+and prefix matches, and on Postgres a pg_trgm GIN index on lower(skill)
+for substring matches.
+"""
+
+from sqlalchemy import and_, case, func, or_, select
+from sqlalchemy.orm import Session, selectinload
+
+from app.model.models import Skill
+from app.model.user_model import User
+
+MATCH_MODES = ("exact", "prefix", "substring")
+
+
+def term_condition(term: str, match: str = "exact"):
+    """Case-insensitive match of lower(skills.skill) against `term`"""
+    skill = func.lower(Skill.skill)
+    term = term.strip().lower()
+    if match == "prefix":
+        # The range lets any btree on lower(skill) serve the prefix (SQLite can't for LIKE)
+        return and_(skill >= term, skill < term + "\uffff", skill.startswith(term, autoescape=True))
+    if match == "substring":
+        return skill.contains(term, autoescape=True)
+    return skill == term
+
+
+def search_consultants(db: Session, criteria: list, mode: str = "all", match: str = "exact",
+                       page: int = 1, page_size: int = 20) -> dict:
+    """
+    `criteria` is a list of (term, min_proficiency or None). Returns
+    {"total", "page", "page_size", "results": [...]}, best matches first.
+    """
+    conditions = []
+    for term, min_proficiency in criteria:
+        condition = term_condition(term, match)
+        if min_proficiency is not None:
+            condition = and_(condition, Skill.proficiency >= min_proficiency)
+        conditions.append(condition)
+
+    # Per consultant: which criteria matched, and the best proficiency for each
+    matched = [func.max(case((c, 1), else_=0)) for c in conditions]
+    best = [func.max(case((c, func.coalesce(Skill.proficiency, 0)), else_=0)) for c in conditions]
+    coverage = sum(matched[1:], matched[0])
+    score = sum(best[1:], best[0])
+
+    per_user = (
+        select(
+            Skill.user_id.label("user_id"),
+            coverage.label("coverage"),
+            score.label("score"),
+            *(m.label(f"m{i}") for i, m in enumerate(matched)),
+        )
+        .where(or_(*conditions))  # only rows matching some criterion are read (index-backed)
+        .group_by(Skill.user_id)
+        .having(coverage >= (len(conditions) if mode == "all" else 1))
+        .subquery()
+    )
+
+    rows = db.execute(
+        select(User, per_user, func.count().over().label("total"))
+        .join(per_user, per_user.c.user_id == User.id)
+        .where(User.role == "consultant")
+        .options(selectinload(User.skills))
+        .order_by(per_user.c.coverage.desc(), per_user.c.score.desc(), User.id)
+        .limit(page_size)
+        .offset((page - 1) * page_size)
+    ).all()
+
+    if rows:
+        total = rows[0].total
+    else:  # past the last page; the window count has no row to ride on
+        total = db.scalar(select(func.count()).select_from(per_user)) if page > 1 else 0
+
+    return {
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "results": [{
+            "id": row.User.id,
+            "name": row.User.name,
+            "department": row.User.department,
+            "status": row.User.status,
+            "coverage": round(row.coverage / len(conditions), 3),
+            "matched": [term for i, (term, _) in enumerate(criteria) if getattr(row, f"m{i}")],
+            "skills": [{"skill": s.skill, "proficiency": s.proficiency} for s in row.User.skills],
+        } for row in rows],
+    }
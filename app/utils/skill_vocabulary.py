@@ -0,0 +1,322 @@
+# app/utils/skill_vocabulary.py
+"""
+Local skill extraction from resume text.
+
+A vocabulary of canonical skill names and their aliases ("JS" ->
+"JavaScript", "k8s" -> "Kubernetes") is compiled once into an Aho-Corasick
+automaton, which finds every alias in a single pass over the text. Matches
+only count on word boundaries, so "Java" is not found inside "JavaScript";
+single-letter names ("C", "R") are matched through their longer aliases only.
+Names that are also everyday words or short tokens ("go", "swift", "spark",
+"ai") are listed in AMBIGUOUS: canonical_skill() still maps them, but a text
+scan only finds them through aliases that carry context ("golang", "swift ui").
+
+Used as the instant first result for resume uploads and as the fallback
+when Gemini is slow or unavailable. SKILL_VOCABULARY_FILE may point to a
+JSON file {"Canonical": ["alias", ...]} that extends the built-in list.
+
+Benchmark on the resume corpus:  python -m app.utils.skill_vocabulary resume/
+"""
+
+import json
+import os
+import re
+from collections import Counter, deque
+
+VOCABULARY = {
+    # Languages
+    "Python": ["python3"],
+    "Java": ["java8", "java 8", "java 11", "java 17", "core java"],
+    "JavaScript": ["js", "ecmascript", "es6", "vanilla js"],
+    "TypeScript": [],
+    "C": ["c language", "c programming"],
+    "C++": ["cpp", "c plus plus"],
+    "C#": ["c sharp", "csharp"],
+    "Go": ["golang", "go lang", "go language", "go programming"],
+    "Rust": [],
+    "Kotlin": [],
+    "Swift": ["swiftui", "swift ui", "swift language", "swift programming", "swift 5"],
+    "Scala": [],
+    "Ruby": [],
+    "PHP": [],
+    "R": ["r programming", "r language"],
+    "MATLAB": [],
+    "Perl": [],
+    "Dart": [],
+    "Bash": ["shell scripting", "bash scripting", "shell script"],
+    "PowerShell": [],
+    "SQL": ["structured query language", "t-sql", "tsql", "pl/sql", "plsql"],
+    "HTML": ["html5"],
+    "CSS": ["css3"],
+    # Frontend
+    "React": ["reactjs", "react.js"],
+    "React Native": [],
+    "Angular": ["angularjs", "angular.js"],
+    "Vue.js": ["vuejs", "vue js", "vue 3", "vue3", "vuex"],
+    "Next.js": ["nextjs"],
+    "Redux": [],
+    "Tailwind CSS": ["tailwind", "tailwindcss"],
+    "Bootstrap": [],
+    "jQuery": [],
+    # Backend
+    "Node.js": ["nodejs", "node js"],
+    "Express.js": ["expressjs", "express js"],
+    "Django": [],
+    "Flask": [],
+    "FastAPI": ["fast api"],
+    "Spring Boot": ["springboot", "spring framework", "spring mvc"],
+    "Hibernate": [],
+    ".NET": ["dotnet", "asp.net", ".net core", "asp.net core"],
+    "GraphQL": [],
+    "REST APIs": ["rest api", "restful", "restful apis"],
+    "Microservices": ["microservice", "micro services"],
+    # Data
+    "PostgreSQL": ["postgres", "psql"],
+    "MySQL": [],
+    "MongoDB": ["mongo"],
+    "Redis": [],
+    "Oracle": ["oracle db", "oracle database", "oracle sql", "oracle 19c", "oracle 12c"],
+    "SQLite": [],
+    "Elasticsearch": ["elastic search"],
+    "Cassandra": [],
+    "DynamoDB": [],
+    "Snowflake": [],
+    "Apache Spark": ["pyspark", "spark sql", "spark streaming", "spark mllib"],
+    "Hadoop": [],
+    "Kafka": ["apache kafka"],
+    "Airflow": ["apache airflow"],
+    "ETL": [],
+    "Power BI": ["powerbi"],
+    "Tableau": [],
+    "MS Excel": ["microsoft excel", "advanced excel", "excel vba"],
+    "Pandas": [],
+    "NumPy": [],
+    # ML / AI
+    "Machine Learning": ["ml models", "ml engineer", "ml engineering"],
+    "Deep Learning": [],
+    "Artificial Intelligence": ["ai/ml", "ai ml", "ai engineer"],
+    "Natural Language Processing": ["nlp"],
+    "Computer Vision": ["opencv"],
+    "Generative AI": ["genai", "gen ai", "llm", "llms", "large language models"],
+    "TensorFlow": ["tensor flow"],
+    "PyTorch": [],
+    "Keras": [],
+    "scikit-learn": ["sklearn", "scikit learn"],
+    "Data Analysis": ["data analytics"],
+    "Data Science": [],
+    "Statistics": [],
+    # Cloud / DevOps
+    "AWS": ["amazon web services"],
+    "Azure": ["microsoft azure"],
+    "Google Cloud": ["gcp", "google cloud platform"],
+    "Docker": ["containerization"],
+    "Kubernetes": ["k8s"],
+    "Terraform": [],
+    "Ansible": [],
+    "Jenkins": [],
+    "CI/CD": ["ci cd", "continuous integration", "continuous delivery", "continuous deployment"],
+    "Git": ["git version control"],
+    "Linux": ["unix", "ubuntu"],
+    "DevOps": [],
+    # Practices / tools
+    "Agile": ["scrum", "kanban"],
+    "JIRA": [],
+    "Selenium": [],
+    "Unit Testing": ["junit", "pytest", "jest"],
+    "Figma": [],
+    "Salesforce": [],
+    "SAP": [],
+    "Cybersecurity": ["cyber security", "information security"],
+    "Networking": ["computer networks", "tcp/ip"],
+    "Data Structures": ["dsa", "data structures and algorithms"],
+    "Object-Oriented Programming": ["oop", "oops", "object oriented programming"],
+}
+
+# Everyday words and short tokens that name a skill only in context ("ready
+# to go", "spark plugs", "swift delivery"). canonical_skill() maps them;
+# SkillMatcher never matches them on their own.
+AMBIGUOUS = {
+    "Go": ["go"],
+    "Swift": ["swift"],
+    "Oracle": ["oracle"],
+    "Apache Spark": ["spark"],
+    "Vue.js": ["vue"],
+    "Express.js": ["express"],
+    "Python": ["py"],
+    "Machine Learning": ["ml"],
+    "Artificial Intelligence": ["ai"],
+}
+
+_whitespace = re.compile(r"\s+")
+
+
+def _normalize(text: str) -> str:
+    return _whitespace.sub(" ", text.lower())
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum()
+
+
+def load_vocabulary() -> dict:
+    vocabulary = {canonical: list(aliases) for canonical, aliases in VOCABULARY.items()}
+    path = os.getenv("SKILL_VOCABULARY_FILE")
+    if path:
+        with open(path, encoding="utf-8") as f:
+            for canonical, aliases in json.load(f).items():
+                vocabulary.setdefault(canonical, []).extend(aliases)
+    return vocabulary
+
+
+class SkillMatcher:
+    """Aho-Corasick automaton over every (lower-cased) skill name and alias"""
+
+    def __init__(self, vocabulary: dict, ambiguous: dict = AMBIGUOUS):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]  # per state: [(pattern length, canonical name)]
+
+        skip = {_normalize(word).strip() for words in ambiguous.values() for word in words}
+        for canonical, aliases in vocabulary.items():
+            for pattern in {_normalize(canonical).strip(), *(_normalize(a).strip() for a in aliases)}:
+                # Single letters ("C", "R") and ambiguous words only via their other aliases
+                if len(pattern) > 1 and pattern not in skip:
+                    self._add(pattern, canonical)
+        self._build_failure_links()
+
+    def _add(self, pattern: str, canonical: str):
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(pattern), canonical))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                # Patterns ending here include those ending at the fallback state
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def scan(self, text: str) -> Counter:
+        """Canonical skill -> number of whole-word mentions, in one pass over `text`"""
+        text = _normalize(text)
+        goto, fail, out = self._goto, self._fail, self._out
+        last = len(text) - 1
+        found = Counter()
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not out[state]:
+                continue
+            if i < last and _is_word_char(text[i + 1]):
+                continue  # match continues into a longer word
+            for length, canonical in out[state]:
+                start = i - length + 1
+                if start == 0 or not _is_word_char(text[start - 1]):
+                    found[canonical] += 1
+        return found
+
+
+def estimate_proficiency(mentions: int) -> int:
+    """Rough 1-10 estimate from how often a skill is mentioned (Gemini refines it)"""
+    return min(10, 2 + 2 * mentions)
+
+
+_matcher = None
+
+
+def get_matcher() -> SkillMatcher:
+    global _matcher
+    if _matcher is None:
+        _matcher = SkillMatcher(load_vocabulary())
+    return _matcher
+
+
+_canonical_names = None
+
+
+def canonical_skill(name: str) -> str:
+    """Canonical vocabulary name for a skill or alias ("k8s" -> "Kubernetes"); unknown names unchanged"""
+    global _canonical_names
+    if _canonical_names is None:
+        names = load_vocabulary()
+        for canonical, words in AMBIGUOUS.items():
+            names.setdefault(canonical, []).extend(words)
+        _canonical_names = {
+            _normalize(alias).strip(): canonical
+            for canonical, aliases in names.items() for alias in (canonical, *aliases)
+        }
+    name = name.strip()
+    return _canonical_names.get(_normalize(name), name)
+
+
+def extract_skills(text: str) -> list:
+    """[{skill, proficiency}] found in the text, most mentioned first"""
+    return [
+        {"skill": skill, "proficiency": estimate_proficiency(n)}
+        for skill, n in get_matcher().scan(text).most_common()
+    ]
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    from app.utils.document_extraction import extract_text, shutdown
+
+    corpus_dir = sys.argv[1] if len(sys.argv) > 1 else "resume"
+    texts = {}
+    for name in sorted(os.listdir(corpus_dir)):
+        if name.lower().endswith((".pdf", ".docx")):
+            with open(os.path.join(corpus_dir, name), "rb") as f:
+                texts[name] = extract_text(name, f.read())
+    shutdown()
+
+    start = time.perf_counter()
+    matcher = SkillMatcher(load_vocabulary())
+    build_ms = (time.perf_counter() - start) * 1000
+
+    rounds = int(os.getenv("SKILL_BENCH_ROUNDS", 50))
+    chars = sum(len(t) for t in texts.values())
+    start = time.perf_counter()
+    for _ in range(rounds):
+        results = {name: matcher.scan(text) for name, text in texts.items()}
+    scan_s = (time.perf_counter() - start) / rounds
+
+    # Baseline: one word-boundary regex search per alias
+    skip = {word for words in AMBIGUOUS.values() for word in words}
+    patterns = [
+        (re.compile(r"(?<!\w)" + re.escape(_normalize(p).strip()) + r"(?!\w)"), canonical)
+        for canonical, aliases in load_vocabulary().items() for p in {canonical, *aliases}
+        if len(p.strip()) > 1 and _normalize(p).strip() not in skip
+    ]
+    start = time.perf_counter()
+    for text in texts.values():
+        normalized = _normalize(text)
+        baseline = Counter()
+        for pattern, canonical in patterns:
+            n = len(pattern.findall(normalized))
+            if n:
+                baseline[canonical] += n
+    regex_s = time.perf_counter() - start
+
+    for name, found in results.items():
+        print(f"{name}: {', '.join(s for s, _ in found.most_common(12))}")
+    print(f"{len(texts)} resumes, {chars} chars, {len(patterns)} patterns, automaton built in {build_ms:.1f}ms")
+    print(f"automaton: {scan_s * 1000:.2f}ms per corpus pass ({chars / scan_s / 1e6:.2f}M chars/s)")
+    print(f"per-pattern regex baseline: {regex_s * 1000:.2f}ms per corpus pass")
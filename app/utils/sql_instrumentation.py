@@ -0,0 +1,166 @@
+# app/utils/sql_instrumentation.py
+"""
+Per-request SQL instrumentation.
+
+Engine events count statements and time spent in the database for the
+current request. SQLTimingMiddleware reports the totals as a
+`Server-Timing` header plus one structured log line per request, and flags
+requests that run the same statement shape more than SQL_REPEAT_THRESHOLD
+times (the usual N+1 signature). `query_budget` lets a test assert how many
+statements an endpoint may issue.
+
+Records go to the "app.sql" logger. configure_logging() (called by the app
+at startup) sets its level from SQL_LOG_LEVEL (default INFO: one line per
+request; WARNING: only repeated-statement warnings) and, when logging
+isn't configured otherwise, adds a stderr handler.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+REPEAT_THRESHOLD = int(os.getenv("SQL_REPEAT_THRESHOLD", 10))
+LOG_LEVEL = os.getenv("SQL_LOG_LEVEL", "INFO").upper()
+
+logger = logging.getLogger("app.sql")
+
+
+def configure_logging(level: str = LOG_LEVEL):
+    logger.setLevel(level)
+    # Leave output to the application's logging config (dictConfig, --log-config) if there is one
+    if not logger.handlers and not logging.getLogger().handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+        logger.addHandler(handler)
+
+_current = contextvars.ContextVar("sql_request_stats", default=None)
+_budgets = []
+_budgets_lock = threading.Lock()
+
+_whitespace = re.compile(r"\s+")
+# Expanded IN lists / VALUES tuples: collapse "(?, ?, ?)" or "(%(a)s, %(b)s)" to "(?)"
+_param_list = re.compile(r"\(\s*(?:\?|%\(\w+\)s|%s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|%s|:\w+))*\s*\)")
+
+
+def statement_shape(statement: str) -> str:
+    return _param_list.sub("(?)", _whitespace.sub(" ", statement).strip())
+
+
+class SQLStats:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes = {}
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, seconds: float):
+        shape = statement_shape(statement)
+        with self._lock:
+            self.count += 1
+            self.seconds += seconds
+            self.shapes[shape] = self.shapes.get(shape, 0) + 1
+
+    def repeated(self, threshold: int = REPEAT_THRESHOLD) -> dict:
+        return {shape: n for shape, n in self.shapes.items() if n > threshold}
+
+
+def instrument_engine(engine):
+    """Attach statement counting/timing listeners to a (sync) engine"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        stats = _current.get()
+        if stats is not None:
+            stats.record(statement, elapsed)
+        if _budgets:
+            with _budgets_lock:
+                for budget in _budgets:
+                    budget.record(statement, elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        # after_cursor_execute is skipped for failed statements; drop their start time
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+
+class SQLTimingMiddleware:
+    """Adds `Server-Timing: db;dur=...` and logs per-request SQL totals"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = SQLStats()
+        token = _current.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((
+                    b"server-timing",
+                    f'db;dur={stats.seconds * 1000:.2f};desc="{stats.count} queries"'.encode("latin-1"),
+                ))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            route = getattr(scope.get("route"), "path", None) or scope.get("path")
+            repeated = stats.repeated()
+            logger.info(json.dumps({
+                "event": "sql_request",
+                "method": scope["method"],
+                "route": route,
+                "queries": stats.count,
+                "db_ms": round(stats.seconds * 1000, 2),
+            }))
+            if repeated:
+                logger.warning(json.dumps({
+                    "event": "sql_repeated_statement",
+                    "method": scope["method"],
+                    "route": route,
+                    "threshold": REPEAT_THRESHOLD,
+                    "statements": repeated,
+                }))
+
+
+@contextmanager
+def query_budget(max_queries: int):
+    """
+    Fail if more than `max_queries` statements run inside the block, from any
+    thread (so it also covers requests made through TestClient):
+
+        with query_budget(3):
+            client.get("/admin/consultants")
+    """
+    stats = SQLStats()
+    with _budgets_lock:
+        _budgets.append(stats)
+    try:
+        yield stats
+    finally:
+        with _budgets_lock:
+            _budgets.remove(stats)
+    if stats.count > max_queries:
+        shapes = "\n".join(f"  {n}x {shape}" for shape, n in stats.shapes.items())
+        raise AssertionError(f"Expected at most {max_queries} queries, got {stats.count}:\n{shapes}")
@@ -0,0 +1,145 @@
+# app/utils/training_recommendations.py
+"""
+Stored training recommendations keyed by a skills fingerprint.
+
+Recommendations live in training_recommendations and are served from there
+while the consultant's (skill, proficiency) set is unchanged and the rows are
+younger than the TTL. An empty result is stored as a single placeholder
+row, so consultants Gemini has nothing for aren't regenerated on every load.
+Regeneration is single-flight per consultant and skill set: a burst of
+dashboard loads triggers one Gemini call, not one per request, and the
+others wait for its result. The Gemini call runs with no database
+transaction open and no lock held; only the short rewrite of the stored rows
+is serialized (a fixed set of striped locks, so memory doesn't grow with the
+number of consultants).
+"""
+
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import Future
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from sqlalchemy.orm import Session
+
+from app.model.models import TrainingRecommendation
+
+RECOMMENDATION_TTL = timedelta(hours=float(os.getenv("TRAINING_RECS_TTL_HOURS", 24 * 7)))
+LOCK_STRIPES = int(os.getenv("TRAINING_RECS_LOCK_STRIPES", 64))
+
+# Consultants share a lock when their ids collide modulo LOCK_STRIPES; that
+# only serializes two regenerations, it never skips one
+_locks = [threading.Lock() for _ in range(max(1, LOCK_STRIPES))]
+
+# (user_id, fingerprint) -> Future of the generation in progress
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def skills_fingerprint(skills) -> str:
+    """Stable hash of a consultant's (skill, proficiency) set"""
+    pairs = sorted((s.skill.strip().lower(), s.proficiency or 0) for s in skills)
+    return hashlib.sha256(json.dumps(pairs).encode("utf-8")).hexdigest()
+
+
+def _lock_for(user_id: int) -> threading.Lock:
+    return _locks[hash(user_id) % len(_locks)]
+
+
+def _is_placeholder(row) -> bool:
+    """Row stored when generation returned nothing to recommend"""
+    return row.skill is None and row.course_title is None and row.link is None
+
+
+def _is_fresh(rows, fingerprint: str) -> bool:
+    if not rows:
+        return False
+    now = datetime.now(timezone.utc)
+    for r in rows:
+        if r.skills_fingerprint != fingerprint or r.generated_at is None:
+            return False
+        generated_at = r.generated_at
+        if generated_at.tzinfo is None:
+            generated_at = generated_at.replace(tzinfo=timezone.utc)
+        if now - generated_at > RECOMMENDATION_TTL:
+            return False
+    return True
+
+
+def _stored(db: Session, user_id: int):
+    return db.query(TrainingRecommendation).filter(TrainingRecommendation.user_id == user_id).all()
+
+
+def _serialize(rows):
+    return [{
+        "skill": r.skill,
+        "course_title": r.course_title,
+        "platform": r.platform,
+        "link": r.link,
+        "reason": r.reason
+    } for r in rows if not _is_placeholder(r)]
+
+
+def _generate_once(key, skills, generate):
+    """Run `generate(skills)` once per key; concurrent callers share its result"""
+    with _inflight_lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = _inflight[key] = Future()
+    if not leader:
+        return future.result()
+
+    try:
+        future.set_result(generate(skills))
+    except BaseException as e:
+        future.set_exception(e)
+    finally:
+        with _inflight_lock:
+            del _inflight[key]
+    return future.result()
+
+
+def get_or_generate(db: Session, user_id: int, skills, generate):
+    """
+    Return stored recommendations for `user_id`, calling `generate(skills)`
+    only when the stored set is missing, stale, or was built from other skills.
+    """
+    fingerprint = skills_fingerprint(skills)
+    rows = _stored(db, user_id)
+    if _is_fresh(rows, fingerprint):
+        return _serialize(rows)
+
+    # End the read transaction so no connection is checked out during the
+    # LLM call; the skills are copied first since commit expires them
+    skills = [SimpleNamespace(skill=s.skill, proficiency=s.proficiency) for s in skills]
+    db.commit()
+    recommendations = _generate_once((user_id, fingerprint), skills, generate)
+
+    with _lock_for(user_id):
+        # Another request may have stored a set while we were generating
+        db.expire_all()
+        rows = _stored(db, user_id)
+        if _is_fresh(rows, fingerprint):
+            return _serialize(rows)
+
+        db.query(TrainingRecommendation).filter(
+            TrainingRecommendation.user_id == user_id
+        ).delete(synchronize_session="fetch")
+        now = datetime.now(timezone.utc)
+        db.add_all([
+            TrainingRecommendation(
+                user_id=user_id,
+                skill=r.get("skill"),
+                course_title=r.get("course_title"),
+                platform=r.get("platform"),
+                link=r.get("link"),
+                reason=r.get("reason"),
+                skills_fingerprint=fingerprint,
+                generated_at=now
+            ) for r in recommendations
+        ] or [TrainingRecommendation(user_id=user_id, skills_fingerprint=fingerprint, generated_at=now)])
+        db.commit()
+        return recommendations
@@ -1,12 +1,18 @@
 from fastapi import FastAPI, Depends, HTTPException, Query
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from datetime import date
-from app.database import get_db
+from app.database import get_db, get_async_db, dialect_insert, SessionLocal
 from app.model.user_model import User
-from app.model.models import Assessment, LearningProgress, Attendance, Skill
-from passlib.context import CryptContext
+from app.model.models import Assessment, LearningProgress, Attendance, Skill, ConsultantSummary
+# Registers the listeners that keep consultant_summaries in step with ORM writes
+from app.utils.consultant_summary import get_summary, get_summary_async, refresh_attendance
+from app.utils.attendance_bitmap import get_days_async, get_many_async, record as record_attendance_days
+from app.utils.skill_search import term_condition
+from app.utils.skill_vocabulary import canonical_skill, extract_skills as extract_skills_locally
 import os
 from dotenv import load_dotenv
 
@@ -27,6 +33,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency histograms, served at /metrics (see metrics.py)
+from metrics import MetricsMiddleware
+app.add_middleware(MetricsMiddleware)
+
+# Per-request SQL counts/time as Server-Timing + logs (see app/utils/sql_instrumentation.py)
+from app.utils.sql_instrumentation import SQLTimingMiddleware, configure_logging as configure_sql_logging
+configure_sql_logging()  # SQL_LOG_LEVEL
+app.add_middleware(SQLTimingMiddleware)
+
 from app.routers import user_router
 
 app.include_router(user_router.router, prefix="/auth")
@@ -44,9 +59,10 @@ load_dotenv()
 
 print("EMAIL_PASS from .env:", os.getenv("EMAIL_PASS"))  # ✅ Add this
 
-import google.generativeai as genai
+from app.utils.llm_client import get_llm_client, LLMTimeoutError
 
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+# Shared, concurrency-limited LLM client (see app/utils/llm_client.py)
+llm = get_llm_client()
 
 
 
@@ -60,7 +76,6 @@ app.include_router(auth_router, prefix="/auth")
 
 
 # ---------- Authentication & Core Functions ----------
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 class RegisterRequest(BaseModel):
     name: str
@@ -101,18 +116,22 @@ def upload_resume(data: ResumeUpload, db: Session = Depends(get_db)):
     if not user:
         raise HTTPException(404, "Consultant not found")
     
-    # Simple skill extraction (replace with your AI logic)
-    resume_text = data.resume_text.lower()
-    extracted_skills = [skill for skill in user.skills or [] if skill in resume_text]
+    # Vocabulary match in one pass over the text (see app/utils/skill_vocabulary.py)
+    extracted_skills = extract_skills_locally(data.resume_text)
     
-    user.skills = extracted_skills
+    # Only add skills the consultant doesn't have yet; existing rows keep
+    # their proficiency (set by the consultant or by Gemini)
+    known = {canonical_skill(s.skill).lower() for s in user.skills if s.skill}
+    added_skills = [s for s in extracted_skills if s["skill"].lower() not in known]
+    user.skills.extend(Skill(skill=s["skill"], proficiency=s["proficiency"]) for s in added_skills)
     user.resume_status = "updated"
     db.commit()
     
     return {
         "message": "Resume processed",
         "user_id": user.id,
-        "skills": extracted_skills
+        "skills": extracted_skills,
+        "added_skills": [s["skill"] for s in added_skills]
     }
 
 # ---------- Attendance Tracking ----------
@@ -128,50 +147,66 @@ def mark_attendance(entry: AttendanceMark, db: Session = Depends(get_db)):
     if not user or user.role != "consultant":
         raise HTTPException(404, "Consultant not found")
     
-    # Check if attendance already exists for this date
-    existing = db.query(Attendance).filter(
-        Attendance.user_id == entry.user_id,
-        Attendance.date == entry.date
-    ).first()
-    
-    if existing:
-        existing.status = entry.status
-    else:
-        new_attendance = Attendance(
-            user_id=entry.user_id,
-            date=entry.date,
-            status=entry.status
-        )
-        db.add(new_attendance)
-    
+    # Single round trip: insert, or update the status if the day is already recorded
+    stmt = dialect_insert(db, Attendance).values(
+        user_id=entry.user_id,
+        date=entry.date,
+        status=entry.status
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Attendance.user_id, Attendance.date],
+        set_={"status": stmt.excluded.status}
+    )
+    db.execute(stmt)
+    refresh_attendance(db, [entry.user_id])
+    record_attendance_days(db, [(entry.user_id, entry.date, entry.status)])
     db.commit()
     return {"message": f"Attendance recorded for {user.name}"}
 
 @app.get("/attendance-summary/{user_id}")
-def get_attendance_summary(
+async def get_attendance_summary(
     user_id: int,
     start_date: date = Query(None),
     end_date: date = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get attendance summary for a consultant"""
-    query = db.query(Attendance).filter(Attendance.user_id == user_id)
-    
-    if start_date:
-        query = query.filter(Attendance.date >= start_date)
-    if end_date:
-        query = query.filter(Attendance.date <= end_date)
-        
-    records = query.all()
-    present_days = sum(1 for r in records if r.status == "present")
-    
+    """Get attendance summary for a consultant (popcount over the attendance bitmaps)"""
+    days = await get_days_async(db, user_id)
+    return {"user_id": user_id, **days.summary(start_date, end_date)}
+
+@app.get("/attendance-summary/{user_id}/heatmap")
+async def get_attendance_heatmap(
+    user_id: int,
+    start_date: date = Query(None),
+    end_date: date = Query(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Month-by-month attendance (day codes: 0 no record, 1 absent, 2 present) and streaks"""
+    days = await get_days_async(db, user_id)
     return {
         "user_id": user_id,
-        "total_days": len(records),
-        "present_days": present_days,
-        "attendance_rate": f"{(present_days/len(records))*100:.1f}%" if records else "0%"
+        **days.summary(start_date, end_date),
+        "streaks": days.streaks(start_date, end_date),
+        "months": days.months(start_date, end_date),
     }
 
+class AttendanceSummaryBatch(BaseModel):
+    user_ids: List[int] = Field(..., min_length=1, max_length=5000)
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    streaks: bool = False
+
+@app.post("/attendance-summaries")
+async def get_attendance_summaries(request: AttendanceSummaryBatch, db: AsyncSession = Depends(get_async_db)):
+    """Attendance summaries for many consultants in one query"""
+    user_ids = list(dict.fromkeys(request.user_ids))
+    bitmaps = await get_many_async(db, user_ids)
+    return [{
+        "user_id": user_id,
+        **days.summary(request.start_date, request.end_date),
+        **({"streaks": days.streaks(request.start_date, request.end_date)} if request.streaks else {}),
+    } for user_id, days in bitmaps.items()]
+
 # ---------- Training & Assessment ----------
 class AssessmentSubmission(BaseModel):
     user_id: int
@@ -210,43 +245,47 @@ def submit_assessment(data: AssessmentSubmission, db: Session = Depends(get_db))
 
 # ---------- Admin Dashboard Endpoints ----------
 @app.get("/admin/consultants")
-def list_consultants(
+async def list_consultants(
     department: str = Query(None),
     skill: str = Query(None),
     status: str = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Admin view of all consultants with filtering"""
-    query = db.query(User).filter(User.role == "consultant")
-    
+    # Attendance totals come from the maintained summary row, not the attendance table
+    query = (
+        select(
+            User,
+            func.coalesce(ConsultantSummary.present_days, 0),
+            func.coalesce(ConsultantSummary.total_days, 0),
+        )
+        .outerjoin(ConsultantSummary, ConsultantSummary.user_id == User.id)
+        .where(User.role == "consultant")
+        .options(selectinload(User.skills))  # one extra query for all skills
+    )
+
     if department:
-        query = query.filter(User.department.ilike(f"%{department}%"))
+        query = query.where(User.department.ilike(f"%{department}%"))
     if skill:
-        query = query.filter(User.skills.contains([skill]))
+        query = query.where(User.skills.any(term_condition(skill)))
     if status:
-        query = query.filter(User.status == status)
-        
-    consultants = query.all()
-    
+        query = query.where(User.status == status)
+
+    rows = (await db.execute(query.order_by(User.id))).all()
+
     return [{
         "id": c.id,
         "name": c.name,
         "department": c.department,
-        "skills": c.skills,
+        "skills": [{"skill": s.skill, "proficiency": s.proficiency} for s in c.skills],
         "status": c.status,
         "resume_status": c.resume_status,
-        # Add these new fields
         "attendance_summary": {
-            "present_days": db.query(Attendance)
-                            .filter(Attendance.user_id == c.id)
-                            .filter(Attendance.status == "present")
-                            .count(),
-            "total_days": db.query(Attendance)
-                          .filter(Attendance.user_id == c.id)
-                          .count() or 1  # Avoid division by zero
+            "present_days": present_days,
+            "total_days": total_days or 1  # Avoid division by zero
         },
         "training_status": c.training_status
-    } for c in consultants]
+    } for c, present_days, total_days in rows]
 
 @app.get("/admin/consultant/{user_id}")
 def get_consultant_details(user_id: int, db: Session = Depends(get_db)):
@@ -257,7 +296,7 @@ def get_consultant_details(user_id: int, db: Session = Depends(get_db)):
     
     # Get related records
     assessments = db.query(Assessment).filter(Assessment.user_id == user_id).all()
-    attendance = db.query(Attendance).filter(Attendance.user_id == user_id).all()
+    summary = get_summary(db, user_id)
     
     return {
         "profile": {
@@ -274,85 +313,175 @@ def get_consultant_details(user_id: int, db: Session = Depends(get_db)):
             "percentage": a.percentage
         } for a in assessments],
         "attendance_summary": {
-            "total_days": len(attendance),
-            "present_days": sum(1 for a in attendance if a.status == "present")
+            "total_days": summary["total_days"],
+            "present_days": summary["present_days"]
         }
     }
 
+# ---------- Skill search ----------
+from pydantic import Field
+from app.utils.skill_search import search_consultants
+
+class SkillCriterion(BaseModel):
+    skill: str = Field(..., min_length=1)
+    min_proficiency: Optional[int] = None
+
+class SkillSearchRequest(BaseModel):
+    skills: List[SkillCriterion] = Field(..., min_length=1, max_length=20)
+    mode: str = Field("all", pattern="^(all|any)$")  # all: every skill, any: at least one
+    match: str = Field("exact", pattern="^(exact|prefix|substring)$")
+    page: int = Field(1, ge=1)
+    page_size: int = Field(20, ge=1, le=100)
+
+@app.post("/admin/consultants/search")
+def search_consultants_by_skills(request: SkillSearchRequest, db: Session = Depends(get_db)):
+    """Consultants matching several skills (AND/OR, minimum proficiency), best coverage first"""
+    return search_consultants(
+        db,
+        [(c.skill, c.min_proficiency) for c in request.skills],
+        mode=request.mode,
+        match=request.match,
+        page=request.page,
+        page_size=request.page_size,
+    )
+
+from app.utils.analytics import analytics_cache
+
+@app.get("/admin/analytics")
+def admin_analytics(db: Session = Depends(get_db)):
+    """Department attendance/status, skill and assessment statistics for the whole pool"""
+    return analytics_cache.get(db)
+
+# ---------- Opportunities ----------
+from app.model.models import Opportunity, OpportunitySkill
+from app.utils.opportunity_matching import opportunity_matcher
+
+class OpportunityRequirement(BaseModel):
+    skill: str = Field(..., min_length=1)
+    min_proficiency: Optional[int] = Field(None, ge=1, le=10)
+
+class OpportunityCreate(BaseModel):
+    title: str = Field(..., min_length=1, max_length=100)
+    status: str = Field("active", pattern="^(active|completed)$")
+    required_skills: List[OpportunityRequirement] = Field(..., min_length=1, max_length=50)
+
+def serialize_opportunity(opportunity: Opportunity) -> dict:
+    return {
+        "id": opportunity.id,
+        "title": opportunity.title,
+        "status": opportunity.status,
+        "consultant_id": opportunity.consultant_id,
+        "created_at": opportunity.created_at,
+        "required_skills": [
+            {"skill": r.skill, "min_proficiency": r.min_proficiency} for r in opportunity.required_skills
+        ],
+    }
+
+@app.post("/admin/opportunities", status_code=201)
+def create_opportunity(request: OpportunityCreate, db: Session = Depends(get_db)):
+    opportunity = Opportunity(
+        title=request.title,
+        status=request.status,
+        required_skills=[
+            OpportunitySkill(skill=r.skill.strip(), min_proficiency=r.min_proficiency)
+            for r in request.required_skills
+        ],
+    )
+    db.add(opportunity)
+    db.commit()
+    db.refresh(opportunity)
+    return serialize_opportunity(opportunity)
+
+@app.get("/admin/opportunities")
+def list_opportunities(status: Optional[str] = None, db: Session = Depends(get_db)):
+    query = select(Opportunity).options(selectinload(Opportunity.required_skills)).order_by(Opportunity.id)
+    if status:
+        query = query.where(Opportunity.status == status)
+    return [serialize_opportunity(o) for o in db.execute(query).scalars()]
+
+@app.get("/admin/opportunities/{opportunity_id}/matches")
+def opportunity_matches(opportunity_id: int, k: int = Query(10, ge=1, le=200), db: Session = Depends(get_db)):
+    """Best-matching consultants for an opportunity's required skills"""
+    if db.get(Opportunity, opportunity_id) is None:
+        raise HTTPException(status_code=404, detail="Opportunity not found")
+    matches = opportunity_matcher.consultants_for(opportunity_id, k) or []
+    users = {
+        u.id: u for u in db.execute(
+            select(User).where(User.id.in_([m["user_id"] for m in matches]))
+        ).scalars()
+    }
+    return [{
+        **m,
+        "name": users[m["user_id"]].name,
+        "department": users[m["user_id"]].department,
+        "status": users[m["user_id"]].status,
+    } for m in matches if m["user_id"] in users]
+
+@app.get("/consultants/{user_id}/opportunities")
+def consultant_opportunities(user_id: int, k: int = Query(10, ge=1, le=200)):
+    """Open opportunities that best fit a consultant's skills"""
+    return opportunity_matcher.opportunities_for(user_id, k)
+
+@app.get("/admin/opportunity-matching/stats")
+def opportunity_matching_stats():
+    return opportunity_matcher.stats()
+
 from fastapi import UploadFile, File
-import shutil
+from app.utils.resume_storage import attach_resume, upload_chunks, BlobTooLarge, MAX_BYTES as RESUME_MAX_BYTES
 
 @app.post("/upload-file")
-def upload_resume_file(
+async def upload_resume_file(
     user_id: int,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Uploads a resume file and updates the user's resume_file field
+    Uploads a resume file and updates the user's resume_file field.
+    Stored once per distinct content (app/utils/resume_storage.py).
     """
-    user = db.query(User).filter(User.id == user_id, User.role == "consultant").first()
+    user = (await db.execute(
+        select(User).where(User.id == user_id, User.role == "consultant")
+    )).scalars().first()
     if not user:
         raise HTTPException(status_code=404, detail="Consultant not found")
 
-    # Create folder if it doesn't exist
-    os.makedirs("resumes", exist_ok=True)
-
-    # Save file with unique name
-    filename = f"{user_id}_{file.filename}"
-    filepath = os.path.join("resumes", filename)
-
-    with open(filepath, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-
-    # Save file name in database
-    user.resume_file = filename
-    db.commit()
+    if file.size is not None and file.size > RESUME_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"File exceeds the {RESUME_MAX_BYTES} byte limit")
+    try:
+        blob = await attach_resume(db, user, file.filename, upload_chunks(file))
+    except BlobTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
 
     return {
         "message": "Resume uploaded successfully",
-        "file": filename
+        "file": user.resume_file,
+        "digest": blob.digest,
+        "size": blob.size,
+        "content_type": blob.content_type,
     }
 
 from fastapi import UploadFile, File, Form, HTTPException, Depends
 from sqlalchemy.orm import Session
-import docx
-import fitz  # PyMuPDF
 import os
-import google.generativeai as genai
 import json
-
-@app.post("/process-resume-ai")
-def process_resume_ai(
-    user_id: int = Form(...),
-    file: UploadFile = File(...),
-    db: Session = Depends(get_db)
-):
-    user = db.query(User).filter(User.id == user_id, User.role == "consultant").first()
-    if not user:
-        raise HTTPException(status_code=404, detail="Consultant not found")
-
-    # Extract text based on file type
-    contents = ""
-    if file.filename.endswith(".pdf"):
-        try:
-            with fitz.open(stream=file.file.read(), filetype="pdf") as pdf:
-                contents = "\n".join([page.get_text() for page in pdf])
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"Error reading PDF: {str(e)}")
-    elif file.filename.endswith(".docx"):
-        try:
-            doc = docx.Document(file.file)
-            contents = "\n".join([para.text for para in doc.paragraphs])
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"Error reading DOCX: {str(e)}")
-    else:
-        raise HTTPException(status_code=400, detail="Unsupported file type")
-
-    # Prompt Gemini
-    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-    model = genai.GenerativeModel("gemini-2.0-flash")
-
+import logging
+from app.utils.document_extraction import extract_text, ExtractionError, DocumentTooLarge
+import app.utils.document_extraction as document_extraction
+from app.utils.resume_cache import resume_cache, hash_bytes
+from app.utils.jobs import job_runner, serialize_job
+
+def extract_resume_text(filename: str, file_bytes: bytes) -> str:
+    """Extract text based on file type (parsed on the shared process pool)"""
+    kind = "PDF" if filename.endswith(".pdf") else "DOCX"
+    try:
+        return extract_text(filename, file_bytes)
+    except DocumentTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ExtractionError as e:
+        raise HTTPException(status_code=400, detail=f"Error reading {kind}: {str(e)}")
+
+def ai_extract_skills(contents: str):
+    """Ask Gemini for [{skill, proficiency}] found in the resume text"""
     prompt = f"""
     You are an API. Analyze the resume text below and return ONLY a JSON array with each skill, its proficiency (1–10).
 
@@ -372,69 +501,116 @@ def process_resume_ai(
     {contents}
     """
 
+    try:
+        return llm.generate_json_sync(prompt)
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=500, detail="Gemini returned invalid JSON")
+    except LLMTimeoutError as e:
+        raise HTTPException(status_code=504, detail=f"Gemini error: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Gemini error: {str(e)}")
 
+# "llm": Gemini, falling back to the vocabulary match if it fails; "local": vocabulary only
+SKILL_EXTRACTION_MODE = os.getenv("SKILL_EXTRACTION_MODE", "llm")
+skills_logger = logging.getLogger("app.skills")
 
+@job_runner.handler("resume")
+def run_resume_job(db: Session, job, file_bytes: bytes, set_progress):
+    """Extract skills from an uploaded resume and replace the consultant's skills"""
+    user = db.query(User).filter(User.id == job.user_id, User.role == "consultant").first()
+    if not user:
+        raise HTTPException(status_code=404, detail="Consultant not found")
 
-    try:
-        response = model.generate_content(prompt)
-        skills_data = response.text.strip()
-        import re
-
-        # Remove Markdown-style triple backticks (e.g., ```json ... ```)
-        cleaned_data = re.sub(r"^```(?:json)?\s*|\s*```$", "", skills_data.strip(), flags=re.IGNORECASE)
-        parsed_skills = json.loads(cleaned_data)
-
-        # parsed_skills = json.loads(skills_data)
-        # skills_data = response.text.strip()
-        # print("\n\n========== RAW GEMINI RESPONSE ==========")
-        # print(skills_data)
-        # print("=========================================\n\n")
-        # return {
-        # "raw_output": skills_data
-        # }
-        
+    # Identical files (same SHA-256) skip parsing and the Gemini call
+    content_hash = hash_bytes(file_bytes)
+    fallback_reason = None
+    cached = resume_cache.get(db, content_hash)
+    if cached:
+        parsed_skills = cached["skills"]
+        source = "gemini"  # only Gemini results are cached
+    else:
+        contents = extract_resume_text(job.filename, file_bytes)
+        # Instant first result from the local vocabulary while Gemini works
+        local_skills = extract_skills_locally(contents)
+        set_progress(40, {"skills": local_skills, "source": "local"})
+        source = "local"
+        if SKILL_EXTRACTION_MODE == "local":
+            parsed_skills = local_skills
+        else:
+            try:
+                parsed_skills = ai_extract_skills(contents)
+                source = "gemini"
+            except HTTPException as e:
+                fallback_reason = str(e.detail)
+                skills_logger.warning("Gemini skill extraction failed for job %s, using vocabulary match: %s",
+                                      job.id, fallback_reason)
+                parsed_skills = local_skills
+        if source == "gemini":  # don't cache the fallback; a later upload can still get Gemini's answer
+            resume_cache.put(db, content_hash, contents, parsed_skills)
+            db.commit()  # the extraction is kept even if the skill update fails
+    set_progress(80)
+
+    user.skills.clear()  # optional, if you want to remove old skills first
+
+    user.skills = [
+    Skill(skill=s["skill"], proficiency=s["proficiency"], user_id=user.id)
+    for s in parsed_skills
+    ]
 
+    user.resume_status = "updated"
+    db.commit()
 
+    return {
+        "message": "Resume processed with Gemini AI" if source == "gemini" else "Resume processed with skill vocabulary",
+        "user_id": user.id,
+        "skills": parsed_skills,
+        "source": source,
+        "fallback_reason": fallback_reason,  # why Gemini's answer wasn't used, if it failed
+        "cached": cached is not None
+    }
 
-        # Optional: Update DB with skill names
-        # user.skills = [s["skill"] for s in parsed_skills]
-        user.skills.clear()  # optional, if you want to remove old skills first
+@app.post("/process-resume-ai", status_code=202)
+def process_resume_ai(
+    user_id: int = Form(...),
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db)
+):
+    """Queue AI resume processing; poll /jobs/{job_id} for the result"""
+    user = db.query(User).filter(User.id == user_id, User.role == "consultant").first()
+    if not user:
+        raise HTTPException(status_code=404, detail="Consultant not found")
 
-        user.skills = [
-        Skill(skill=s["skill"], proficiency=s["proficiency"], user_id=user.id)
-        for s in parsed_skills
-        ]
+    if not file.filename.endswith((".pdf", ".docx")):
+        raise HTTPException(status_code=400, detail="Unsupported file type")
 
-        user.resume_status = "updated"
-        db.commit()
+    job = job_runner.submit(db, "resume", user_id, file.filename, file.file.read())
+    return {"job_id": job.id, "status": job.status, "status_url": f"/jobs/{job.id}"}
 
-        return {
-            "message": "Resume processed with Gemini AI",
-            "user_id": user.id,
-            "skills": parsed_skills
-        }
+@app.get("/admin/resume-cache/stats")
+def resume_cache_stats():
+    return resume_cache.stats()
 
-    except json.JSONDecodeError:
-        raise HTTPException(status_code=500, detail="Gemini returned invalid JSON")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Gemini error: {str(e)}")
-    
 @app.get("/consultant/{user_id}/skills")
-def get_skills(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == user_id).first()
+async def get_skills(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    skills = db.query(Skill).filter(Skill.user_id == user_id).all()
+    skills = (await db.execute(select(Skill).where(Skill.user_id == user_id))).scalars().all()
     return [{"skill": s.skill, "proficiency": s.proficiency} for s in skills]
 
 
-from fastapi.responses import FileResponse
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from app.utils.resume_storage import get_storage, iter_blob, content_type, LEGACY_DIR as LEGACY_RESUME_DIR
+from app.utils.http_conditional import conditional_file_response, not_modified, not_modified_response, CACHE_CONTROL
+from app.model.models import ResumeBlob
 
-@app.get("/consultants/{user_id}/resume")
-def download_resume_by_user(user_id: int, db: Session = Depends(get_db)):
+@app.api_route("/consultants/{user_id}/resume", methods=["GET", "HEAD"])
+def download_resume_by_user(user_id: int, request: Request, db: Session = Depends(get_db)):
     """
-    Download resume file by user ID
+    Download resume file by user ID.
+    Supports If-None-Match / If-Modified-Since (304) and Range (206).
     """
     user = db.query(User).filter(User.id == user_id, User.role == "consultant").first()
     if not user:
@@ -442,16 +618,33 @@ def download_resume_by_user(user_id: int, db: Session = Depends(get_db)):
     
     if not user.resume_file:
         raise HTTPException(status_code=404, detail="No resume uploaded for this consultant")
-    
-    file_path = os.path.join("resumes", user.resume_file)
-    if not os.path.exists(file_path):
-        raise HTTPException(status_code=404, detail="Resume file not found")
 
-    return FileResponse(
-        path=file_path,
-        media_type="application/octet-stream",
-        filename=user.resume_file
-    )
+    if user.resume_digest:
+        storage = get_storage()
+        blob = db.get(ResumeBlob, user.resume_digest)
+        if blob is None or not storage.exists(blob.digest):
+            raise HTTPException(status_code=404, detail="Resume file not found")
+        etag = f'"{blob.digest}"'  # strong: the blob is addressed by its content hash
+        path = storage.local_path(blob.digest)
+        if path is None:  # backend without local files: no ranges
+            headers = {"etag": etag, "cache-control": CACHE_CONTROL}
+            if not_modified(request, etag):
+                return not_modified_response(headers)
+            return StreamingResponse(
+                iter_blob(blob.digest),
+                media_type=blob.content_type,
+                headers={**headers, "content-length": str(blob.size),
+                         "content-disposition": f'attachment; filename="{user.resume_file}"'},
+            )
+        return conditional_file_response(request, path, blob.content_type, user.resume_file, etag=etag)
+
+    # Uploaded before the blob store (see resume_storage --import-legacy): mtime/size ETag
+    path = os.path.join(LEGACY_RESUME_DIR, user.resume_file)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Resume file not found")
+    with open(path, "rb") as f:
+        media_type = content_type(user.resume_file, f.read(16))
+    return conditional_file_response(request, path, media_type, user.resume_file)
 
 
 
@@ -473,9 +666,7 @@ def download_consultant_report(
         raise HTTPException(404, "Consultant not found")
     
     # Get attendance data
-    attendance = db.query(Attendance).filter(
-        Attendance.user_id == consultant_id
-    ).all()
+    summary = get_summary(db, consultant_id)
     
     # Prepare CSV data
     output = io.StringIO()
@@ -489,8 +680,8 @@ def download_consultant_report(
     ])
     
     # Calculate attendance
-    present_days = sum(1 for a in attendance if a.status == "present")
-    total_days = len(attendance) if attendance else 1  # Avoid division by zero
+    present_days = summary["present_days"]
+    total_days = summary["total_days"] or 1  # Avoid division by zero
     
     # Write data row
     writer.writerow([
@@ -513,6 +704,26 @@ def download_consultant_report(
             "Content-Disposition": f"attachment; filename={consultant.name}_report.csv"
         }
     )
+
+from app.utils.report_export import iter_report_csv
+
+@app.get("/admin/report")
+def download_pool_report(
+    department: str = Query(None),
+    skill: str = Query(None),
+    status: str = Query(None),
+    gzip: bool = Query(False)
+):
+    """Streamed CSV for every consultant matching the filters (gzip=true for .csv.gz)"""
+    filename = "consultants_report.csv.gz" if gzip else "consultants_report.csv"
+    return StreamingResponse(
+        iter_report_csv(department, skill, status, compress=gzip),
+        media_type="application/gzip" if gzip else "text/csv",
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            "X-Accel-Buffering": "no"
+        }
+    )
 from fastapi import BackgroundTasks
 from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
 from pydantic import EmailStr
@@ -559,9 +770,12 @@ async def send_notification(
 from sqlalchemy.orm import Session
 from app.model.models import Attendance, Training, Recommendation
 from app.model.user_model import User
+from starlette.concurrency import run_in_threadpool
 
-def get_consultant_dashboard_data(db: Session, user_id: int):
-    user = db.query(User).filter(User.id == user_id, User.role == "consultant").first()
+async def get_consultant_dashboard_data(db: AsyncSession, user_id: int):
+    user = (await db.execute(
+        select(User).where(User.id == user_id, User.role == "consultant")
+    )).scalars().first()
     if not user:
         return None
 
@@ -569,13 +783,13 @@ def get_consultant_dashboard_data(db: Session, user_id: int):
     resume_status = user.resume_status or "pending"
 
     # Attendance rate
-    attendance = db.query(Attendance).filter(Attendance.user_id == user_id).all()
-    present_days = sum(1 for a in attendance if a.status == "present")
-    total_days = len(attendance) or 1
+    summary = await get_summary_async(db, user_id)
+    present_days = summary["present_days"]
+    total_days = summary["total_days"] or 1
     attendance_rate = int((present_days / total_days) * 100)
 
-    # Dummy count for opportunities (replace with real logic if needed)
-    opportunities_count = 2
+    # Open opportunities the consultant meets every requirement of (in-memory matcher)
+    opportunities_count = await run_in_threadpool(opportunity_matcher.count_qualified, user_id)
 
     # Training status
     training_status = "not_started"
@@ -584,7 +798,7 @@ def get_consultant_dashboard_data(db: Session, user_id: int):
     workflow_progress = 70 if training_status == "in_progress" else 100 if training_status == "completed" else 20
 
     # Trainings
-    completed_trainings = db.query(Training).filter(Training.user_id == user_id).all()
+    completed_trainings = (await db.execute(select(Training).where(Training.user_id == user_id))).scalars().all()
     trainings_data = [{
         "title": t.title,
         "provider": t.provider,
@@ -594,7 +808,7 @@ def get_consultant_dashboard_data(db: Session, user_id: int):
     } for t in completed_trainings]
 
     # Recommendations
-    recs = db.query(Recommendation).filter(Recommendation.user_id == user_id).all()
+    recs = (await db.execute(select(Recommendation).where(Recommendation.user_id == user_id))).scalars().all()
     recs_data = [{
         "title": r.title,
         "provider": r.provider,
@@ -621,83 +835,104 @@ from app.database import get_db
 # oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 @app.get("/consultants/{user_id}/dashboard")
-def consultant_dashboard(user_id: int, db: Session = Depends(get_db)):
+async def consultant_dashboard(user_id: int, db: AsyncSession = Depends(get_async_db)):
     # from app.utils.consultant_dashboard import get_consultant_dashboard_data  # if placed in separate file
-    data = get_consultant_dashboard_data(db, user_id)
+    data = await get_consultant_dashboard_data(db, user_id)
     if not data:
         raise HTTPException(status_code=404, detail="Consultant not found")
     return data
 
 from fastapi import UploadFile, File
-import csv
 from datetime import datetime, timedelta
+from app.utils.attendance_ingest import ingest_teams_csv
 
 @app.post("/upload-attendance")
 def upload_attendance(file: UploadFile = File(...), db: Session = Depends(get_db)):
     if not file.filename.endswith(".csv"):
         raise HTTPException(status_code=400, detail="File must be a CSV")
 
-    contents = file.file.read().decode("utf-8").splitlines()
-    reader = csv.DictReader(contents)
-
-    for row in reader:
-        # Example: Adapt keys based on Teams CSV format
-        name = row["Full Name"]
-        join_time_str = row["Join Time"]   # e.g., "8/5/2025, 10:00:00 AM"
-        leave_time_str = row["Leave Time"]
-
-        # Parse datetimes
-        join_time = datetime.strptime(join_time_str, "%m/%d/%Y, %I:%M:%S %p")
-        leave_time = datetime.strptime(leave_time_str, "%m/%d/%Y, %I:%M:%S %p")
-        duration = (leave_time - join_time).seconds // 60
-
-        # Get user from DB
-        user = db.query(User).filter(User.full_name == name).first()
-        if not user:
-            continue  # or create user if needed
-
-        # Create attendance record
-        attendance = Attendance(
-            user_id=user.id,
-            date=join_time.date(),
-            join_time=join_time.time(),
-            leave_time=leave_time.time(),
-            duration_minutes=duration
-        )
-        db.add(attendance)
-
-    db.commit()
-    return {"message": "Attendance data processed successfully"}
+    # Streams the upload and bulk-upserts per chunk, see app/utils/attendance_ingest.py
+    try:
+        stats = ingest_teams_csv(db, file.file)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"message": "Attendance data processed successfully", **stats}
 
 
 
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-import google.generativeai as genai
 import os, json
-from metrics import log_request, get_metrics
+from metrics import get_metrics, render_prometheus, start_flusher
+from fastapi.responses import PlainTextResponse
 import time
+from app.utils.training_recommendations import get_or_generate
 # from models import get_db, User  # adjust as needed
 
 # router = APIRouter()
 
+@app.on_event("startup")
+def start_metrics_flusher():
+    start_flusher()  # also folds this worker's counters into the dead-workers total at exit
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Prometheus scrape endpoint, aggregated across workers"""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.get("/metrics/summary")
+def metrics_summary():
+    return get_metrics()
+
+from app.database import engine, async_engine
+from app.utils.db_pool import pool_status
+
+from app.utils.passwords import password_hasher
+
+@app.get("/admin/password-hasher")
+def password_hasher_stats():
+    return password_hasher.stats()
+
+from app.utils.principal_cache import principal_cache
+
+@app.get("/admin/principal-cache/stats")
+def principal_cache_stats():
+    return principal_cache.stats()
+
+@app.get("/admin/db-pool")
+def db_pool_status():
+    """Connection pool usage, for sizing DB_POOL_SIZE / DB_MAX_OVERFLOW"""
+    return {"sync": pool_status(engine), "async": pool_status(async_engine)}
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    await async_engine.dispose()
+
 @app.get("/consultants/{user_id}/training-recommendations", tags=["Training"])
 def get_training_recommendations(user_id: int, db: Session = Depends(get_db)):
     user = db.query(User).filter(User.id == user_id).first()
     if not user or not user.skills:
         raise HTTPException(status_code=404, detail="Consultant or skills not found")
 
+    # Served from training_recommendations until the skill set changes or the TTL expires
+    try:
+        recommendations = get_or_generate(db, user_id, user.skills, generate_training_recommendations)
+        return {"user_id": user_id, "recommendations": recommendations}
+    except LLMTimeoutError as e:
+        raise HTTPException(status_code=504, detail=f"Error generating recommendations: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating recommendations: {str(e)}")
+
+def generate_training_recommendations(skills):
+    """Ask Gemini for courses matching the given Skill rows"""
     # skills_list = json.dumps(user.skills)  # Assuming user.skills is already in list of dicts format
 
     skills_list = json.dumps([
         {"name": skill.skill, "proficiency": skill.proficiency}
-        for skill in user.skills
+        for skill in skills
     ])
 
-    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-    model = genai.GenerativeModel("gemini-2.0-flash")
-
     prompt = f"""
         You are a training recommendation engine.
 
@@ -731,21 +966,11 @@ def get_training_recommendations(user_id: int, db: Session = Depends(get_db)):
         Only return JSON. No extra text.
         """
 
-
-    try:
-        response = model.generate_content(prompt)
-        import re
-        raw_text = re.sub(r"^```(?:json)?\s*|\s*```$", "", response.text.strip())
-        recommendations = json.loads(raw_text)
-        return {"user_id": user_id, "recommendations": recommendations}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating recommendations: {str(e)}")
+    return llm.generate_json_sync(prompt)
 
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from sqlalchemy.orm import Session
-import fitz  # PyMuPDF
 import os
-import google.generativeai as genai
 import json
 from app.model.models import CompletedTraining  # Adjust the path as needed
 
@@ -753,26 +978,15 @@ from app.model.models import CompletedTraining  # Adjust the path as needed
 
 # router = APIRouter()
 
-@app.post("/consultants/{consultant_id}/upload-certificate")
-async def upload_certificate(
-    consultant_id: int,
-    certificate: UploadFile = File(...),
-    db: Session = Depends(get_db)
-):
-    print("Received file:", certificate.filename)
+@job_runner.handler("certificate")
+def run_certificate_job(db: Session, job, file_bytes: bytes, set_progress):
+    """Parse a training certificate with Gemini and record the completed training"""
+    consultant_id = job.user_id
     # Step 1: Extract text from certificate using PyMuPDF
-    try:
-        
-
-        file_bytes = certificate.file.read()
-        with fitz.open(stream=file_bytes, filetype="pdf") as doc:
-            full_text = "\n".join([page.get_text() for page in doc])
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Error reading PDF: {str(e)}")
+    full_text = extract_resume_text(".pdf", file_bytes)
+    set_progress(40)
 
     # Step 2: Prompt Gemini to extract training info
-    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-    model = genai.GenerativeModel("gemini-2.0-flash")
 
     prompt = f"""
 You are an AI assistant for parsing training certificates.
@@ -796,19 +1010,14 @@ Certificate Text:
 """
 
     try:
-        response = model.generate_content(prompt)
-        json_text = response.text.strip()
-
-        # Remove markdown wrapping if present
-        import re
-        cleaned = re.sub(r"^```(?:json)?\s*|\s*```$", "", json_text.strip(), flags=re.IGNORECASE)
-
-        parsed = json.loads(cleaned)
+        parsed = llm.generate_json_sync(prompt)
+    except LLMTimeoutError as e:
+        raise HTTPException(status_code=504, detail=f"Gemini error: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Gemini error: {str(e)}")
-    if not parsed["title"] or not parsed["provider"] or not parsed["completedDate"]:
+    if not parsed.get("title") or not parsed.get("provider") or not parsed.get("completedDate"):
         raise HTTPException(status_code=400, detail="Certificate parsing failed.")
-
+    set_progress(80)
 
     # Step 3: Save to database (optional)
     training = CompletedTraining(
@@ -827,10 +1036,76 @@ Certificate Text:
         "training": parsed
     }
 
+@app.post("/consultants/{consultant_id}/upload-certificate", status_code=202)
+def upload_certificate(
+    consultant_id: int,
+    certificate: UploadFile = File(...),
+    db: Session = Depends(get_db)
+):
+    """Queue certificate parsing; poll /jobs/{job_id} for the result"""
+    print("Received file:", certificate.filename)
+    job = job_runner.submit(db, "certificate", consultant_id, certificate.filename, certificate.file.read())
+    return {"job_id": job.id, "status": job.status, "status_url": f"/jobs/{job.id}"}
+
+
+# ---------- Background Jobs ----------
+from app.model.models import Job
+from starlette.concurrency import run_in_threadpool
+import asyncio
+
+@app.on_event("startup")
+def resume_pending_jobs():
+    job_runner.recover()
+
+@app.on_event("shutdown")
+def stop_extraction_pool():
+    document_extraction.shutdown()
+
+@app.get("/jobs/queue")
+def job_queue():
+    return {"queue_length": job_runner.queue_depth()}
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str, db: Session = Depends(get_db)):
+    job = db.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return serialize_job(job)
+
+def _load_job(job_id: str):
+    db = SessionLocal()
+    try:
+        job = db.get(Job, job_id)
+        return serialize_job(job) if job else None
+    finally:
+        db.close()
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Server-Sent Events stream of job progress until it finishes"""
+    if await run_in_threadpool(_load_job, job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def stream():
+        last = None
+        while True:
+            data = await run_in_threadpool(_load_job, job_id)
+            payload = json.dumps(data, default=str)
+            if payload != last:
+                yield f"event: progress\ndata: {payload}\n\n"
+                last = payload
+            if data["status"] in ("succeeded", "failed"):
+                return
+            await asyncio.sleep(0.5)
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
 
 @app.get("/consultants/{consultant_id}/completed-trainings")
-def get_completed_trainings(consultant_id: int, db: Session = Depends(get_db)):
-    trainings = db.query(CompletedTraining).filter(CompletedTraining.consultant_id == consultant_id).all()
+async def get_completed_trainings(consultant_id: int, db: AsyncSession = Depends(get_async_db)):
+    trainings = (await db.execute(
+        select(CompletedTraining).where(CompletedTraining.consultant_id == consultant_id)
+    )).scalars().all()
     return [
         {
             "title": t.title,
@@ -841,35 +1116,49 @@ def get_completed_trainings(consultant_id: int, db: Session = Depends(get_db)):
 
 
 
-import os
-import google.generativeai as genai
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, status
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 from typing import Optional
 
-# Configuration
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if not GEMINI_API_KEY:
-    # It's crucial to handle this error at startup
-    raise ValueError("GEMINI_API_KEY environment variable is not set. Please set it to your API key.")
-genai.configure(api_key=GEMINI_API_KEY)
-
-# router = APIRouter()
-model = genai.GenerativeModel('gemini-2.0-flash')
-
 class ChatRequest(BaseModel):
     message: str
 
 class ChatResponse(BaseModel):
     response: str
     
-# In-memory storage for conversation history, keyed by a user identifier
-# This is a simple approach for demonstration. A real-world app would use a database.
-# For this example, we'll maintain a single, global conversation.
-conversation = model.start_chat(history=[])
+# Per-user conversation history in a bounded LRU store (see app/utils/chat_sessions.py)
+from app.utils.chat_sessions import chat_sessions
+from app.routers.user_router import get_current_user
+from app.utils.principal_cache import Principal
+
+chat_logger = logging.getLogger("app.chat")
+
+async def summarize_chat(previous_summary: str, turns: list) -> str:
+    """Condense older chat turns (plus the previous summary) into a short summary"""
+    transcript = "\n".join(f"{t['role']}: {' '.join(t['parts'])}" for t in turns)
+    prompt = f"""
+Summarize the conversation below in at most 120 words, keeping facts, names and open questions.
+
+Previous summary:
+{previous_summary or "(none)"}
+
+Conversation:
+{transcript}
+"""
+    return (await llm.generate(prompt)).strip()
+
+async def trim_chat_session(session):
+    """Summarize old turns after the reply has gone out (next turn waits on the lock)"""
+    async with session.lock:
+        await chat_sessions.trim(session, summarize_chat)
 
 @app.post("/chat", response_model=ChatResponse)
-async def chat_with_gemini(request: ChatRequest):
+async def chat_with_gemini(
+    request: ChatRequest,
+    background_tasks: BackgroundTasks,
+    current_user: Principal = Depends(get_current_user)
+):
     """
     Sends a user message to the Gemini Pro model and returns the response.
     """
@@ -879,19 +1168,66 @@ async def chat_with_gemini(request: ChatRequest):
             detail="Message cannot be empty."
         )
         
+    session = chat_sessions.get(current_user.id)
     try:
-        # Send the user's message to the conversation model
-        response = conversation.send_message(request.message)
-        
-        # Extract the text from the response object
-        gemini_text = response.text
-        
+        async with session.lock:
+            # Send the user's message with this user's (trimmed) history
+            gemini_text = await llm.chat(session.context(), request.message)
+            session.append(request.message, gemini_text)
+
+        background_tasks.add_task(trim_chat_session, session)
         return ChatResponse(response=gemini_text)
     
     except Exception as e:
         # Log the full exception for debugging
-        print(f"Gemini API error: {e}")
+        chat_logger.exception("Gemini API error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An error occurred while communicating with the chatbot."
-        )
\ No newline at end of file
+        )
+
+@app.post("/chat/stream")
+async def chat_with_gemini_stream(
+    request: ChatRequest,
+    http_request: Request,
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Same as /chat, but relays the reply as Server-Sent Events while Gemini
+    generates it: `token` events, then `done` (or `error`).
+    """
+    if not request.message.strip():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Message cannot be empty."
+        )
+
+    session = chat_sessions.get(current_user.id)
+
+    async def events():
+        async with session.lock:
+            parts = []
+            try:
+                async for chunk in llm.chat_stream(session.context(), request.message):
+                    if await http_request.is_disconnected():
+                        return  # closing the stream cancels the Gemini call
+                    parts.append(chunk)
+                    yield f"event: token\ndata: {json.dumps({'text': chunk})}\n\n"
+            except Exception as e:
+                chat_logger.exception("Gemini API error: %s", e)
+                yield f"event: error\ndata: {json.dumps({'detail': 'An error occurred while communicating with the chatbot.'})}\n\n"
+                return
+
+            session.append(request.message, "".join(parts))
+            yield "event: done\ndata: {}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(trim_chat_session, session)
+    )
+
+@app.get("/chat/stats")
+def chat_stats():
+    return chat_sessions.stats()
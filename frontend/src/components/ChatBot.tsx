@@ -2,7 +2,6 @@
 
 
 import { useState, useRef, useEffect } from 'react';
-import axios from 'axios';
 import { MessageSquare, X, Send } from 'lucide-react';
 const API_URL = import.meta.env.VITE_API_URL;
 
@@ -22,9 +21,41 @@ const ChatBot = () => {
 
     try {
       // NOTE: Ensure your API endpoint matches this URL.
-      const response = await axios.post(`${API_URL}/chat`, { message: input });
-      const botReply = response.data.response;
-      setMessages((prev) => [...prev, { text: botReply, sender: 'bot' }]);
+      // Stream the reply (Server-Sent Events) so tokens show up as they are generated
+      const response = await fetch(`${API_URL}/chat/stream`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+          Authorization: `Bearer ${localStorage.getItem('access_token')}`,
+        },
+        body: JSON.stringify({ message: input }),
+      });
+      if (!response.ok || !response.body) throw new Error(`HTTP ${response.status}`);
+
+      setMessages((prev) => [...prev, { text: '', sender: 'bot' }]);
+      const appendToReply = (text: string) =>
+        setMessages((prev) => {
+          const last = prev[prev.length - 1];
+          return [...prev.slice(0, -1), { ...last, text: last.text + text }];
+        });
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        const events = buffer.split('\n\n');
+        buffer = events.pop() || '';
+        for (const raw of events) {
+          const event = raw.match(/^event: (.*)$/m)?.[1];
+          const data = JSON.parse(raw.match(/^data: (.*)$/m)?.[1] || '{}');
+          if (event === 'token') appendToReply(data.text);
+          if (event === 'error') throw new Error(data.detail);
+        }
+      }
     } catch (error) {
       console.error('Chat error:', error);
       setMessages((prev) => [...prev, { text: 'Something went wrong!', sender: 'bot' }]);
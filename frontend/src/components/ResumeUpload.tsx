@@ -3,6 +3,7 @@
 // components/ResumeUpload.tsx
 import React, { useState } from 'react';
 import axios from 'axios';
+import { waitForJob } from '../services/jobService';
 
 interface Props {
   onClose: () => void;
@@ -34,8 +35,9 @@ const ResumeUpload: React.FC<Props> = ({ onClose, onUploaded }) => {
       // Step 1: Upload file
       await axios.post(`${API_URL}/upload-file?user_id=${userId}`, uploadFormData);
 
-      // Step 2: Process resume with Gemini AI
-      await axios.post(`${API_URL}/process-resume-ai?user_id=${userId}`, processFormData);
+      // Step 2: Process resume with Gemini AI (runs as a background job)
+      const { data: job } = await axios.post(`${API_URL}/process-resume-ai?user_id=${userId}`, processFormData);
+      await waitForJob(job.job_id);
 
       alert("Resume uploaded and skills updated successfully.");
 
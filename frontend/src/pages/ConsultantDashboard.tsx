@@ -1,6 +1,7 @@
 import ChatBot from '../components/ChatBot';
 import React, { useState, useEffect } from 'react';
 import axios from 'axios';
+import { waitForJob } from '../services/jobService';
 
 import { 
   FileText, 
@@ -136,20 +137,6 @@ useEffect(() => {
   fetchTrainingRecommendations();
 }, []);
 
-// const [recommendations, setRecommendations] = useState([]);
-useEffect(() => {
-  const fetchRecommendations = async () => {
-    try {
-      const response = await axios.get(`/consultants/${userId}/training-recommendations/`);
-      setRecommendations(response.data.recommendations || []);
-    } catch (error) {
-      console.error("Error fetching training recommendations:", error);
-    }
-  };
-
-  fetchRecommendations();
-}, [userId]);
-
 const fetchSkills = async () => {
   try {
     const res = await fetch(`${API_URL}/consultant/${userId}/skills`);
@@ -224,12 +211,14 @@ const handleCertificateUpload = async (event: React.ChangeEvent<HTMLInputElement
       throw new Error("Upload failed");
     }
 
-    const result = await response.json();
+    // Parsing runs as a background job; wait for it, then refresh the list
+    const job = await response.json();
+    const result = await waitForJob(job.job_id);
     alert("Certificate uploaded and parsed successfully!");
     console.log("Certificate upload response:", result);
 
-    // Optional: Update state to reflect new completed trainings
-    setCompletedTrainings(result);  // if response is array of trainings
+    const trainings = await axios.get(`${API_URL}/consultants/${userId}/completed-trainings`);
+    setCompletedTrainings(Array.isArray(trainings.data) ? trainings.data : []);
   } catch (error) {
     console.error("Certificate upload error:", error);
     alert("Failed to upload certificate. Please try again.");
@@ -0,0 +1,22 @@
+import axios from 'axios';
+
+const API_URL = import.meta.env.VITE_API_URL;
+
+export interface Job<T = any> {
+  job_id: string;
+  kind: string;
+  status: 'queued' | 'running' | 'succeeded' | 'failed';
+  progress: number;
+  result: T | null;
+  error: string | null;
+}
+
+// Poll a background job until it finishes; resolves with its result
+export const waitForJob = async <T = any>(jobId: string, intervalMs = 1000): Promise<T> => {
+  while (true) {
+    const { data } = await axios.get<Job<T>>(`${API_URL}/jobs/${jobId}`);
+    if (data.status === 'succeeded') return data.result as T;
+    if (data.status === 'failed') throw new Error(data.error || 'Job failed');
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+};
@@ -1,32 +1,402 @@
 # metrics.py
+"""
+Request metrics with constant memory.
+
+Latencies go into fixed-bucket histograms keyed by (method, route template,
+status class), so memory depends on the number of routes, not the number of
+requests. p50/p95/p99 are estimated from the buckets.
+
+With several uvicorn workers, set METRICS_MULTIPROC_DIR to a shared
+directory: every worker periodically writes its counters there and
+/metrics sums the snapshots of all live workers. Counters must never go
+down, so when a worker exits (or is found dead, or its PID was reused) its
+last snapshot is folded into a persistent dead-workers total
+(metrics_dead.json) before the file is deleted, as prometheus_client's
+multiprocess mode keeps dead workers' counters. Gauges are not summed:
+each reports the busiest live worker, and a dead worker's gauges are dropped.
+"""
+import atexit
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: folding isn't guarded against two workers collecting at once
+    fcntl = None
+
+# Upper bounds in seconds; the last bucket is +Inf
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUANTILES = (0.5, 0.95, 0.99)
+
+MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR")
+FLUSH_INTERVAL_SECONDS = float(os.getenv("METRICS_FLUSH_INTERVAL_SECONDS", 5))
+
 metrics = {
     "total_requests": 0,
     "failed_requests": 0,
-    "latencies": [],
-    "queue_length": 0  # Simulated queue
+    "queue_length": 0  # background jobs queued or running (see app/utils/jobs.py)
 }
 
-def log_request(start_time, success=True):
-    import time
-    end_time = time.time()
-    latency = (end_time - start_time) * 1000  # ms
+# Per-worker levels rather than counters: aggregated with max, not sum
+GAUGES = ("queue_length",)
+
+# (method, route, status_class) -> {"buckets": [...], "sum": float, "count": int}
+_histograms = {}
+_lock = threading.Lock()
+
+logger = logging.getLogger("app.metrics")
+
+
+def status_class(status_code: int) -> str:
+    return f"{status_code // 100}xx"
+
+
+def observe(method: str, route: str, status_code: int, seconds: float):
+    """Record one request"""
+    key = (method, route, status_class(status_code))
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = {"buckets": [0] * (len(BUCKETS) + 1), "sum": 0.0, "count": 0}
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                break
+        else:
+            i = len(BUCKETS)
+        hist["buckets"][i] += 1
+        hist["sum"] += seconds
+        hist["count"] += 1
+
+        metrics["total_requests"] += 1
+        if status_code >= 500:
+            metrics["failed_requests"] += 1
+
+
+def log_request(start_time, success=True, route="unlabelled"):
+    """Record a request timed by the caller (start_time from time.time())"""
+    observe("-", route, 200 if success else 500, time.time() - start_time)
+
+
+def quantile(buckets, count, q):
+    """Estimate a quantile by linear interpolation inside the matching bucket"""
+    if not count:
+        return 0.0
+    rank = q * count
+    seen = 0
+    for i, n in enumerate(buckets):
+        if n and seen + n >= rank:
+            lower = BUCKETS[i - 1] if i > 0 else 0.0
+            upper = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+            return lower + (upper - lower) * (rank - seen) / n
+        seen += n
+    return BUCKETS[-1]
+
+
+# ---------- Multi-process aggregation ----------
+
+def _snapshot():
+    with _lock:
+        return {
+            "metrics": dict(metrics),
+            "histograms": [
+                {"key": list(key), "buckets": list(h["buckets"]), "sum": h["sum"], "count": h["count"]}
+                for key, h in _histograms.items()
+            ],
+        }
+
+
+# Tells this process apart from an earlier one that had the same PID
+_instance = uuid.uuid4().hex[:12]
+_snapshot_name = re.compile(r"metrics_(\d+)(?:_\w+)?\.json")
+
+
+def _snapshot_path():
+    return os.path.join(MULTIPROC_DIR, f"metrics_{os.getpid()}_{_instance}.json")
+
+
+def flush():
+    """Write this worker's counters to METRICS_MULTIPROC_DIR (atomic replace)"""
+    if not MULTIPROC_DIR:
+        return
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+    _write_atomic(_snapshot_path(), _snapshot())
+
+
+def _empty_snapshot():
+    return {"metrics": {}, "histograms": []}
+
+
+def _read_snapshot(path):
+    """A snapshot file's contents; None if it is gone, {} if it is unreadable"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_atomic(path, snapshot):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(snapshot, f)
+    os.replace(tmp, path)
+
+
+def _merge(snapshots, with_gauges=True):
+    """Sum counters and histograms over snapshots; gauges take the max (or are dropped)"""
+    totals = {}
+    histograms = {}
+    for snap in snapshots:
+        for key, value in snap.get("metrics", {}).items():
+            if key in GAUGES:
+                if with_gauges:
+                    totals[key] = max(totals.get(key, 0), value)
+            else:
+                totals[key] = totals.get(key, 0) + value
+        for h in snap.get("histograms", []):
+            key = tuple(h["key"])
+            merged = histograms.setdefault(key, {"buckets": [0] * (len(BUCKETS) + 1), "sum": 0.0, "count": 0})
+            merged["buckets"] = [a + b for a, b in zip(merged["buckets"], h["buckets"])]
+            merged["sum"] += h["sum"]
+            merged["count"] += h["count"]
+    return totals, histograms
+
+
+def _dead_path():
+    return os.path.join(MULTIPROC_DIR, "metrics_dead.json")
 
-    metrics["total_requests"] += 1
-    if not success:
-        metrics["failed_requests"] += 1
-    metrics["latencies"].append(latency)
+
+@contextmanager
+def _dead_lock():
+    """Exclusive lock on the dead-workers total, across processes"""
+    with open(os.path.join(MULTIPROC_DIR, "metrics_dead.lock"), "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        yield  # released when the file is closed
+
+
+def _fold_dead(paths):
+    """
+    Add the counters and histograms of dead workers' snapshots to the
+    dead-workers total, then delete the snapshots. Their gauges are dropped.
+    Call with _dead_lock() held.
+    """
+    if not paths:
+        return
+    snapshots = [_read_snapshot(_dead_path()) or _empty_snapshot()]
+    folded = []
+    for path in paths:
+        snap = _read_snapshot(path)
+        if snap is None:
+            continue  # already folded by another worker
+        snapshots.append(snap)
+        folded.append(path)
+    if not folded:
+        return
+    totals, histograms = _merge(snapshots, with_gauges=False)
+    _write_atomic(_dead_path(), {
+        "metrics": totals,
+        "histograms": [
+            {"key": list(key), "buckets": h["buckets"], "sum": h["sum"], "count": h["count"]}
+            for key, h in histograms.items()
+        ],
+    })
+    for path in folded:
+        _remove(path)
+
+
+def retire():
+    """On exit: fold this worker's final counters into the dead-workers total"""
+    if MULTIPROC_DIR:
+        flush()
+        with _dead_lock():
+            _fold_dead([_snapshot_path()])
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _flush_forever():
+    while True:
+        time.sleep(FLUSH_INTERVAL_SECONDS)
+        try:
+            flush()
+        except OSError:
+            logger.exception("Metrics flush failed")
+
+
+def start_flusher():
+    if MULTIPROC_DIR:
+        atexit.register(retire)
+        threading.Thread(target=_flush_forever, name="metrics-flush", daemon=True).start()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # e.g. EPERM: the process exists but belongs to another user
+    return True
+
+
+def _snapshot_paths():
+    """
+    (live, dead) snapshot files of the other workers. For a PID with
+    several files (the PID was reused) only the newest can be live.
+    """
+    own = _snapshot_path()
+    newest = {}  # pid -> (mtime, path)
+    dead = []
+    for name in os.listdir(MULTIPROC_DIR):
+        match = _snapshot_name.fullmatch(name)
+        path = os.path.join(MULTIPROC_DIR, name)
+        if not match or path == own:
+            continue
+        pid = int(match.group(1))
+        if pid == os.getpid() or not _pid_alive(pid):
+            dead.append(path)
+            continue
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            continue
+        if pid in newest:
+            dead.append(min(newest[pid], (mtime, path))[1])
+            mtime, path = max(newest[pid], (mtime, path))
+        newest[pid] = (mtime, path)
+    return [path for _, path in newest.values()], dead
+
+
+def _collect():
+    """This worker's live counters, the latest snapshot of every other live worker and the dead-workers total"""
+    snapshots = [_snapshot()]
+    if MULTIPROC_DIR and os.path.isdir(MULTIPROC_DIR):
+        # Read under the lock, so a worker folding itself in on exit is
+        # counted exactly once: either as live or in the dead total
+        with _dead_lock():
+            live, dead = _snapshot_paths()
+            _fold_dead(dead)
+            for path in live + [_dead_path()]:
+                snap = _read_snapshot(path)
+                if snap:
+                    snapshots.append(snap)
+
+    totals, histograms = _merge(snapshots)
+    return {key: 0 for key in metrics} | totals, histograms
+
+
+# ---------- Reports ----------
 
 def get_metrics():
-    total = metrics["total_requests"]
-    failed = metrics["failed_requests"]
-    avg_latency = (
-        sum(metrics["latencies"]) / len(metrics["latencies"])
-        if metrics["latencies"] else 0
-    )
+    totals, histograms = _collect()
+    total = totals["total_requests"]
+    failed = totals["failed_requests"]
+    latency_sum = sum(h["sum"] for h in histograms.values())
+    count = sum(h["count"] for h in histograms.values())
     error_rate = (failed / total) * 100 if total else 0
     return {
-        "queue_length": metrics["queue_length"],
+        "queue_length": totals["queue_length"],
         "total_requests": total,
         "error_rate": round(error_rate, 2),
-        "avg_latency_ms": round(avg_latency, 2)
+        "avg_latency_ms": round(latency_sum / count * 1000, 2) if count else 0,
+        "routes": [{
+            "method": method,
+            "route": route,
+            "status": status,
+            "count": h["count"],
+            **{f"p{int(q * 100)}_ms": round(quantile(h["buckets"], h["count"], q) * 1000, 2) for q in QUANTILES}
+        } for (method, route, status), h in sorted(histograms.items())]
     }
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(method, route, status, **extra):
+    pairs = {"method": method, "route": route, "status": status, **extra}
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs.items()) + "}"
+
+
+def render_prometheus() -> str:
+    """Prometheus text exposition format (0.0.4)"""
+    totals, histograms = _collect()
+    lines = [
+        "# HELP http_request_duration_seconds HTTP request latency by route and status class.",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    for (method, route, status), h in sorted(histograms.items()):
+        cumulative = 0
+        for bound, n in zip(list(BUCKETS) + ["+Inf"], h["buckets"]):
+            cumulative += n
+            lines.append(f"http_request_duration_seconds_bucket{_labels(method, route, status, le=bound)} {cumulative}")
+        lines.append(f"http_request_duration_seconds_sum{_labels(method, route, status)} {h['sum']}")
+        lines.append(f"http_request_duration_seconds_count{_labels(method, route, status)} {h['count']}")
+
+    lines += [
+        "# HELP http_request_duration_quantile_seconds Latency quantiles estimated from the histogram buckets.",
+        "# TYPE http_request_duration_quantile_seconds gauge",
+    ]
+    for (method, route, status), h in sorted(histograms.items()):
+        for q in QUANTILES:
+            value = quantile(h["buckets"], h["count"], q)
+            lines.append(f"http_request_duration_quantile_seconds{_labels(method, route, status, quantile=q)} {value}")
+
+    lines += [
+        "# HELP http_requests_total Requests handled.",
+        "# TYPE http_requests_total counter",
+        f"http_requests_total {totals['total_requests']}",
+        "# HELP http_requests_failed_total Requests that returned a 5xx status.",
+        "# TYPE http_requests_failed_total counter",
+        f"http_requests_failed_total {totals['failed_requests']}",
+        "# HELP job_queue_length Background jobs queued or running on the busiest worker.",
+        "# TYPE job_queue_length gauge",
+        f"job_queue_length {totals['queue_length']}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+# ---------- ASGI middleware ----------
+
+class MetricsMiddleware:
+    """Times every HTTP request and records it under its route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router stores the matched route in the scope; use its template
+            # (/jobs/{job_id}) so label cardinality stays bounded
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            observe(scope["method"], path, status_code, time.perf_counter() - start)
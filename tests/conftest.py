@@ -0,0 +1,91 @@
+# tests/conftest.py
+"""
+Shared fixtures: the app runs against a throwaway SQLite database with the
+fake LLM backend, so the suite needs no network, Postgres or API keys.
+
+Settings are read at import time, so they are set here before anything from
+the app is imported.
+"""
+
+import os
+import tempfile
+from datetime import date
+
+import pytest
+
+_tmp = tempfile.mkdtemp(prefix="app-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{os.path.join(_tmp, 'test.db')}",
+    "RESUME_STORAGE_DIR": os.path.join(_tmp, "resume_store"),
+    "JOB_UPLOAD_DIR": os.path.join(_tmp, "job_uploads"),
+    "LLM_BACKEND": "fake",
+    "PASSWORD_BCRYPT_ROUNDS": "4",
+})
+for name, value in {
+    "GEMINI_API_KEY": "test",
+    "SECRET_KEY": "test",
+    "EMAIL_USER": "noreply@example.com",
+    "EMAIL_PASS": "test",
+    "EMAIL_HOST": "localhost",
+    "EMAIL_PORT": "587",
+}.items():
+    os.environ.setdefault(name, value)
+
+
+@pytest.fixture(scope="session")
+def app():
+    import dmain
+
+    return dmain.app
+
+
+@pytest.fixture
+def db_tables(app):
+    """Empty tables for every test (ids restart at 1, so cached principals are dropped too)"""
+    from app.database import Base, engine
+    from app.utils.principal_cache import principal_cache
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    principal_cache.clear()
+    yield
+
+
+@pytest.fixture
+def client(app, db_tables):
+    from fastapi.testclient import TestClient
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def db(db_tables):
+    from app.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def seed_consultants(db, count: int, start: int = 0) -> list:
+    """`count` consultants with two skills and three attendance rows each; returns their ids"""
+    from app.model.models import Attendance, Skill
+    from app.model.user_model import User
+
+    users = []
+    for i in range(start, start + count):
+        user = User(
+            name=f"Consultant {i}", email=f"consultant{i}@example.com", hashed_password="x",
+            role="consultant", department="Engineering", status="bench",
+        )
+        user.skills = [Skill(skill="Python", proficiency=i % 10), Skill(skill="SQL", proficiency=5)]
+        db.add(user)
+        db.flush()
+        for day in range(1, 4):
+            db.add(Attendance(user_id=user.id, date=date(2025, 1, day), status="present" if day > 1 else "absent"))
+        users.append(user.id)
+    db.commit()
+    return users
@@ -0,0 +1,32 @@
+# tests/test_analytics.py
+from datetime import date
+
+from app.model.models import Attendance, Skill
+from app.utils.analytics import analytics_cache, skill_stats
+from conftest import seed_consultants
+
+
+def test_skills_are_grouped_case_insensitively(db):
+    user_id, = seed_consultants(db, 1)
+    db.add_all([Skill(user_id=user_id, skill="python", proficiency=3), Skill(user_id=user_id, skill="PYTHON ")])
+    db.commit()
+
+    stats = {s["skill"].lower().strip(): s for s in skill_stats(db)}
+
+    assert stats["python"]["count"] == 3
+    assert stats["python"]["proficiency_distribution"] == {"unrated": 1, "0": 1, "3": 1}
+    assert stats["sql"]["count"] == 1
+
+
+def test_attendance_writes_leave_the_cache_alone(db):
+    user_id, = seed_consultants(db, 1)
+    analytics_cache.invalidate()
+    first = analytics_cache.get(db)
+
+    db.add(Attendance(user_id=user_id, date=date(2025, 3, 1), status="present"))
+    db.commit()
+    assert analytics_cache.get(db) is first
+
+    db.add(Skill(user_id=user_id, skill="Go", proficiency=4))
+    db.commit()
+    assert analytics_cache.get(db) is not first
@@ -0,0 +1,47 @@
+# tests/test_attendance_bitmap.py
+from datetime import date
+
+from app.model.models import Attendance
+from app.utils.attendance_bitmap import AttendanceDays, get_days, rebuild
+from conftest import seed_consultants
+
+
+def test_null_status_counts_as_a_recorded_day():
+    days = AttendanceDays()
+    days.set(date(2025, 1, 1), "present")
+    days.set(date(2025, 1, 2), None)
+    assert days.summary() == {"total_days": 2, "present_days": 1, "attendance_rate": "50.0%"}
+
+    days.clear(date(2025, 1, 2))
+    days.clear(date(2024, 1, 1))  # outside the bitmap: nothing to forget
+    assert days.summary()["total_days"] == 1
+
+
+def test_orm_writes_keep_the_bitmap_in_step(db):
+    user_id, = seed_consultants(db, 1)  # Jan 1 absent, Jan 2-3 present
+    db.add(Attendance(user_id=user_id, date=date(2025, 1, 4), status=None))
+    db.commit()
+    assert get_days(db, user_id).summary()["total_days"] == 4
+
+    row = db.query(Attendance).filter_by(user_id=user_id, date=date(2025, 1, 2)).one()
+    row.date = date(2025, 1, 6)  # moved: Jan 2 is no longer recorded
+    db.query(Attendance).filter_by(user_id=user_id, date=date(2025, 1, 1)).one().status = "present"
+    db.commit()
+    db.expire_all()
+    assert [m["days"] for m in get_days(db, user_id).months()] == [[2, 0, 2, 1, 0, 2]]
+
+    db.delete(row)
+    db.commit()
+    db.expire_all()
+    assert get_days(db, user_id).summary() == {"total_days": 3, "present_days": 2, "attendance_rate": "66.7%"}
+
+
+def test_rebuild_matches_incremental_bitmaps(db):
+    user_ids = seed_consultants(db, 3)
+    db.add(Attendance(user_id=user_ids[0], date=date(2025, 1, 9), status=None))
+    db.commit()
+    before = {user_id: get_days(db, user_id).as_values() for user_id in user_ids}
+
+    assert rebuild(db) == 3
+    db.expire_all()
+    assert {user_id: get_days(db, user_id).as_values() for user_id in user_ids} == before
@@ -0,0 +1,122 @@
+# tests/test_attendance_ingest.py
+import csv
+import io
+from datetime import date, time
+
+from sqlalchemy import event
+
+from app.model.models import Attendance
+from app.model.user_model import User
+from app.utils.attendance_ingest import ingest_teams_csv, load_name_map
+from conftest import seed_consultants
+
+HEADER = "Full Name,Join Time,Leave Time\n"
+
+
+def _csv(*lines, header=HEADER) -> io.BytesIO:
+    return io.BytesIO((header + "".join(line + "\n" for line in lines)).encode("utf-8"))
+
+
+def _check_ins(db, user_id) -> dict:
+    db.expire_all()
+    rows = db.query(Attendance).filter_by(user_id=user_id).all()
+    return {row.date: (row.status, row.check_in_time) for row in rows}
+
+
+def test_name_map_is_case_insensitive_and_consultants_only(db):
+    user_id, = seed_consultants(db, 1)
+    db.add(User(name="Admin Person", email="admin@example.com", hashed_password="x", role="admin"))
+    db.commit()
+
+    names = load_name_map(db)
+    assert names == {"consultant 0": user_id}
+
+
+def test_rows_are_accepted_or_rejected_with_a_reason(db):
+    user_id, = seed_consultants(db, 1)
+    stats = ingest_teams_csv(db, _csv(
+        '"  CONSULTANT 0 ","1/6/2025, 9:15:00 AM",',
+        '"Someone Else","1/6/2025, 9:00:00 AM",',
+        '"Consultant 0","yesterday",',
+    ))
+
+    assert stats["processed"] == 3
+    assert stats["accepted"] == 1
+    assert stats["rejected"] == 2
+    assert stats["reasons"] == {"unknown_attendee": 1, "invalid_join_time": 1}
+    assert stats["errors"] == [
+        {"line": 3, "reason": "unknown_attendee"},
+        {"line": 4, "reason": "invalid_join_time"},
+    ]
+    assert _check_ins(db, user_id)[date(2025, 1, 6)] == ("present", time(9, 15))
+
+
+def test_earliest_join_wins_within_and_across_chunks(db):
+    user_id, = seed_consultants(db, 1)  # Jan 1 is recorded absent without a check-in
+    ingest_teams_csv(db, _csv(
+        '"Consultant 0","1/1/2025, 10:30:00 AM",',
+        '"Consultant 0","1/1/2025, 9:45:00 AM",',  # same chunk, earlier
+        '"Consultant 0","1/7/2025, 11:00:00 AM",',
+    ), chunk_size=10)
+    assert _check_ins(db, user_id)[date(2025, 1, 1)] == ("present", time(9, 45))
+
+    # one row per chunk: later joins must not overwrite an earlier stored check-in
+    ingest_teams_csv(db, _csv(
+        '"Consultant 0","1/7/2025, 8:30:00 AM",',
+        '"Consultant 0","1/1/2025, 1:00:00 PM",',
+        '"Consultant 0","1/7/2025, 9:00:00 AM",',
+    ), chunk_size=1)
+
+    check_ins = _check_ins(db, user_id)
+    assert check_ins[date(2025, 1, 1)] == ("present", time(9, 45))
+    assert check_ins[date(2025, 1, 7)] == ("present", time(8, 30))
+
+
+def test_each_chunk_is_committed(db):
+    user_ids = seed_consultants(db, 3)
+    commits = []
+    event.listen(db, "after_commit", lambda session: commits.append(1))
+
+    stats = ingest_teams_csv(db, _csv(*(
+        f'"Consultant {i}","1/{day}/2025, 9:00:00 AM",' for i in range(3) for day in (8, 9)
+    )), chunk_size=4)
+
+    assert stats["accepted"] == 6
+    assert len(commits) == 2  # 4 rows, then the remaining 2
+    assert all(_check_ins(db, user_id)[date(2025, 1, 9)][0] == "present" for user_id in user_ids)
+
+
+def test_undecodable_and_malformed_lines_are_rejected(db):
+    user_id, = seed_consultants(db, 1)
+    upload = io.BytesIO(
+        HEADER.encode()
+        + b'"Consultant 0","1/10/2025, 9:00:00 AM",\n'
+        + b'"Caf\xe9 Owner","1/10/2025, 9:00:00 AM",\n'
+        + b'"' + b"x" * (csv.field_size_limit() + 1) + b'","1/11/2025, 9:00:00 AM",\n'
+        + b'"Consultant 0","1/12/2025, 9:00:00 AM",\n'
+    )
+    stats = ingest_teams_csv(db, upload, chunk_size=1)
+
+    assert stats["accepted"] == 2
+    assert stats["reasons"] == {"invalid_encoding": 1, "malformed_row": 1}
+    assert [e["line"] for e in stats["errors"]] == [3, 4]
+    assert {date(2025, 1, 10), date(2025, 1, 12)} <= set(_check_ins(db, user_id))
+
+
+def test_upload_with_unreadable_header_is_a_bad_request(client):
+    response = client.post(
+        "/upload-attendance",
+        files={"file": ("teams.csv", b"\xff\xfeF\x00u\x00l\x00l\x00\n", "text/csv")},
+    )
+    assert response.status_code == 400
+    assert "header" in response.json()["detail"]
+
+
+def test_upload_reports_stats(client, db):
+    seed_consultants(db, 1)
+    response = client.post(
+        "/upload-attendance",
+        files={"file": ("teams.csv", _csv('"Consultant 0","1/13/2025, 9:00:00 AM",').getvalue(), "text/csv")},
+    )
+    assert response.status_code == 200
+    assert response.json()["accepted"] == 1
@@ -0,0 +1,116 @@
+# tests/test_chat_stream.py
+import asyncio
+import json
+
+from app.routers.user_router import create_access_token
+from app.utils.chat_sessions import chat_sessions
+from app.utils.llm_client import FakeBackend, LLMClient
+from conftest import seed_consultants
+
+
+def _events(body: str) -> list:
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_client_relays_chunks_in_order():
+    client = LLMClient(FakeBackend(latency=0.01))
+
+    async def collect():
+        return [chunk async for chunk in client.chat_stream([], "hello there")]
+
+    assert asyncio.run(collect()) == ["echo:", " hello", " there"]
+    assert client.stats["in_flight"] == 0
+
+
+def test_closing_the_stream_cancels_the_backend_call():
+    backend = FakeBackend(latency=0.5)
+    client = LLMClient(backend)
+
+    async def first_chunk():
+        stream = client.chat_stream([], "one two three four five six")
+        chunk = await stream.__anext__()
+        await stream.aclose()
+        await asyncio.sleep(0.05)  # let the client loop process the cancellation
+        return chunk
+
+    assert asyncio.run(first_chunk()) == "echo:"
+    assert backend.in_flight == 0
+    assert client.stats["in_flight"] == 0
+
+
+def test_chat_stream_endpoint(client, db):
+    user_id, = seed_consultants(db, 1)
+    chat_sessions.reset(user_id)
+    token = create_access_token({"sub": "consultant0@example.com", "user_id": user_id, "role": "consultant"})
+
+    response = client.post(
+        "/chat/stream", json={"message": "hi bot"}, headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _events(response.text)
+    assert "".join(data["text"] for name, data in events if name == "token") == "echo: hi bot"
+    assert events[-1] == ("done", {})
+    assert chat_sessions.get(user_id).history[-1] == {"role": "model", "parts": ["echo: hi bot"]}
+
+
+def test_chat_trims_after_replying(client, db, monkeypatch):
+    from app.utils.chat_sessions import ChatSessionStore
+
+    user_id, = seed_consultants(db, 1)
+    store = ChatSessionStore(token_budget=50, keep_recent=2)
+    monkeypatch.setattr("dmain.chat_sessions", store)
+    token = create_access_token({"sub": "consultant0@example.com", "user_id": user_id, "role": "consultant"})
+
+    for message in ("first " * 20, "second " * 20, "x" * 1000):
+        response = client.post("/chat", json={"message": message}, headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 200
+        assert response.json()["response"] == f"echo: {message}"  # the reply itself is never cut
+
+    session = store.get(user_id)
+    assert store.counts["summaries"] == 2
+    assert len(session.history) == 2
+    assert all(len(turn["parts"][0]) <= 100 for turn in session.history)
+
+
+def test_failed_summary_is_logged_and_old_turns_dropped(caplog):
+    from app.utils.chat_sessions import ChatSessionStore
+
+    store = ChatSessionStore(token_budget=50, keep_recent=2)
+    session = store.get("user")
+    session.history = [{"role": "user", "parts": ["word " * 20]} for _ in range(4)]
+
+    async def summarize(summary, turns):
+        raise RuntimeError("model unavailable")
+
+    with caplog.at_level("WARNING", logger="app.chat"):
+        asyncio.run(store.trim(session, summarize))
+
+    assert len(session.history) == 2
+    assert "dropping 2 messages: model unavailable" in caplog.text
+
+
+def test_chat_stream_error_is_logged_and_reported(client, db, monkeypatch, caplog):
+    class FailingLLM:
+        async def chat_stream(self, history, message):
+            raise RuntimeError("quota exceeded")
+            yield
+
+    user_id, = seed_consultants(db, 1)
+    chat_sessions.reset(user_id)
+    monkeypatch.setattr("dmain.llm", FailingLLM())
+    token = create_access_token({"sub": "consultant0@example.com", "user_id": user_id, "role": "consultant"})
+
+    with caplog.at_level("ERROR", logger="app.chat"):
+        response = client.post(
+            "/chat/stream", json={"message": "hi bot"}, headers={"Authorization": f"Bearer {token}"},
+        )
+
+    assert _events(response.text)[-1][0] == "error"
+    assert "Gemini API error: quota exceeded" in caplog.text
+    assert chat_sessions.get(user_id).history == []
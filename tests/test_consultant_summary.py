@@ -0,0 +1,61 @@
+# tests/test_consultant_summary.py
+from datetime import date
+
+from sqlalchemy import insert
+
+from app.model.models import Attendance, ConsultantSummary
+from app.model.user_model import User
+from app.utils import consultant_summary
+from app.utils.sql_instrumentation import query_budget
+from conftest import seed_consultants
+
+
+def _summaries(db) -> dict:
+    db.expire_all()
+    return {row.user_id: consultant_summary.as_dict(row) for row in db.query(ConsultantSummary)}
+
+
+def test_refresh_attendance_recounts_core_writes(db):
+    user_id, = seed_consultants(db, 1)
+    db.execute(insert(Attendance), [{"user_id": user_id, "date": date(2025, 2, d), "status": "present"}
+                                    for d in (1, 2)])
+    consultant_summary.refresh_attendance(db, [user_id, user_id])
+    db.commit()
+
+    summary = consultant_summary.get_summary(db, user_id)
+    assert (summary["present_days"], summary["total_days"]) == (4, 5)
+
+
+def test_refresh_attendance_creates_missing_rows(db):
+    user_id, = seed_consultants(db, 1)
+    db.query(ConsultantSummary).delete()
+    db.commit()
+
+    consultant_summary.refresh_attendance(db, [user_id])
+    db.commit()
+    assert _summaries(db)[user_id]["total_days"] == 3
+
+
+def test_rebuild_matches_incremental_summaries_for_consultants_only(db):
+    seed_consultants(db, 3)
+    admin = User(name="Admin", email="admin@example.com", hashed_password="x", role="admin")
+    db.add(admin)
+    db.commit()
+    incremental = {user_id: row for user_id, row in _summaries(db).items() if user_id != admin.id}
+
+    db.query(ConsultantSummary).delete()
+    db.commit()
+    assert consultant_summary.rebuild(db) == 3
+    assert _summaries(db) == incremental
+
+
+def test_rebuild_statements_do_not_grow_with_consultants(db):
+    seed_consultants(db, 2)
+    with query_budget(20) as small:
+        consultant_summary.rebuild(db)
+    seed_consultants(db, 20, start=2)
+    with query_budget(20) as large:
+        consultant_summary.rebuild(db)
+
+    assert small.shapes == large.shapes
+    assert not any(" IN " in shape.upper() for shape in large.shapes)
@@ -0,0 +1,55 @@
+# tests/test_consultants_listing.py
+import json
+import logging
+
+from app.utils.sql_instrumentation import query_budget
+from conftest import seed_consultants
+
+# consultants + attendance summaries in one query, skills in one selectinload query
+LISTING_QUERIES = 2
+
+
+def _listing_queries(client, **params) -> int:
+    with query_budget(LISTING_QUERIES) as stats:
+        response = client.get("/admin/consultants", params=params)
+    assert response.status_code == 200
+    return stats.count
+
+
+def test_listing_query_count_does_not_grow_with_consultants(client, db):
+    seed_consultants(db, 5)
+    client.get("/admin/consultants")  # first request pays for connection setup
+    small = _listing_queries(client)
+
+    seed_consultants(db, 45, start=5)
+    large = _listing_queries(client)
+
+    assert small == large
+    assert len(client.get("/admin/consultants").json()) == 50
+
+
+def test_listing_filters_keep_the_query_count(client, db):
+    seed_consultants(db, 10)
+    client.get("/admin/consultants")
+    assert _listing_queries(client, skill="python", department="eng", status="bench") <= LISTING_QUERIES
+
+
+def test_listing_includes_attendance_summary(client, db):
+    seed_consultants(db, 1)
+    consultant = client.get("/admin/consultants").json()[0]
+    assert consultant["attendance_summary"] == {"present_days": 2, "total_days": 3}
+    assert {s["skill"] for s in consultant["skills"]} == {"Python", "SQL"}
+
+
+def test_requests_are_logged_with_their_query_count(client, db, caplog):
+    seed_consultants(db, 2)
+    with caplog.at_level("INFO", logger="app.sql"):
+        client.get("/admin/consultants")
+    records = [json.loads(r.getMessage()) for r in caplog.records if r.name == "app.sql"]
+    assert records[-1]["event"] == "sql_request"
+    assert records[-1]["route"] == "/admin/consultants"
+    assert records[-1]["queries"] >= LISTING_QUERIES
+
+
+def test_sql_logger_is_enabled_at_import(app):
+    assert logging.getLogger("app.sql").getEffectiveLevel() == logging.INFO
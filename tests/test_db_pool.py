@@ -0,0 +1,61 @@
+# tests/test_db_pool.py
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine, event, exc, text
+
+from app.utils.db_pool import InstrumentedQueuePool, pool_status
+
+
+def _engine(tmp_path, connect_delay: float = 0.0, **options):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=InstrumentedQueuePool, **options)
+    if connect_delay:
+        @event.listens_for(engine, "do_connect")
+        def _slow_connect(dialect, conn_rec, cargs, cparams):
+            time.sleep(connect_delay)
+
+    return engine
+
+
+def test_opening_connections_is_not_counted_as_waiting(tmp_path):
+    engine = _engine(tmp_path, connect_delay=0.2, pool_size=1, max_overflow=1)
+    with engine.connect() as a, engine.connect() as b:  # one pooled, one overflow connection
+        a.execute(text("select 1"))
+        b.execute(text("select 1"))
+
+    status = pool_status(engine)
+    assert status["checkouts"] == 2
+    assert status["max_wait_ms"] < 100
+    assert status["max_overflow"] == 1
+
+
+def test_queue_wait_and_timeouts_are_recorded(tmp_path):
+    engine = _engine(tmp_path, pool_size=1, max_overflow=0, pool_timeout=0.3)
+    held = engine.connect()
+    release = threading.Timer(0.15, held.close)
+    release.start()
+    with engine.connect():  # waits for the held connection
+        pass
+    release.join()
+
+    held = engine.connect()
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    held.close()
+
+    status = pool_status(engine)
+    assert status["checkouts"] == 4
+    assert status["checkout_timeouts"] == 1
+    assert status["max_wait_ms"] >= 250
+    assert 0 < status["avg_wait_ms"] < status["max_wait_ms"]
+
+
+def test_counters_survive_dispose(tmp_path):
+    engine = _engine(tmp_path)
+    with engine.connect():
+        pass
+    engine.dispose()
+    with engine.connect():
+        pass
+    assert pool_status(engine)["checkouts"] == 2
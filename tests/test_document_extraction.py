@@ -0,0 +1,35 @@
+# tests/test_document_extraction.py
+import os
+
+import pytest
+
+from app.utils import document_extraction
+from app.utils.document_extraction import ExtractionError, iter_text_chunks
+
+RESUME = os.path.join(os.path.dirname(__file__), "..", "resume", "13_RESUME-final.pdf")
+
+
+def _crash(*args):
+    os._exit(1)  # a worker dying mid-task, e.g. killed for memory
+
+
+@pytest.fixture
+def pdf():
+    with open(RESUME, "rb") as f:
+        yield f.read()
+    document_extraction.shutdown()
+
+
+def test_pdf_text_is_extracted(pdf):
+    assert "".join(iter_text_chunks("cv.pdf", pdf)).strip()
+
+
+def test_broken_pool_is_replaced(pdf, monkeypatch):
+    with monkeypatch.context() as patch:
+        patch.setattr(document_extraction, "_pdf_pages_text", _crash)
+        broken = document_extraction.get_pool()
+        with pytest.raises(ExtractionError):
+            list(iter_text_chunks("cv.pdf", pdf))
+
+    assert document_extraction.get_pool() is not broken
+    assert "".join(iter_text_chunks("cv.pdf", pdf)).strip()
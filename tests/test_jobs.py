@@ -0,0 +1,53 @@
+# tests/test_jobs.py
+import json
+import time
+
+from app.model.models import Job
+from app.model.user_model import User
+from app.utils.jobs import JobRunner
+from conftest import seed_consultants
+
+
+def _wait(db, job_id: str, timeout: float = 5.0) -> Job:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        db.expire_all()
+        job = db.get(Job, job_id)
+        if job.status in ("succeeded", "failed"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_progress_does_not_commit_the_handlers_writes(db):
+    user_id, = seed_consultants(db, 1)
+    runner = JobRunner(max_workers=1)
+
+    @runner.handler("test")
+    def handler(job_db, job, file_bytes, set_progress):
+        job_db.get(User, job.user_id).name = "half-written"
+        set_progress(55, {"step": "parsed"})
+        raise RuntimeError("handler failed")
+
+    job = _wait(db, runner.submit(db, "test", user_id, "cv.pdf", b"%PDF-").id)
+
+    assert job.status == "failed"
+    assert job.error == "handler failed"
+    assert job.progress == 55
+    assert json.loads(job.result_json) == {"step": "parsed", "partial": True}
+    assert db.get(User, user_id).name == "Consultant 0"
+
+
+def test_successful_job_records_the_result(db):
+    user_id, = seed_consultants(db, 1)
+    runner = JobRunner(max_workers=1)
+
+    @runner.handler("test")
+    def handler(job_db, job, file_bytes, set_progress):
+        set_progress(50)
+        return {"size": len(file_bytes)}
+
+    job = _wait(db, runner.submit(db, "test", user_id, "cv.pdf", b"12345").id)
+
+    assert (job.status, job.progress) == ("succeeded", 100)
+    assert json.loads(job.result_json) == {"size": 5}
@@ -0,0 +1,44 @@
+# tests/test_llm_client.py
+import asyncio
+
+import pytest
+
+from app.utils.llm_client import FakeBackend, LLMClient, LLMError, LLMTimeoutError
+
+
+def test_concurrency_is_bounded():
+    backend = FakeBackend(latency=0.02)
+    client = LLMClient(backend, max_concurrency=3)
+
+    async def burst():
+        return await asyncio.gather(*(client.generate(f"prompt {i}") for i in range(12)))
+
+    assert asyncio.run(burst()) == ["[]"] * 12
+    assert backend.calls == 12
+    assert backend.peak_in_flight == 3
+    assert client.stats["in_flight"] == 0
+
+
+def test_retryable_failures_are_retried_then_raised():
+    backend = FakeBackend(latency=0, fail_rate=1.0)
+    client = LLMClient(backend, max_retries=2, backoff_base=0.001)
+
+    with pytest.raises(LLMError):
+        client.generate_sync("prompt")
+    assert backend.calls == 3
+    assert client.stats["retries"] == 2
+    assert client.stats["failures"] == 1
+
+
+def test_slow_calls_time_out():
+    client = LLMClient(FakeBackend(latency=1.0), timeout=0.05, max_retries=0)
+
+    with pytest.raises(LLMTimeoutError):
+        asyncio.run(client.chat([], "hello"))
+    assert client.stats["timeouts"] == 1
+
+
+def test_generate_json_strips_code_fences():
+    client = LLMClient(FakeBackend(latency=0, reply='```json\n["Python", "SQL"]\n```'))
+    assert asyncio.run(client.generate_json("skills")) == ["Python", "SQL"]
+    assert client.generate_json_sync("skills") == ["Python", "SQL"]
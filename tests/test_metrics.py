@@ -0,0 +1,83 @@
+# tests/test_metrics.py
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import metrics
+
+
+def _dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def _write(directory, name, total_requests, queue_length=0, mtime=None):
+    path = directory / name
+    path.write_text(json.dumps({
+        "metrics": {"total_requests": total_requests, "failed_requests": 0, "queue_length": queue_length},
+        "histograms": [{
+            "key": ["GET", "/ping", "2xx"], "buckets": [total_requests] + [0] * len(metrics.BUCKETS),
+            "sum": total_requests * 0.001, "count": total_requests,
+        }],
+    }))
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return path
+
+
+@pytest.fixture
+def multiproc_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "MULTIPROC_DIR", str(tmp_path))
+    monkeypatch.setitem(metrics.metrics, "total_requests", 1)
+    monkeypatch.setitem(metrics.metrics, "queue_length", 2)
+    return tmp_path
+
+
+def test_dead_workers_are_folded_into_the_totals(multiproc_dir):
+    live = os.getppid()
+    _write(multiproc_dir, f"metrics_{live}_aaaa.json", 10, queue_length=5)
+    dead = _write(multiproc_dir, f"metrics_{_dead_pid()}_bbbb.json", 1000, queue_length=50)
+
+    totals, histograms = metrics._collect()
+
+    assert totals["total_requests"] == 1011
+    assert totals["queue_length"] == 5  # busiest live worker; a dead worker's gauge is dropped
+    assert histograms[("GET", "/ping", "2xx")]["count"] == 1010
+    assert not dead.exists()
+
+    # counters never go down: the dead worker stays counted once its file is gone
+    assert metrics._collect()[0]["total_requests"] == 1011
+    dead_total = json.loads((multiproc_dir / "metrics_dead.json").read_text())
+    assert "queue_length" not in dead_total["metrics"]
+
+
+def test_reused_pid_folds_the_older_snapshots(multiproc_dir):
+    live = os.getppid()
+    old = _write(multiproc_dir, f"metrics_{live}_old.json", 1000, mtime=1_000_000)
+    _write(multiproc_dir, f"metrics_{live}_new.json", 10)
+    earlier_self = _write(multiproc_dir, f"metrics_{os.getpid()}_previous.json", 500)
+
+    totals, _ = metrics._collect()
+
+    assert totals["total_requests"] == 1511
+    assert not old.exists()
+    assert not earlier_self.exists()
+
+
+def test_exiting_worker_keeps_its_counters(multiproc_dir):
+    metrics.flush()
+    assert metrics._collect()[0]["total_requests"] == 1
+
+    metrics.retire()
+
+    assert [path.name for path in multiproc_dir.glob("*.json")] == ["metrics_dead.json"]
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setitem(metrics.metrics, "total_requests", 0)  # a fresh worker
+        patch.setitem(metrics.metrics, "queue_length", 0)
+        totals, _ = metrics._collect()
+    assert totals["total_requests"] == 1
+    assert totals["queue_length"] == 0
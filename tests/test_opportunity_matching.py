@@ -0,0 +1,129 @@
+# tests/test_opportunity_matching.py
+import pytest
+
+from app.model.models import Opportunity, OpportunitySkill, Skill
+from app.utils.opportunity_matching import OpportunityMatcher, opportunity_matcher
+from conftest import seed_consultants
+
+
+def _matcher(skills, opportunities=()) -> OpportunityMatcher:
+    """A matcher over fixed rows: skills {user_id: {skill: proficiency}}, opportunities {id: [(skill, min)]}"""
+    matcher = OpportunityMatcher(reload_seconds=float("inf"), session_factory=None)
+    matcher.load((user_id, skill, p) for user_id, user_skills in skills.items() for skill, p in user_skills.items())
+    matcher.load_opportunities(
+        (opportunity_id, f"Opportunity {opportunity_id}", skill, minimum)
+        for opportunity_id, reqs in dict(opportunities).items() for skill, minimum in reqs
+    )
+    return matcher
+
+
+def test_scores_credit_partial_proficiency():
+    matcher = _matcher({
+        1: {"Python": 8, "SQL": 5},
+        2: {"Python": 3},
+        3: {"k8s": 6},
+    })
+
+    ranked = matcher.rank_consultants([("Python", 6), ("Kubernetes", None)])
+
+    assert [(m["user_id"], m["score"], m["qualified"]) for m in ranked] == [
+        (3, 0.5, False),   # "k8s" is Kubernetes (any level: all 6 count as surplus); no Python
+        (1, 0.5, False),   # Python met with 2 to spare; no Kubernetes
+        (2, 0.25, False),  # Python at half the minimum
+    ]
+    assert ranked[0]["matched"] == ["Kubernetes"]
+
+
+def test_qualified_only_when_every_minimum_is_met():
+    matcher = _matcher({1: {"Python": 6, "SQL": 4}, 2: {"Python": 9, "SQL": 9}})
+
+    ranked = matcher.rank_consultants([("python", 6), ("sql", 5)])
+
+    assert [m["user_id"] for m in ranked if m["qualified"]] == [2]
+    assert ranked[1] == {"user_id": 1, "score": 0.9, "qualified": False, "matched": ["Python"]}
+
+
+def test_top_k_order_and_ties():
+    matcher = _matcher({
+        5: {"Python": 7},
+        2: {"Python": 7},
+        9: {"Python": 10},  # same score, more proficiency above the minimum
+        4: {"Python": 1},
+        7: {"SQL": 9},      # no matching skill: never ranked
+    })
+
+    ranked = matcher.rank_consultants([("Python", 5)], k=3)
+    assert [m["user_id"] for m in ranked] == [9, 2, 5]  # then equal keys by ascending id
+    assert len(matcher.rank_consultants([("Python", 5)], k=10)) == 4
+
+
+def test_unknown_skills_match_nobody_and_add_no_columns():
+    matcher = _matcher({1: {"Python": 8}})
+    skills_before = matcher.stats()["skills"]
+
+    assert matcher.rank_consultants([("Cobol", None)]) == []
+    ranked = matcher.rank_consultants([("Python", None), ("Fortran 77", 3)])
+
+    assert [(m["user_id"], m["score"]) for m in ranked] == [(1, 0.5)]
+    assert matcher.stats()["skills"] == skills_before
+
+
+def test_opportunities_for_a_consultant():
+    matcher = _matcher(
+        {1: {"Python": 8, "SQL": 4}},
+        {10: [("Python", 5)], 11: [("Python", 5), ("SQL", 8)], 12: [("Go", 3)]},
+    )
+
+    ranked = matcher.opportunities_for(1)
+
+    assert [(o["opportunity_id"], o["score"], o["qualified"]) for o in ranked] == [(10, 1.0, True), (11, 0.75, False)]
+    assert ranked[1]["missing"] == ["SQL"]
+    assert matcher.count_qualified(1) == 1
+
+
+@pytest.fixture
+def matcher(db):
+    opportunity_matcher.invalidate()  # tables are recreated for every test
+    return opportunity_matcher
+
+
+def test_skill_writes_reach_the_matcher_incrementally(matcher, db):
+    first, second = seed_consultants(db, 2)  # Python at 0 and 1, SQL at 5
+    assert [m["user_id"] for m in matcher.rank_consultants([("Rust", None)])] == []
+    before = matcher.stats()
+
+    db.add(Skill(user_id=second, skill="Rust", proficiency=7))
+    db.commit()
+    assert [m["user_id"] for m in matcher.rank_consultants([("Rust", None)])] == [second]
+
+    rust = db.query(Skill).filter_by(user_id=second, skill="Rust").one()
+    rust.user_id = first  # moved: both consultants are reloaded
+    db.commit()
+    assert [m["user_id"] for m in matcher.rank_consultants([("Rust", None)])] == [first]
+
+    db.delete(rust)
+    db.commit()
+    assert matcher.rank_consultants([("Rust", None)]) == []
+
+    stats = matcher.stats()
+    assert stats["full_loads"] == before["full_loads"]
+    assert stats["user_reloads"] == before["user_reloads"] + 3
+
+
+def test_opportunity_writes_reload_the_requirements(matcher, db):
+    user_id, = seed_consultants(db, 1)
+    assert matcher.opportunities_for(user_id) == []
+
+    opportunity = Opportunity(title="Data platform", status="active",
+                              required_skills=[OpportunitySkill(skill="SQL", min_proficiency=5)])
+    db.add(opportunity)
+    db.commit()
+    assert [o["title"] for o in matcher.opportunities_for(user_id)] == ["Data platform"]
+
+    opportunity.required_skills.append(OpportunitySkill(skill="Spark", min_proficiency=5))
+    db.commit()
+    assert matcher.opportunities_for(user_id)[0]["missing"] == ["Apache Spark"]
+
+    opportunity.status = "completed"
+    db.commit()
+    assert matcher.opportunities_for(user_id) == []
@@ -0,0 +1,43 @@
+# tests/test_principal_cache.py
+import dataclasses
+
+import pytest
+
+from app.model.user_model import User
+from app.routers.user_router import create_access_token
+from app.utils.principal_cache import Principal, PrincipalCache, principal_cache
+from conftest import seed_consultants
+
+
+def test_put_is_refused_after_an_invalidation():
+    cache = PrincipalCache(max_size=10, ttl=60)
+    old = Principal(1, "a@example.com", "consultant")
+
+    generation = cache.generation()  # request A starts reading user 1
+    cache.invalidate(1)              # request B commits a change to user 1
+    cache.put((1, old.email), old, generation)
+
+    assert cache.get((1, old.email)) is None
+    assert cache.counts["stale_puts"] == 1
+
+    cache.put((1, old.email), old, cache.generation())
+    assert cache.get((1, old.email)) is old
+
+
+def test_principals_are_immutable():
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        Principal(1, "a@example.com", "consultant").role = "admin"
+
+
+def test_role_change_is_seen_by_the_next_request(client, db):
+    user_id, = seed_consultants(db, 1)
+    token = create_access_token({"sub": "consultant0@example.com", "user_id": user_id, "role": "consultant"})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert client.post("/chat", json={"message": "hi"}, headers=headers).status_code == 200
+    cached = principal_cache.get((user_id, "consultant0@example.com"))
+    assert cached == Principal(user_id, "consultant0@example.com", "consultant")
+
+    db.get(User, user_id).role = "admin"
+    db.commit()
+    assert principal_cache.get((user_id, "consultant0@example.com")) is None
@@ -0,0 +1,50 @@
+# tests/test_report_export.py
+import csv
+import gzip
+import io
+
+from app.utils.report_export import HEADER, iter_report_csv
+from conftest import seed_consultants
+
+
+def _rows(body: bytes) -> list:
+    return list(csv.reader(io.StringIO(body.decode("utf-8"))))
+
+
+def test_report_streams_every_consultant(client, db):
+    seed_consultants(db, 3)
+
+    response = client.get("/admin/report")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["content-disposition"] == "attachment; filename=consultants_report.csv"
+    assert response.headers["x-accel-buffering"] == "no"
+    assert "content-length" not in response.headers  # streamed, not buffered
+    header, *rows = _rows(response.content)
+    assert header == HEADER
+    assert [row[1] for row in rows] == ["Consultant 0", "Consultant 1", "Consultant 2"]
+    assert rows[0][3:] == ["Engineering", "bench", "pending", "not_started", "2", "3", "66.7%", "Python, SQL"]
+
+
+def test_report_filters_and_gzip(client, db):
+    seed_consultants(db, 2)
+
+    plain = client.get("/admin/report", params={"skill": "python", "status": "bench"})
+    compressed = client.get("/admin/report", params={"skill": "python", "status": "bench", "gzip": "true"})
+
+    assert compressed.headers["content-type"] == "application/gzip"
+    assert compressed.headers["content-disposition"].endswith("consultants_report.csv.gz")
+    assert gzip.decompress(compressed.content) == plain.content
+    assert len(_rows(plain.content)) == 3
+    assert len(_rows(client.get("/admin/report", params={"status": "billable"}).content)) == 1
+
+
+def test_header_is_sent_before_the_rows_are_read(db):
+    seed_consultants(db, 5)
+
+    chunks = iter_report_csv(batch_size=2)
+
+    assert _rows(next(chunks)) == [HEADER]
+    batches = [_rows(chunk) for chunk in chunks]
+    assert [len(batch) for batch in batches] == [2, 2, 1]
@@ -0,0 +1,98 @@
+# tests/test_resume_download.py
+import os
+
+import pytest
+
+from conftest import seed_consultants
+
+RESUME = os.path.join(os.path.dirname(__file__), "..", "resume", "13_RESUME-final.pdf")
+URL = "/consultants/{}/resume"
+
+
+@pytest.fixture
+def pdf():
+    with open(RESUME, "rb") as f:
+        return f.read()
+
+
+@pytest.fixture
+def resume(client, db, pdf):
+    """(url, first response) for a consultant with an uploaded resume"""
+    user_id, = seed_consultants(db, 1)
+    upload = client.post(f"/upload-file?user_id={user_id}", files={"file": ("cv.pdf", pdf, "application/pdf")})
+    assert upload.status_code == 200
+    url = URL.format(user_id)
+    return url, client.get(url)
+
+
+def test_download_has_strong_etag_and_validators(resume, pdf):
+    _, response = resume
+    assert response.status_code == 200
+    assert response.content == pdf
+    assert response.headers["content-type"] == "application/pdf"
+    etag = response.headers["etag"]
+    assert etag.startswith('"') and not etag.startswith("W/")
+    assert response.headers["last-modified"]
+    assert response.headers["cache-control"] == "private, no-cache"
+    assert response.headers["accept-ranges"] == "bytes"
+
+
+@pytest.mark.parametrize("if_none_match", ["{etag}", "W/{etag}", '"other", {etag}', "*"])
+def test_if_none_match_returns_304(client, resume, if_none_match):
+    url, first = resume
+    response = client.get(url, headers={"If-None-Match": if_none_match.format(etag=first.headers["etag"])})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == first.headers["etag"]
+
+
+def test_changed_etag_returns_the_file(client, resume, pdf):
+    url, first = resume
+    response = client.get(url, headers={"If-None-Match": '"other"', "If-Modified-Since": first.headers["last-modified"]})
+    assert response.status_code == 200  # If-None-Match takes precedence
+    assert response.content == pdf
+
+
+def test_if_modified_since(client, resume):
+    url, first = resume
+    assert client.get(url, headers={"If-Modified-Since": first.headers["last-modified"]}).status_code == 304
+    assert client.get(url, headers={"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"}).status_code == 200
+    assert client.get(url, headers={"If-Modified-Since": "not a date"}).status_code == 200
+
+
+def test_range_request(client, resume, pdf):
+    url, _ = resume
+    response = client.get(url, headers={"Range": "bytes=0-9"})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes 0-9/{len(pdf)}"
+    assert response.content == pdf[:10]
+
+
+def test_if_range(client, resume, pdf):
+    url, first = resume
+    matching = client.get(url, headers={"Range": "bytes=0-9", "If-Range": first.headers["etag"]})
+    assert matching.status_code == 206
+    stale = client.get(url, headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert stale.status_code == 200
+    assert stale.content == pdf
+
+
+def test_unsatisfiable_range(client, resume, pdf):
+    url, _ = resume
+    response = client.get(url, headers={"Range": f"bytes={len(pdf) + 10}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"].endswith(f"*/{len(pdf)}")
+
+
+def test_head(client, resume, pdf):
+    url, first = resume
+    response = client.head(url)
+    assert response.status_code == 200
+    assert response.content == b""
+    assert response.headers["content-length"] == str(len(pdf))
+    assert response.headers["etag"] == first.headers["etag"]
+
+
+def test_missing_resume_is_404(client, db):
+    user_id, = seed_consultants(db, 1)
+    assert client.get(URL.format(user_id)).status_code == 404
@@ -0,0 +1,48 @@
+# tests/test_resume_storage.py
+import asyncio
+import hashlib
+import os
+
+from app.utils.resume_storage import LocalStorage
+
+
+async def _chunks(data: bytes):
+    yield data
+
+
+def _store(storage: LocalStorage, data: bytes) -> str:
+    staged = asyncio.run(storage.stage(_chunks(data), 1024))
+    storage.promote(staged)
+    return staged.digest
+
+
+def test_delete_prunes_empty_shard_directories(tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    digest = _store(storage, b"resume one")
+    assert digest == hashlib.sha256(b"resume one").hexdigest()
+
+    storage.delete(digest)
+
+    assert not os.path.exists(tmp_path / digest[:2])
+    assert sorted(os.listdir(tmp_path)) == ["staging"]
+
+
+def test_delete_keeps_shards_still_in_use(tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    digest = _store(storage, b"resume one")
+    neighbour = digest[:4] + "0" * 60  # same ab/cd shard
+    open(storage.local_path(neighbour), "wb").close()
+
+    storage.delete(digest)
+
+    assert os.path.exists(storage.local_path(neighbour))
+    assert not storage.exists(digest)
+
+
+def test_promote_recreates_a_pruned_shard(tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    digest = _store(storage, b"resume one")
+    storage.delete(digest)
+
+    assert _store(storage, b"resume one") == digest
+    assert storage.exists(digest)
@@ -0,0 +1,69 @@
+# tests/test_skill_extraction.py
+import os
+from types import SimpleNamespace
+
+from fastapi import HTTPException
+
+from app.model.user_model import User
+from app.utils.skill_vocabulary import canonical_skill, extract_skills
+from conftest import seed_consultants
+
+RESUME = os.path.join(os.path.dirname(__file__), "..", "resume", "17_RESUME-final.pdf")
+
+
+def test_upload_resume_merges_new_skills(client, db):
+    user_id, = seed_consultants(db, 1)
+    db.get(User, user_id).skills[0].proficiency = 9  # Python, rated by hand
+    db.commit()
+
+    response = client.post("/upload-resume", json={
+        "user_id": user_id,
+        "resume_text": "Python developer: python3, Docker, k8s. Python scripts in production.",
+    })
+
+    assert response.status_code == 200
+    assert sorted(response.json()["added_skills"]) == ["Docker", "Kubernetes"]
+    db.expire_all()
+    skills = {s.skill: s.proficiency for s in db.get(User, user_id).skills}
+    assert skills["Python"] == 9
+    assert skills["SQL"] == 5
+    assert set(skills) == {"Python", "SQL", "Docker", "Kubernetes"}
+
+
+def test_everyday_words_are_not_skills():
+    found = {s["skill"] for s in extract_skills(
+        "Ready to go the extra mile. Code on GitHub. Sold spark plugs. Swift delivery. Vue over the bay. "
+        "Express shipping. AI-assisted ML pipelines at Oracle Park."
+    )}
+    assert not found & {"Go", "Git", "Apache Spark", "Swift", "Vue.js", "Express.js",
+                        "Machine Learning", "Artificial Intelligence", "Oracle"}
+
+
+def test_ambiguous_skills_are_found_in_context():
+    found = {s["skill"] for s in extract_skills("Golang services, SwiftUI apps, PySpark jobs, Vue 3, Oracle DB")}
+    assert found >= {"Go", "Swift", "Apache Spark", "Vue.js", "Oracle"}
+
+
+def test_canonical_names_still_map_ambiguous_words():
+    assert canonical_skill("spark") == "Apache Spark"
+    assert canonical_skill(" Go ") == "Go"
+    assert canonical_skill("GitHub") == "GitHub"
+
+
+def test_resume_job_records_why_gemini_was_not_used(db, app, monkeypatch):
+    import dmain
+
+    def failing_gemini(contents):
+        raise HTTPException(status_code=504, detail="Gemini error: LLM call timed out after 30s")
+
+    monkeypatch.setattr(dmain, "ai_extract_skills", failing_gemini)
+    user_id, = seed_consultants(db, 1)
+    with open(RESUME, "rb") as f:
+        pdf = f.read()
+    job = SimpleNamespace(id="job1", user_id=user_id, filename="cv.pdf")
+
+    result = dmain.run_resume_job(db, job, pdf, lambda pct, partial=None: None)
+
+    assert result["source"] == "local"
+    assert result["fallback_reason"] == "Gemini error: LLM call timed out after 30s"
+    assert result["skills"]
@@ -0,0 +1,70 @@
+# tests/test_skill_search.py
+from app.model.models import Skill
+from app.model.user_model import User
+from app.utils.skill_search import search_consultants
+
+
+def _consultant(db, name, skills: dict) -> int:
+    user = User(name=name, email=f"{name.lower()}@example.com", hashed_password="x",
+                role="consultant", department="Engineering", status="bench")
+    user.skills = [Skill(skill=skill, proficiency=level) for skill, level in skills.items()]
+    db.add(user)
+    db.commit()
+    return user.id
+
+
+def _names(result) -> list:
+    return [r["name"] for r in result["results"]]
+
+
+def test_exact_match_ignores_case_and_ranks_by_proficiency(db):
+    _consultant(db, "Ada", {"Python": 5, "SQL": 9})
+    _consultant(db, "Bo", {"python": 8})
+    _consultant(db, "Cy", {"PyTorch": 9})
+
+    result = search_consultants(db, [(" PYTHON ", None)])
+    assert _names(result) == ["Bo", "Ada"]
+    assert result["total"] == 2
+
+    assert _names(search_consultants(db, [("python", 6)])) == ["Bo"]
+    assert _names(search_consultants(db, [("python", None), ("sql", None)])) == ["Ada"]
+
+
+def test_any_mode_ranks_by_coverage(db):
+    _consultant(db, "Ada", {"Python": 5, "SQL": 9})
+    _consultant(db, "Bo", {"python": 8})
+
+    result = search_consultants(db, [("python", None), ("sql", None)], mode="any")
+
+    assert _names(result) == ["Ada", "Bo"]
+    assert [r["coverage"] for r in result["results"]] == [1.0, 0.5]
+    assert result["results"][1]["matched"] == ["python"]
+
+
+def test_prefix_and_substring_matches(db):
+    _consultant(db, "Ada", {"Python": 5})
+    _consultant(db, "Bo", {"PyTorch": 9})
+    _consultant(db, "Cy", {"Spark (PySpark)": 7})
+
+    assert _names(search_consultants(db, [("py", None)], match="prefix")) == ["Bo", "Ada"]
+    assert _names(search_consultants(db, [("py", None)], match="substring")) == ["Bo", "Cy", "Ada"]
+
+
+def test_like_wildcards_in_terms_are_literal(db):
+    _consultant(db, "Ada", {"Node Core": 6})
+    _consultant(db, "Bo", {"100% Coverage": 4, "snake_case": 5})
+
+    # unescaped, "_" and "%" would match any one character / any run of them
+    assert _names(search_consultants(db, [("e_c", None)], match="substring")) == ["Bo"]
+    assert _names(search_consultants(db, [("%", None)], match="substring")) == ["Bo"]
+    assert _names(search_consultants(db, [("snake_", None)], match="prefix")) == ["Bo"]
+    assert _names(search_consultants(db, [("100%", None)], match="prefix")) == ["Bo"]
+
+
+def test_pages_past_the_end_keep_the_total(db):
+    for name in ("Ada", "Bo", "Cy"):
+        _consultant(db, name, {"Python": 5})
+
+    assert _names(search_consultants(db, [("python", None)], page=2, page_size=2)) == ["Cy"]
+    result = search_consultants(db, [("python", None)], page=3, page_size=2)
+    assert result["results"] == [] and result["total"] == 3
@@ -0,0 +1,79 @@
+# tests/test_training_recommendations.py
+from app.model.user_model import User
+from app.utils.training_recommendations import get_or_generate
+from conftest import seed_consultants
+
+
+def _counting(result):
+    calls = []
+
+    def generate(skills):
+        calls.append(skills)
+        return result
+
+    return generate, calls
+
+
+def test_recommendations_are_reused_until_skills_change(db):
+    user = db.get(User, seed_consultants(db, 1)[0])
+    course = {"skill": "Python", "course_title": "Advanced Python", "platform": "Udemy",
+              "link": "https://example.com/python", "reason": "Go deeper"}
+    generate, calls = _counting([course])
+
+    assert get_or_generate(db, user.id, user.skills, generate) == [course]
+    assert get_or_generate(db, user.id, user.skills, generate) == [course]
+    assert len(calls) == 1
+
+    user.skills[0].proficiency = 9
+    db.commit()
+    get_or_generate(db, user.id, user.skills, generate)
+    assert len(calls) == 2
+
+
+def test_empty_results_are_cached(db):
+    user = db.get(User, seed_consultants(db, 1)[0])
+    generate, calls = _counting([])
+
+    assert get_or_generate(db, user.id, user.skills, generate) == []
+    assert get_or_generate(db, user.id, user.skills, generate) == []
+    assert len(calls) == 1
+
+
+def test_generation_runs_outside_the_transaction_and_once_per_burst(db):
+    import threading
+    import time
+
+    from app.database import SessionLocal
+
+    user_id = seed_consultants(db, 1)[0]
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def generate(skills):
+        calls.append(skills)
+        assert not db.in_transaction()  # no connection held while the LLM runs
+        started.set()
+        release.wait(5)
+        return [{"skill": "SQL", "course_title": "Query Tuning"}]
+
+    def load(session):
+        with session:
+            user = session.get(User, user_id)
+            results.append(get_or_generate(session, user_id, user.skills, generate))
+
+    results = []
+    waiters = [threading.Thread(target=load, args=(SessionLocal(),)) for _ in range(3)]
+    first = threading.Thread(target=lambda: results.append(
+        get_or_generate(db, user_id, db.get(User, user_id).skills, generate)))
+    first.start()
+    assert started.wait(5)
+    for thread in waiters:
+        thread.start()
+    time.sleep(0.2)  # let the waiters find the generation in flight
+    release.set()
+    for thread in [first, *waiters]:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert len(results) == 4
+    assert all(r[0]["course_title"] == "Query Tuning" for r in results)